@@ -0,0 +1,122 @@
+"""
+ResumeGod V4.0 — Agent DAG scheduler
+Runs a set of async nodes as soon as their dependencies have produced
+results, with per-node timeouts, cancellation and partial results.
+Every node leaves a timing trace so slow paths are visible.
+"""
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+NodeFn = Callable[[dict], Awaitable[object]]
+EventFn = Callable[[dict], None]
+
+
+@dataclass
+class Node:
+    """`fn` receives {dep_name: dep_result} and returns this node's result."""
+    name: str
+    fn: NodeFn
+    deps: tuple = ()
+    timeout: Optional[float] = None
+
+
+@dataclass
+class DagResult:
+    results: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    trace: list = field(default_factory=list)
+    wall_ms: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors
+
+
+async def run_dag(nodes: list[Node], on_event: Optional[EventFn] = None) -> DagResult:
+    """
+    Execute `nodes`. A node whose dependency failed, timed out or was skipped
+    is itself skipped. If the caller is cancelled, all running nodes are
+    cancelled and the cancellation propagates.
+
+    `on_event` gets {"node", "status", "at_ms", ...} on every transition
+    (status: started | done | failed | timeout | skipped).
+    """
+    by_name = {n.name: n for n in nodes}
+    for n in nodes:
+        missing = [d for d in n.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Node {n.name!r} depends on unknown {missing}")
+
+    t0 = time.perf_counter()
+    out = DagResult()
+    spans: dict[str, dict] = {}
+    running: dict[asyncio.Task, str] = {}
+    waiting = dict(by_name)
+
+    def now_ms() -> float:
+        return round((time.perf_counter() - t0) * 1000, 2)
+
+    def emit(name: str, status: str, **extra):
+        span = spans.setdefault(name, {"node": name})
+        span["status"] = status
+        if status == "started":
+            span["start_ms"] = now_ms()
+        else:
+            span["end_ms"] = now_ms()
+            if "start_ms" in span:
+                span["duration_ms"] = round(span["end_ms"] - span["start_ms"], 2)
+        span.update(extra)
+        if on_event is not None:
+            on_event({"node": name, "status": status, "at_ms": now_ms(), **extra})
+
+    async def call(node: Node, inputs: dict):
+        if node.timeout is None:
+            return await node.fn(inputs)
+        return await asyncio.wait_for(node.fn(inputs), timeout=node.timeout)
+
+    def schedule_ready():
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, node in list(waiting.items()):
+                if any(d in out.errors for d in node.deps):
+                    del waiting[name]
+                    out.errors[name] = "skipped: upstream failed"
+                    emit(name, "skipped")
+                    progressed = True
+                elif all(d in out.results for d in node.deps):
+                    del waiting[name]
+                    inputs = {d: out.results[d] for d in node.deps}
+                    emit(name, "started")
+                    running[asyncio.create_task(call(node, inputs), name=f"dag:{name}")] = name
+
+    try:
+        schedule_ready()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                try:
+                    out.results[name] = task.result()
+                    emit(name, "done")
+                except asyncio.TimeoutError:
+                    out.errors[name] = f"timeout after {by_name[name].timeout}s"
+                    emit(name, "timeout")
+                except Exception as e:
+                    out.errors[name] = f"{type(e).__name__}: {e}"
+                    emit(name, "failed", error=str(e))
+            schedule_ready()
+        for name in waiting:  # only reachable through a dependency cycle
+            out.errors[name] = "skipped: dependency cycle"
+            emit(name, "skipped")
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    out.trace = sorted(spans.values(), key=lambda s: s.get("start_ms", s.get("end_ms", 0)))
+    out.wall_ms = now_ms()
+    return out
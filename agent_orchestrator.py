@@ -1,29 +1,114 @@
 import os
-from openai import AsyncOpenAI
+import asyncio
+from typing import Optional
 
-# Initialize OpenAI
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_gateway import llm
+from agent_dag import Node, run_dag, EventFn
+from ats_agent import analyze_and_optimize, render_latex, compile_latex_to_pdf, save_rendered_resume
+from ghostwriter_agent import run_ghostwriter_agent
+from interview_agent import generate_interview_questions
+from spyglass_agent import build_tracking_url
+from resume_parser import resume_data_slice
+from intent_router import intent_router, INTENT_LLM_FALLBACK
 
-async def route_intent(message, history=None, context=None):
-    """Decision brain: Routes the user to the right agent"""
-    # Simply routing to ORCHESTRATOR for now to keep it running
-    return {"primary_agent": "ORCHESTRATOR", "confidence": 1.0}
+PDF_OUTPUT_DIR = os.getenv("PDF_OUTPUT_DIR", "/tmp/resumegod_pdfs")
+ATS_NODE_TIMEOUT = float(os.getenv("ATS_NODE_TIMEOUT", "120"))
+LATEX_NODE_TIMEOUT = float(os.getenv("LATEX_NODE_TIMEOUT", "90"))
+AGENT_NODE_TIMEOUT = float(os.getenv("AGENT_NODE_TIMEOUT", "90"))
+
+async def route_intent(message, history=None, context=None, llm_fallback=INTENT_LLM_FALLBACK):
+    """Decision brain: Routes the user to the right agent.
+    Decided locally (intent_router); the LLM is asked only when that is unsure
+    and llm_fallback is on."""
+    return await intent_router.route(message, history, context, llm_fallback)
 
 async def orchestrate_chat(message, history=None, context=None):
-    """Chat brain: Handles general career coaching"""
-    response = await client.chat.completions.create(
+    """Chat brain: Handles general career coaching.
+    `history` is ConversationMemory.prompt_messages(): the rolling summary plus
+    the newest turns, already capped at MEMORY_MAX_TOKENS."""
+    response = await llm.chat(
+        agent="orchestrator",
         model="gpt-4o",
-        messages=[{"role": "system", "content": "You are ResumeGod Career AI."}, {"role": "user", "content": message}]
+        messages=[
+            {"role": "system", "content": "You are ResumeGod Career AI."},
+            *(history or []),
+            {"role": "user", "content": message},
+        ]
     )
     return {"message": response.choices[0].message.content}
 
-async def run_full_optimization_pipeline(resume_text, job_description, user_id, base_url, tracking_token):
-    """Optimization brain: Scores and fixes the resume"""
+async def run_full_optimization_pipeline(
+    resume_text,
+    job_description,
+    user_id,
+    base_url,
+    tracking_token,
+    resume_id: Optional[str] = None,
+    output_dir: str = PDF_OUTPUT_DIR,
+    on_event: Optional[EventFn] = None,
+    parsed: Optional[dict] = None
+):
+    """
+    Optimization brain: Scores and fixes the resume, then fans out.
+
+        ats ──┬── latex (render + pdflatex)
+              ├── ghostwriter (LinkedIn post + courses)
+              └── interviewer (killer questions)
+
+    Downstream nodes start the moment ATS finishes and run concurrently, so
+    wall time ≈ ATS + the slowest branch. Failed or timed-out nodes are
+    reported in "errors"; everything that did finish is still returned.
+
+    `parsed` is the resume's canonical structure (resume_parser, computed at
+    upload). When given, each agent prompt carries only its slice of it: the
+    Interviewer gets recent roles/projects/skills, the Ghostwriter the top
+    bullets of the optimized resume instead of all of resume_data.
+    """
+    tracking_url = build_tracking_url(base_url, tracking_token) if tracking_token else ""
+
+    async def ats(_):
+        return await analyze_and_optimize(
+            resume_text, job_description, tracking_url=tracking_url,
+            resume_id=resume_id, persist=resume_id is not None, parsed=parsed
+        )
+
+    async def latex(deps):
+        latex_source = render_latex(deps["ats"]["resume_data"], tracking_url=tracking_url)
+        pdf_path = await asyncio.to_thread(compile_latex_to_pdf, latex_source, output_dir)
+        if resume_id is not None:
+            save_rendered_resume(resume_id, latex_source, pdf_path)
+        return {"latex_source": latex_source, "pdf_path": pdf_path}
+
+    async def ghostwriter(deps):
+        ats_result = deps["ats"]
+        resume_data = resume_data_slice(ats_result["resume_data"]) if parsed else ats_result["resume_data"]
+        return await run_ghostwriter_agent(resume_data, job_description, ats_result["gap_analysis"])
+
+    async def interviewer(deps):
+        return await generate_interview_questions(
+            resume_text, job_description, deps["ats"]["gap_analysis"], parsed=parsed
+        )
+
+    dag = await run_dag([
+        Node("ats", ats, timeout=ATS_NODE_TIMEOUT),
+        Node("latex", latex, deps=("ats",), timeout=LATEX_NODE_TIMEOUT),
+        Node("ghostwriter", ghostwriter, deps=("ats",), timeout=AGENT_NODE_TIMEOUT),
+        Node("interviewer", interviewer, deps=("ats",), timeout=AGENT_NODE_TIMEOUT),
+    ], on_event=on_event)
+
+    ats_result = dag.results.get("ats") or {}
+    rendered = dag.results.get("latex") or {}
     return {
+        "status": "complete" if dag.complete else ("partial" if dag.results else "failed"),
         "ats": {
-            "gap_analysis": {"ats_score_before": 40, "ats_score_after": 95},
-            "latex_source": "% LaTeX Ready",
-            "pdf_path": None
-        }
+            "resume_data": ats_result.get("resume_data"),
+            "gap_analysis": ats_result.get("gap_analysis"),
+            "latex_source": rendered.get("latex_source"),
+            "pdf_path": rendered.get("pdf_path"),
+        },
+        "ghostwriter": dag.results.get("ghostwriter"),
+        "interviewer": dag.results.get("interviewer"),
+        "errors": dag.errors,
+        "trace": dag.trace,
+        "wall_ms": dag.wall_ms,
     }
-
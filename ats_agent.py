@@ -3,29 +3,37 @@ ResumeGod V4.0 — Agent 1: The ATS Sentinel
 Role: Parses resume PDFs, compares against JD, rewrites content intelligently,
 generates Jake's Resume in LaTeX and compiles to PDF.
 """
-import os
 import re
 import json
-import subprocess
-import tempfile
-import shutil
-from pathlib import Path
-from typing import Optional
-from jinja2 import Environment, FileSystemLoader, BaseLoader
-from openai import AsyncOpenAI
-
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Use << >> delimiters to avoid conflicts with LaTeX {{ }}
-JINJA_ENV = Environment(
-    loader=BaseLoader(),
-    variable_start_string="<<",
-    variable_end_string=">>",
-    block_start_string="<%",
-    block_end_string="%>",
-    comment_start_string="<#",
-    comment_end_string="#>",
-)
+from typing import AsyncIterator, Optional
+from jinja2 import Environment, DictLoader
+from llm_gateway import llm
+from models import SessionLocal, Resume
+from latex_service import latex_service, LatexCompileError
+from pdf_store import get_store, pdf_key
+from ats_cache import ats_cache, cache_key, schema_hash, ATS_CACHE_DISABLED
+from json_stream import IncrementalJSONParser
+from ats_scorer import ats_scorer, flatten_resume_data, SCORER_VERSION
+from prompt_budget import fit_resume, fit_jd
+from resume_parser import agent_slice
+
+_LATEX_ESCAPES = str.maketrans({
+    "\\": r"\textbackslash{}",
+    "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#", "_": r"\_",
+    "{": r"\{", "}": r"\}",
+    "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+})
+
+
+def escape_latex(value):
+    """Escape LaTeX specials in one pass (backslash included). Non-strings pass through."""
+    if isinstance(value, str):
+        return value.translate(_LATEX_ESCAPES)
+    return value
+
+
+# Bump when the template or TeX toolchain changes in a way that alters output for the same source.
+JAKES_TEMPLATE_VERSION = "jakes-1"
 
 JAKES_RESUME_TEMPLATE = r"""
 \documentclass[letterpaper,11pt]{article}
@@ -44,7 +52,6 @@ JAKES_RESUME_TEMPLATE = r"""
 \usepackage{multicol}
 \setlength{\multicolsep}{-3.0pt}
 \setlength{\columnsep}{-1pt}
-\input{glyphtounicode}
 
 \pagestyle{fancy}
 \fancyhf{}
@@ -67,6 +74,10 @@ JAKES_RESUME_TEMPLATE = r"""
   \vspace{-4pt}\scshape\raggedright\large\bfseries
 }{}{0em}{}[\color{black}\titlerule \vspace{-5pt}]
 
+% Everything above is precompiled into a format file by latex_service;
+% glyph-to-unicode tables are not dumped, so they load per compile.
+\csname endofdump\endcsname
+\input{glyphtounicode}
 \pdfgentounicode=1
 
 \newcommand{\resumeItem}[1]{
@@ -152,7 +163,7 @@ JAKES_RESUME_TEMPLATE = r"""
  \begin{itemize}[leftmargin=0.15in, label={}]
     \small{\item{
      <% for skill_group in skills %>
-     \textbf{<< skill_group.category >>}{: << skill_group.items >>} \\
+     \textbf{<< skill_group.category >>}{: << skill_group["items"] >>} \\
      <% endfor %>
     }}
  \end{itemize}
@@ -175,238 +186,366 @@ You MUST:
 You are operating inside ResumeGod V4.0. Be precise, surgical, and ruthless about keyword density."""
 
 
-async def analyze_and_optimize(
-    resume_text: str,
-    job_description: str,
-    candidate_name: str = "Candidate",
-    tracking_url: str = ""
-) -> dict:
-    """
-    Core ATS optimization pipeline.
-    Returns structured resume data + gap analysis.
-    """
-
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "produce_optimized_resume",
-                "description": "Produce a structured, ATS-optimized resume and gap analysis",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "resume_data": {
-                            "type": "object",
-                            "description": "Structured resume for LaTeX template",
-                            "properties": {
-                                "name": {"type": "string"},
-                                "phone": {"type": "string"},
-                                "email": {"type": "string"},
-                                "linkedin": {"type": "string"},
-                                "linkedin_text": {"type": "string"},
-                                "github": {"type": "string"},
-                                "github_text": {"type": "string"},
-                                "education": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "institution": {"type": "string"},
-                                            "degree": {"type": "string"},
-                                            "dates": {"type": "string"},
-                                            "location": {"type": "string"}
-                                        }
-                                    }
-                                },
-                                "experience": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "company": {"type": "string"},
-                                            "title": {"type": "string"},
-                                            "dates": {"type": "string"},
-                                            "location": {"type": "string"},
-                                            "bullets": {"type": "array", "items": {"type": "string"}}
-                                        }
+ATS_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "produce_optimized_resume",
+            "description": "Produce a structured, ATS-optimized resume and gap analysis",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "gap_analysis": {
+                        "type": "object",
+                        "properties": {
+                            "keywords_injected": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Keywords from JD that were added to resume"
+                            },
+                            "keywords_missing": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Keywords from JD that could NOT be honestly added"
+                            },
+                            "strengths": {
+                                "type": "array",
+                                "items": {"type": "string"}
+                            },
+                            "critical_gaps": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "skill": {"type": "string"},
+                                        "importance": {"type": "string"},
+                                        "recommendation": {"type": "string"}
                                     }
-                                },
-                                "projects": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "name": {"type": "string"},
-                                            "tech": {"type": "string"},
-                                            "dates": {"type": "string"},
-                                            "bullets": {"type": "array", "items": {"type": "string"}}
-                                        }
+                                }
+                            },
+                            "roast": {
+                                "type": "string",
+                                "description": "Brutally honest 2-sentence assessment of the original resume"
+                            }
+                        },
+                        "required": ["keywords_injected", "critical_gaps"]
+                    },
+                    "resume_data": {
+                        "type": "object",
+                        "description": "Structured resume for LaTeX template",
+                        "properties": {
+                            "name": {"type": "string"},
+                            "phone": {"type": "string"},
+                            "email": {"type": "string"},
+                            "linkedin": {"type": "string"},
+                            "linkedin_text": {"type": "string"},
+                            "github": {"type": "string"},
+                            "github_text": {"type": "string"},
+                            "education": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "institution": {"type": "string"},
+                                        "degree": {"type": "string"},
+                                        "dates": {"type": "string"},
+                                        "location": {"type": "string"}
                                     }
-                                },
-                                "skills": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "category": {"type": "string"},
-                                            "items": {"type": "string"}
-                                        }
+                                }
+                            },
+                            "experience": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "company": {"type": "string"},
+                                        "title": {"type": "string"},
+                                        "dates": {"type": "string"},
+                                        "location": {"type": "string"},
+                                        "bullets": {"type": "array", "items": {"type": "string"}}
                                     }
                                 }
                             },
-                            "required": ["name", "email", "education", "experience", "skills"]
-                        },
-                        "gap_analysis": {
-                            "type": "object",
-                            "properties": {
-                                "ats_score_before": {
-                                    "type": "number",
-                                    "description": "Estimated ATS match score before optimization (0-100)"
-                                },
-                                "ats_score_after": {
-                                    "type": "number",
-                                    "description": "Estimated ATS match score after optimization (0-100)"
-                                },
-                                "keywords_injected": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "Keywords from JD that were added to resume"
-                                },
-                                "keywords_missing": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "Keywords from JD that could NOT be honestly added"
-                                },
-                                "strengths": {
-                                    "type": "array",
-                                    "items": {"type": "string"}
-                                },
-                                "critical_gaps": {
-                                    "type": "array",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "skill": {"type": "string"},
-                                            "importance": {"type": "string"},
-                                            "recommendation": {"type": "string"}
-                                        }
+                            "projects": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "name": {"type": "string"},
+                                        "tech": {"type": "string"},
+                                        "dates": {"type": "string"},
+                                        "bullets": {"type": "array", "items": {"type": "string"}}
                                     }
-                                },
-                                "roast": {
-                                    "type": "string",
-                                    "description": "Brutally honest 2-sentence assessment of the original resume"
                                 }
                             },
-                            "required": ["ats_score_before", "ats_score_after", "keywords_injected", "critical_gaps"]
-                        }
-                    },
-                    "required": ["resume_data", "gap_analysis"]
-                }
+                            "skills": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "category": {"type": "string"},
+                                        "items": {"type": "string"}
+                                    }
+                                }
+                            }
+                        },
+                        "required": ["name", "email", "education", "experience", "skills"]
+                    }
+                },
+                "required": ["gap_analysis", "resume_data"]
             }
         }
-    ]
+    }
+]
+
+ATS_MODEL = "gpt-4o"
+ATS_TEMPERATURE = 0.3
+ATS_TOOLS_HASH = schema_hash([ATS_TOOLS, SCORER_VERSION])
+
 
+def apply_local_scores(result: dict, resume_text: str, job_description: str,
+                       before: Optional[dict] = None) -> dict:
+    """
+    ATS scores, keywords_missing and section coverage come from the local
+    keyword scorer (deterministic, no LLM), computed on the original text and
+    on the optimized resume_data.
+    """
+    before = before or ats_scorer.score(resume_text, job_description)
+    after = ats_scorer.score(flatten_resume_data(result.get("resume_data")), job_description)
+    gap_analysis = dict(result.get("gap_analysis") or {})
+    gap_analysis.update(
+        ats_score_before=before["score"],
+        ats_score_after=after["score"],
+        keywords_missing=after["missing"],
+        section_coverage=after["sections"],
+    )
+    return {**result, "gap_analysis": gap_analysis}
+
+
+def _ats_messages(resume_text: str, job_description: str, tracking_url: str,
+                  parsed: Optional[dict] = None) -> list:
+    resume_block = agent_slice(parsed, "ats") if parsed else resume_text
     user_prompt = f"""RESUME TEXT:
-{resume_text}
+{fit_resume(resume_block, "ats")}
 
 JOB DESCRIPTION:
-{job_description}
+{fit_jd(job_description, "ats")}
 
 TRACKING URL (embed as invisible link in header if possible): {tracking_url}
 
 Analyze this resume against the JD. Produce the optimized resume_data struct and gap_analysis.
 Inject JD keywords naturally. Do NOT fabricate companies, degrees, or titles."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT_ATS},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+ATS_TOOL_CHOICE = {"type": "function", "function": {"name": "produce_optimized_resume"}}
 
-    response = await client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT_ATS},
-            {"role": "user", "content": user_prompt}
-        ],
-        tools=tools,
-        tool_choice={"type": "function", "function": {"name": "produce_optimized_resume"}},
-        temperature=0.3,
-    )
 
-    tool_call = response.choices[0].message.tool_calls[0]
-    result = json.loads(tool_call.function.arguments)
-    return result
+async def analyze_and_optimize(
+    resume_text: str,
+    job_description: str,
+    candidate_name: str = "Candidate",
+    tracking_url: str = "",
+    resume_id: Optional[str] = None,
+    use_cache: bool = True,
+    persist: bool = False,
+    parsed: Optional[dict] = None
+) -> dict:
+    """
+    Core ATS optimization pipeline.
+    Returns structured resume data + gap analysis.
+
+    Responses are cached on (resume, JD, model, temperature, tool schema,
+    parsed, tracking_url);
+    pass use_cache=False to force a fresh gpt-4o call. With persist=True and
+    a resume_id, the result is also written to that Resume row. With `parsed`
+    (resume_parser), the prompt carries the structured resume, not the raw text.
+    """
+
+    async def call_model() -> dict:
+        response = await llm.chat(
+            agent="ats",
+            model=ATS_MODEL,
+            messages=_ats_messages(resume_text, job_description, tracking_url, parsed),
+            tools=ATS_TOOLS,
+            tool_choice=ATS_TOOL_CHOICE,
+            temperature=ATS_TEMPERATURE,
+        )
+        tool_call = response.choices[0].message.tool_calls[0]
+        return apply_local_scores(json.loads(tool_call.function.arguments), resume_text, job_description)
+
+    if not use_cache or ATS_CACHE_DISABLED:
+        return await call_model()
+
+    key = cache_key(resume_text, job_description, ATS_MODEL, ATS_TEMPERATURE, ATS_TOOLS_HASH,
+                    parsed, tracking_url)
+    return await ats_cache.get_or_compute(key, call_model, resume_id=resume_id, persist=persist)
+
+
+ATS_STREAM_SECTIONS = ("education", "experience", "projects", "skills")
+LOCAL_GAP_FIELDS = ("ats_score_before", "ats_score_after", "keywords_missing", "section_coverage")
+
+
+def ats_stream_event(path: tuple, value) -> Optional[dict]:
+    """Map a completed value in the tool arguments to a client event (or None)."""
+    if len(path) == 2 and path[0] == "gap_analysis":
+        if path[1] in LOCAL_GAP_FIELDS:
+            return None  # superseded by the local scorer; final values arrive with "done"
+        return {"type": "gap_analysis", "field": path[1], "value": value}
+    if len(path) < 2 or path[0] != "resume_data":
+        return None
+    section = path[1]
+    if len(path) == 2 and section not in ATS_STREAM_SECTIONS:
+        return {"type": "field", "field": section, "value": value}
+    if len(path) == 3 and section in ATS_STREAM_SECTIONS:
+        return {"type": "entry", "section": section, "index": path[2], "entry": value}
+    if len(path) == 5 and path[3] == "bullets":
+        return {"type": "bullet", "section": section, "index": path[2], "bullet": path[4], "text": value}
+    return None
+
+
+async def stream_analyze_and_optimize(
+    resume_text: str,
+    job_description: str,
+    tracking_url: str = "",
+    resume_id: Optional[str] = None,
+    use_cache: bool = True,
+    persist: bool = False,
+    parsed: Optional[dict] = None
+) -> AsyncIterator[dict]:
+    """
+    Streaming analyze_and_optimize. Consumes the tool-call argument deltas,
+    parses them incrementally and yields each gap_analysis field, resume
+    field, section entry and bullet as soon as it closes, then a final
+    {"type": "done", "result": ...}. A local "score" event for the original
+    resume comes first, before the model call. Cache hits are replayed the
+    same way.
+    """
+    key = cache_key(resume_text, job_description, ATS_MODEL, ATS_TEMPERATURE, ATS_TOOLS_HASH,
+                    parsed, tracking_url)
+    cacheable = use_cache and not ATS_CACHE_DISABLED
+    parser = IncrementalJSONParser()
+
+    result = await ats_cache.lookup(key) if cacheable else None
+    cached = result is not None
+    before = ats_scorer.score(resume_text, job_description)
+    yield {"type": "score", "ats_score_before": before["score"], "matched": before["matched"],
+           "missing": before["missing"], "sections": before["sections"]}
+    if cached:
+        for path, value in parser.feed(json.dumps(result)):
+            event = ats_stream_event(path, value)
+            if event:
+                yield event
+    else:
+        stream = llm.stream_chat(
+            agent="ats",
+            model=ATS_MODEL,
+            messages=_ats_messages(resume_text, job_description, tracking_url, parsed),
+            tools=ATS_TOOLS,
+            tool_choice=ATS_TOOL_CHOICE,
+            temperature=ATS_TEMPERATURE,
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.tool_calls:
+                    continue
+                for tool_call in chunk.choices[0].delta.tool_calls:
+                    if tool_call.function and tool_call.function.arguments:
+                        for path, value in parser.feed(tool_call.function.arguments):
+                            event = ats_stream_event(path, value)
+                            if event:
+                                yield event
+        finally:
+            await stream.aclose()
+        result = apply_local_scores(parser.close(), resume_text, job_description, before=before)
+        if cacheable:
+            ats_cache.store(key, result)
+
+    if persist and resume_id:
+        await ats_cache.persist(resume_id, key, result)
+    yield {"type": "done", "result": result, "cached": cached}
+
+
+# Use << >> delimiters to avoid conflicts with LaTeX {{ }}.
+# Every << expr >> goes through escape_latex via finalize, so data is escaped
+# as it is emitted instead of copying the whole resume dict up front.
+JINJA_ENV = Environment(
+    loader=DictLoader({"jakes.tex": JAKES_RESUME_TEMPLATE}),
+    variable_start_string="<<",
+    variable_end_string=">>",
+    block_start_string="<%",
+    block_end_string="%>",
+    comment_start_string="<#",
+    comment_end_string="#>",
+    finalize=escape_latex,
+    auto_reload=False,
+)
+
+# Template registry: each template is parsed and compiled once, at import.
+TEMPLATES = {
+    "jakes": JINJA_ENV.get_template("jakes.tex"),
+}
 
 
 def render_latex(resume_data: dict, tracking_url: str = "") -> str:
     """Render the Jinja2 LaTeX template with resume data."""
-    template = JINJA_ENV.from_string(JAKES_RESUME_TEMPLATE)
-    # Escape special LaTeX characters in all string fields
-    def escape_latex(s: str) -> str:
-        if not isinstance(s, str):
-            return s
-        replacements = [
-            ("&", r"\&"), ("%", r"\%"), ("$", r"\$"), ("#", r"\#"),
-            ("_", r"\_"), ("{", r"\{"), ("}", r"\}"), ("~", r"\textasciitilde{}"),
-            ("^", r"\textasciicircum{}"),
-        ]
-        for old, new in replacements:
-            s = s.replace(old, new)
-        return s
-
-    def escape_dict(obj):
-        if isinstance(obj, str):
-            return escape_latex(obj)
-        elif isinstance(obj, list):
-            return [escape_dict(i) for i in obj]
-        elif isinstance(obj, dict):
-            return {k: escape_dict(v) for k, v in obj.items()}
-        return obj
-
-    safe_data = escape_dict(resume_data)
-    return template.render(**safe_data, tracking_url=tracking_url)
+    return TEMPLATES["jakes"].render(**resume_data, tracking_url=tracking_url)
 
 
 def compile_latex_to_pdf(latex_source: str, output_dir: str) -> Optional[str]:
     """
-    Compile LaTeX source to PDF using pdflatex.
+    Compile LaTeX source to PDF via the warm compile service.
+    Identical sources are served from the content-addressed PDF store in
+    `output_dir` without recompiling.
     Returns path to compiled PDF or None on failure.
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tex_file = os.path.join(tmpdir, "resume.tex")
-        pdf_file = os.path.join(tmpdir, "resume.pdf")
-
-        with open(tex_file, "w", encoding="utf-8") as f:
-            f.write(latex_source)
-
-        # Run pdflatex twice for proper cross-references
-        for _ in range(2):
-            result = subprocess.run(
-                ["pdflatex", "-interaction=nonstopmode", "-output-directory", tmpdir, tex_file],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            if result.returncode != 0:
-                print(f"[ATS Sentinel] LaTeX compilation error:\n{result.stdout[-2000:]}")
-
-        if os.path.exists(pdf_file):
-            os.makedirs(output_dir, exist_ok=True)
-            import uuid
-            out_path = os.path.join(output_dir, f"resume_{uuid.uuid4().hex[:8]}.pdf")
-            shutil.copy(pdf_file, out_path)
-            return out_path
-
-    return None
+    store = get_store(output_dir)
+    key = pdf_key(latex_source, JAKES_TEMPLATE_VERSION)
+    cached = store.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        pdf_bytes = latex_service.compile(latex_source)
+    except LatexCompileError as e:
+        print(f"[ATS Sentinel] LaTeX compilation failed: {e}\n{e.log_tail}")
+        return None
+    return store.put(key, pdf_bytes)
+
+
+def save_rendered_resume(resume_id: str, latex_source: str, pdf_path: Optional[str]):
+    """Persist the rendered LaTeX (and PDF location) on the Resume row."""
+    db = SessionLocal()
+    try:
+        resume = db.get(Resume, resume_id)
+        if resume is not None:
+            resume.optimized_latex = latex_source
+            resume.pdf_path = pdf_path
+            db.commit()
+    finally:
+        db.close()
 
 
 async def run_ats_agent(
     resume_text: str,
     job_description: str,
     output_dir: str = "/tmp/resumes",
-    tracking_url: str = ""
+    tracking_url: str = "",
+    resume_id: Optional[str] = None,
+    use_cache: bool = True
 ) -> dict:
     """
     Full pipeline: analyze → render LaTeX → compile PDF.
     Returns complete result package.
     """
     print("[ATS Sentinel] Analyzing resume against JD...")
-    result = await analyze_and_optimize(resume_text, job_description, tracking_url=tracking_url)
+    result = await analyze_and_optimize(
+        resume_text, job_description, tracking_url=tracking_url,
+        resume_id=resume_id, use_cache=use_cache, persist=resume_id is not None
+    )
 
     resume_data = result["resume_data"]
     gap_analysis = result["gap_analysis"]
@@ -417,6 +556,9 @@ async def run_ats_agent(
     print("[ATS Sentinel] Compiling PDF...")
     pdf_path = compile_latex_to_pdf(latex_source, output_dir)
 
+    if resume_id is not None:
+        save_rendered_resume(resume_id, latex_source, pdf_path)
+
     return {
         "status": "success" if pdf_path else "pdf_failed",
         "resume_data": resume_data,
@@ -0,0 +1,158 @@
+"""
+ResumeGod V4.0 — ATS Sentinel response cache
+Memoizes analyze_and_optimize() on (normalized resume, normalized JD,
+model, temperature, tool-schema hash, parsed resume, tracking URL).
+In-process TTL/LRU tier, optional persistence on the Resume row, and
+single-flight so concurrent identical requests share one gpt-4o call.
+"""
+import os
+import re
+import json
+import asyncio
+import hashlib
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from caching import LRUCache
+from models import SessionLocal, Resume
+
+ATS_CACHE_SIZE = int(os.getenv("ATS_CACHE_SIZE", "512"))
+ATS_CACHE_TTL = float(os.getenv("ATS_CACHE_TTL", str(24 * 3600)))  # seconds
+ATS_CACHE_DISABLED = os.getenv("ATS_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC + whitespace collapse. Case is kept: names and acronyms matter to the output."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def schema_hash(tools: list) -> str:
+    return hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()
+
+
+def cache_key(resume_text: str, job_description: str, model: str, temperature: float, tools_hash: str,
+              parsed: Optional[dict] = None, tracking_url: str = "") -> str:
+    """Everything that varies the prompt or the output: the parse replaces the raw
+    text in the prompt and the tracking URL is embedded in the result."""
+    h = hashlib.sha256()
+    parts = (normalize_text(resume_text), normalize_text(job_description), model, repr(temperature), tools_hash,
+             json.dumps(parsed, sort_keys=True, default=str) if parsed else "", tracking_url or "")
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ATSResponseCache:
+    def __init__(self, maxsize: int = ATS_CACHE_SIZE, ttl: float = ATS_CACHE_TTL):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.db_hits = 0
+        self.coalesced = 0
+
+    def _load_persisted(self, key: str) -> Optional[dict]:
+        db = SessionLocal()
+        try:
+            row = (
+                db.query(Resume)
+                .filter(
+                    Resume.ats_cache_key == key,
+                    Resume.optimized_data.isnot(None),
+                    Resume.updated_at >= datetime.utcnow() - timedelta(seconds=self.ttl),
+                )
+                .order_by(Resume.updated_at.desc())
+                .first()
+            )
+            if row is None:
+                return None
+            return {"resume_data": row.optimized_data, "gap_analysis": row.gap_analysis}
+        finally:
+            db.close()
+
+    async def persist(self, resume_id: str, key: str, result: dict):
+        """Store the result on the Resume row so it survives restarts."""
+        await asyncio.to_thread(self._persist, resume_id, key, result)
+
+    def _persist(self, resume_id: str, key: str, result: dict):
+        db = SessionLocal()
+        try:
+            resume = db.get(Resume, resume_id)
+            if resume is None:
+                return
+            gap = result.get("gap_analysis") or {}
+            resume.ats_cache_key = key
+            resume.optimized_data = result.get("resume_data")
+            resume.gap_analysis = gap
+            resume.ats_score_before = gap.get("ats_score_before")
+            resume.ats_score_after = gap.get("ats_score_after")
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[ATS Cache] Persist failed for resume {resume_id[:8]}: {e}")
+        finally:
+            db.close()
+
+    async def lookup(self, key: str) -> Optional[dict]:
+        """Memory tier, then the persisted Resume rows (in a thread). No compute."""
+        result = self.memory.get(key)
+        if result is None:
+            result = await asyncio.to_thread(self._load_persisted, key)
+            if result is not None:
+                self.db_hits += 1
+                self.memory.set(key, result)
+        return result
+
+    def store(self, key: str, result: dict):
+        self.memory.set(key, result)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[dict]],
+        resume_id: Optional[str] = None,
+        persist: bool = False,
+    ) -> dict:
+        result = await self.lookup(key)
+        if result is None:
+            result = await self._compute_once(key, compute)
+        if persist and resume_id:
+            await self.persist(resume_id, key, result)
+        return result
+
+    async def _compute_once(self, key: str, compute: Callable[[], Awaitable[dict]]) -> dict:
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        self.store(key, result)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "db_hits": self.db_hits,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+ats_cache = ATSResponseCache()
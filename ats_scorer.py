@@ -0,0 +1,349 @@
+"""
+ResumeGod V4.0 — Local ATS scorer
+Deterministic keyword matching, no LLM: JD keywords/phrases are extracted
+(skill synonym dictionary, n-grams, TF-IDF weights), the resume is turned
+into a compact inverted index (term → bitmask of the sections it occurs
+in), and scoring is a weighted dot product in NumPy:
+
+    scorer = ATSScorer()
+    scorer.score(resume_text, jd)
+    # {"score": 71.3, "matched": [...], "missing": [...], "sections": {"experience": 52.0, ...}}
+
+score_many() scores a batch of resumes against one JD in a single pass.
+Pass `idf` (or use ATSScorer.fit on a JD corpus) for corpus-aware weights;
+without it every non-boilerplate term has idf 1 and skills get a boost.
+"""
+import re
+import math
+import hashlib
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import numpy as np
+
+from caching import LockedLRUCache
+
+SCORER_VERSION = "kw-3"  # bump when scores for the same inputs change
+
+SECTIONS = ("header", "summary", "experience", "education", "projects", "skills", "other")
+_SECTION_BITS = np.arange(len(SECTIONS), dtype=np.int64)
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "objective", "about", "professional summary"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history"),
+    "education": ("education", "academic background", "qualifications"),
+    "projects": ("projects", "personal projects", "selected projects"),
+    "skills": ("skills", "technical skills", "core competencies", "technologies", "tech stack"),
+    "other": ("certifications", "awards", "publications", "volunteering", "interests", "languages"),
+}
+_HEADING_TO_SECTION = {h: s for s, hs in SECTION_HEADINGS.items() for h in hs}
+
+# canonical skill → variants seen in resumes/JDs (all lower case). No bare
+# English words or short abbreviations that mean something else in prose
+# ("rest", "spring", "containers", "node", "tf"): those only count with context.
+SKILL_SYNONYMS = {
+    "javascript": ("js", "ecmascript"),
+    "typescript": (),
+    "python": ("python3", "py"),
+    "golang": ("go lang",),
+    "c++": ("cpp",),
+    "c#": ("csharp", "c sharp"),
+    "node.js": ("nodejs", "node js"),
+    "react": ("react.js", "reactjs"),
+    "vue": ("vue.js", "vuejs"),
+    "angular": ("angularjs", "angular.js"),
+    "postgresql": ("postgres", "psql", "postgre sql"),
+    "mysql": ("my sql",),
+    "mongodb": ("mongo",),
+    "redis": (),
+    "kafka": ("apache kafka",),
+    "rabbitmq": ("rabbit mq",),
+    "elasticsearch": ("elastic search", "elk"),
+    "kubernetes": ("k8s", "kube"),
+    "docker": ("docker containers", "containerization"),
+    "terraform": (),
+    "infrastructure as code": ("iac",),
+    "aws": ("amazon web services",),
+    "gcp": ("google cloud", "google cloud platform"),
+    "azure": ("microsoft azure",),
+    "ci/cd": ("cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"),
+    "rest api": ("rest apis", "restful", "restful api", "restful apis", "rest service", "rest services",
+                 "rest endpoint", "rest endpoints"),
+    "graphql": ("graph ql",),
+    "grpc": ("g rpc",),
+    "microservices": ("microservice", "micro services", "micro-services"),
+    "event-driven": ("event driven", "event-driven architecture", "event driven architecture"),
+    "distributed systems": ("distributed system",),
+    "machine learning": ("ml",),
+    "deep learning": (),
+    "natural language processing": ("nlp",),
+    "large language models": ("llm", "llms", "large language model"),
+    "sql": (),
+    "nosql": ("no sql",),
+    "spark": ("apache spark", "pyspark"),
+    "airflow": ("apache airflow",),
+    "pandas": (),
+    "numpy": (),
+    "pytorch": ("torch",),
+    "tensorflow": (),
+    "scikit-learn": ("sklearn", "scikit learn"),
+    "fastapi": ("fast api",),
+    "django": (),
+    "flask": (),
+    "spring boot": ("springboot",),
+    "java": (),
+    "kotlin": (),
+    "rust": (),
+    "scala": (),
+    "ruby on rails": ("rails", "ror"),
+    "linux": ("unix",),
+    "git": (),
+    "prometheus": (),
+    "grafana": (),
+    "observability": ("monitoring",),
+    "unit testing": ("unit tests", "tdd", "test driven development"),
+    "agile": ("scrum", "kanban"),
+    "pci dss": ("pci", "pci-dss"),
+    "oauth": ("oauth2", "oauth 2.0"),
+    "data structures": (),
+    "algorithms": (),
+    "system design": (),
+}
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each etc few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my no nor not
+now of off on once only or other our ours out over own per same she should so some such than that the
+their them then there these they this those through to too under until up us very via was we were what
+when where which while who whom why will with within without would you your yours
+""".split())
+
+# Words every JD uses; never keywords on their own.
+JD_BOILERPLATE = frozenset("""
+ability able about across additional apply bonus benefits build building candidate candidates closely
+collaborate collaborative company competitive culture customers day deliver demonstrated description
+desired environment equal excellent experience experienced familiarity familiar fast good great help
+highly ideal including job join key knowledge large level like looking make new nice opportunity
+paced plus position preferred proficiency proficient proven qualifications related requirements
+responsibilities responsible role salary senior skills solid strong success successful team teams
+understanding using work working world year years junior mid lead staff principal engineer engineers
+engineering software developer developers must have will ensure across within etc e.g i.e
+deep drive driving leading move moving own owning reliably reliable requirement project projects
+hands hands-on best practices practice passion passionate impact high quality
+need needs want seeking someone clearly communicate thrive comfort comfortable eager enjoy love ideally
+everything anything something end keep healthy teach rest fast-paced based driven powered focused
+oriented centric run write writing ship
+""".split())
+
+# Two-letter terms that are keywords on their own; other non-skill unigrams
+# need MIN_TERM_LEN characters.
+SHORT_TERMS = frozenset({"ai", "ui", "ux", "qa", "bi", "ar", "vr"})
+MIN_TERM_LEN = 3
+
+SKILL_BOOST = 2.0
+MAX_KEYWORDS = 40
+MAX_PHRASE = 3  # longest JD n-gram considered
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+_CONTRACTION_RE = re.compile(r"['’][a-z]+")  # you'll, we're, company's
+_COMPOUND_RE = re.compile(r"-(based|driven|powered|focused|oriented|centric)\b")  # kafka-based → kafka based
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(_COMPOUND_RE.sub(r" \1", _CONTRACTION_RE.sub("", text.lower())))
+
+
+_PHRASES: dict[tuple, str] = {}
+for _canon, _variants in SKILL_SYNONYMS.items():
+    for _v in (_canon, *_variants):
+        _PHRASES[tuple(_tokenize(_v))] = _canon
+_PHRASE_STARTS = frozenset(p[0] for p in _PHRASES)
+SKILLS = frozenset(SKILL_SYNONYMS)
+_MAX_SKILL_LEN = max(len(p) for p in _PHRASES)
+_NOISE = STOPWORDS | JD_BOILERPLATE
+
+
+@lru_cache(maxsize=65536)
+def _stem(token: str) -> str:
+    """Plural folding only — enough to match 'pipelines' with 'pipeline'."""
+    if len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def normalize_terms(text: str) -> list[str]:
+    """Tokens with skill variants folded to their canonical name (longest match wins)."""
+    tokens = _tokenize(text)
+    out = []
+    i, n = 0, len(tokens)
+    while i < n:
+        tok = tokens[i]
+        if tok in _PHRASE_STARTS:
+            for length in range(min(_MAX_SKILL_LEN, n - i), 0, -1):
+                canon = _PHRASES.get(tuple(tokens[i:i + length]))
+                if canon is not None:
+                    out.append(canon)
+                    i += length
+                    break
+            else:
+                out.append(_stem(tok))
+                i += 1
+        else:
+            out.append(_stem(tok))
+            i += 1
+    return out
+
+
+@lru_cache(maxsize=65536)
+def _is_content(term: str) -> bool:
+    if term in SKILLS:
+        return True
+    if term in _NOISE or term[0].isdigit():
+        return False
+    return len(term) >= MIN_TERM_LEN or term in SHORT_TERMS
+
+
+def _ngrams(terms: list[str], max_n: int = MAX_PHRASE) -> list[str]:
+    """Content unigrams, then 2..max_n-grams made only of content terms."""
+    content = [_is_content(t) for t in terms]
+    grams = [t for t, c in zip(terms, content) if c]
+    n = len(terms)
+    if max_n >= 2:
+        pairs = [content[i] and content[i + 1] for i in range(n - 1)]
+        grams.extend(f"{terms[i]} {terms[i + 1]}" for i in range(n - 1) if pairs[i])
+        if max_n >= 3:
+            grams.extend(f"{terms[i]} {terms[i + 1]} {terms[i + 2]}"
+                         for i in range(n - 2) if pairs[i] and pairs[i + 1])
+    return grams
+
+
+def section_heading(line: str) -> Optional[str]:
+    """The SECTIONS name if this line is a resume section heading, else None."""
+    stripped = line.strip().strip(":").strip().lower()
+    if not stripped or len(stripped) > 40:
+        return None
+    return _HEADING_TO_SECTION.get(" ".join(_tokenize(stripped)))
+
+
+class ResumeIndex:
+    """
+    term → bitmask of SECTIONS the term occurs in. With `vocab`, only those
+    terms are kept (and n-grams longer than any of them are never built).
+    """
+
+    __slots__ = ("terms",)
+
+    def __init__(self, text: str, vocab: Optional[frozenset] = None):
+        self.terms: dict[str, int] = {}
+        max_n = MAX_PHRASE if vocab is None else max((t.count(" ") + 1 for t in vocab), default=1)
+        terms = self.terms
+        bit = 1 << SECTIONS.index("header")
+        for line in text.splitlines():
+            section = section_heading(line)
+            if section is not None:
+                bit = 1 << SECTIONS.index(section)
+                continue
+            for gram in _ngrams(normalize_terms(line), max_n):
+                if vocab is None or gram in vocab:
+                    terms[gram] = terms.get(gram, 0) | bit
+
+    def masks(self, keywords: list[str]) -> np.ndarray:
+        get = self.terms.get
+        return np.fromiter((get(k, 0) for k in keywords), dtype=np.int64, count=len(keywords))
+
+
+class JDKeywords:
+    __slots__ = ("terms", "vocab", "weights", "total")
+
+    def __init__(self, terms: list[str], weights: np.ndarray):
+        self.terms = terms
+        self.vocab = frozenset(terms)
+        self.weights = weights
+        self.total = float(weights.sum()) or 1.0
+
+
+class ATSScorer:
+    def __init__(self, idf: Optional[dict] = None, max_keywords: int = MAX_KEYWORDS, cache_size: int = 1024):
+        self.idf = idf or {}
+        self.default_idf = max(self.idf.values()) if self.idf else 1.0  # unseen terms count as rare
+        self.max_keywords = max_keywords
+        self._jd_cache = LockedLRUCache(maxsize=cache_size)  # also used from to_thread workers
+
+    @classmethod
+    def fit(cls, corpus: Iterable[str], **kwargs) -> "ATSScorer":
+        """Learn smoothed IDF weights from a corpus of JDs."""
+        df: Counter = Counter()
+        n = 0
+        for doc in corpus:
+            df.update(set(_ngrams(normalize_terms(doc))))
+            n += 1
+        idf = {t: math.log((1 + n) / (1 + c)) + 1.0 for t, c in df.items()}
+        return cls(idf=idf, **kwargs)
+
+    def term_weights(self, job_description: str) -> dict[str, float]:
+        """TF-IDF weight for every candidate keyword of the JD."""
+        counts = Counter(_ngrams(normalize_terms(job_description)))
+        weights = {}
+        for term, tf in counts.items():
+            is_phrase = " " in term and term not in SKILLS
+            if is_phrase and tf < 2:
+                continue  # one-off word pairs are mostly noise
+            w = (1.0 + math.log(tf)) * self.idf.get(term, self.default_idf)
+            if term in SKILLS:
+                w *= SKILL_BOOST
+            weights[term] = w
+        return weights
+
+    def keywords(self, job_description: str) -> JDKeywords:
+        key = hashlib.sha1(job_description.encode()).hexdigest()
+        cached = self._jd_cache.get(key)
+        if cached is not None:
+            return cached
+        weights = self.term_weights(job_description)
+        top = sorted(weights.items(), key=lambda kv: (-kv[1], kv[0]))[:self.max_keywords]
+        kw = JDKeywords([t for t, _ in top], np.array([w for _, w in top], dtype=np.float64))
+        self._jd_cache.set(key, kw)
+        return kw
+
+    def score(self, resume_text: str, job_description: str) -> dict:
+        kw = self.keywords(job_description)
+        masks = ResumeIndex(resume_text).masks(kw.terms)
+        hit = masks != 0
+        in_section = (masks[:, None] >> _SECTION_BITS) & 1  # K × S
+        coverage = kw.weights @ in_section / kw.total * 100
+        return {
+            "score": round(float(kw.weights[hit].sum() / kw.total * 100), 1),
+            "matched": [t for t, h in zip(kw.terms, hit) if h],
+            "missing": [t for t, h in zip(kw.terms, hit) if not h],
+            "sections": {s: round(float(c), 1) for s, c in zip(SECTIONS, coverage) if c > 0},
+        }
+
+    def score_many(self, resume_texts: Iterable[str], job_description: str) -> np.ndarray:
+        """Scores (0-100) of many resumes against one JD, one matrix product."""
+        resume_texts = list(resume_texts)
+        if not resume_texts:
+            return np.zeros(0)
+        kw = self.keywords(job_description)
+        present = np.stack([ResumeIndex(t, kw.vocab).masks(kw.terms) != 0 for t in resume_texts])  # R × K
+        return present @ kw.weights / kw.total * 100
+
+
+def flatten_resume_data(resume_data: dict) -> str:
+    """resume_data (template struct) → sectioned plain text the scorer can index."""
+    data = resume_data or {}
+    lines = [str(data.get(k, "")) for k in ("name", "email", "linkedin_text", "github_text")]
+    for section, fields in (("EDUCATION", ("institution", "degree")),
+                            ("EXPERIENCE", ("title", "company")),
+                            ("PROJECTS", ("name", "tech")),
+                            ("SKILLS", ("category", "items"))):
+        lines.append(section)
+        for entry in data.get(section.lower()) or []:
+            lines.append(": ".join(str(entry.get(f, "")) for f in fields))
+            lines.extend(str(b) for b in entry.get("bullets") or [])
+    return "\n".join(lines)
+
+
+ats_scorer = ATSScorer()
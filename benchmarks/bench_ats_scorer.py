@@ -0,0 +1,62 @@
+"""
+Throughput of the local ATS keyword scorer.
+
+    python benchmarks/bench_ats_scorer.py [--pairs 5000]
+
+single = ats_scorer.score() per resume/JD pair (full report).
+batch  = ats_scorer.score_many(): many resumes against one JD, one matrix product.
+Resumes/JDs are the fixtures with shuffled lines and a few random skills
+mixed in, so no two inputs are identical.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ats_scorer import ATSScorer, SKILL_SYNONYMS  # noqa: E402
+from benchmarks.fixtures import SAMPLE_RESUME_TEXT, SAMPLE_JD  # noqa: E402
+
+
+def variants(text: str, n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    lines = text.splitlines()
+    skills = list(SKILL_SYNONYMS)
+    out = []
+    for _ in range(n):
+        body = lines[:]
+        rng.shuffle(body[2:])
+        body.append("Also: " + ", ".join(rng.sample(skills, 5)))
+        out.append("\n".join(body))
+    return out
+
+
+def main(args):
+    resumes = variants(SAMPLE_RESUME_TEXT, args.pairs, 1)
+    jds = variants(SAMPLE_JD, max(args.pairs // 50, 1), 2)
+
+    scorer = ATSScorer()
+    t = time.perf_counter()
+    for i, resume in enumerate(resumes):
+        scorer.score(resume, jds[i % len(jds)])
+    single = args.pairs / (time.perf_counter() - t)
+
+    scorer = ATSScorer()
+    per_jd = args.pairs // len(jds)
+    t = time.perf_counter()
+    for j, jd in enumerate(jds):
+        scorer.score_many(resumes[j * per_jd:(j + 1) * per_jd], jd)
+    batch = per_jd * len(jds) / (time.perf_counter() - t)
+
+    print(f"{args.pairs} pairs, {len(jds)} distinct JDs")
+    print(f"single: {single:8.0f} pairs/s  ({1000 / single:.2f} ms per report)")
+    print(f"batch:  {batch:8.0f} pairs/s")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pairs", type=int, default=5000)
+    main(ap.parse_args())
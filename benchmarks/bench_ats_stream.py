@@ -0,0 +1,78 @@
+"""
+Time-to-first-useful-byte of the ATS Sentinel, blocking vs. streaming,
+against the fake OpenAI server replaying the recorded tool-call stream
+(benchmarks/recordings/produce_optimized_resume.jsonl).
+
+    python benchmarks/bench_ats_stream.py [--token-delay 0.015]
+
+The blocking call is given the same total generation time as the replayed
+stream, so the only difference is when the first data reaches the caller.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(100):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+async def main(args):
+    with open(os.path.join(ROOT, "benchmarks", "recordings", "produce_optimized_resume.jsonl")) as f:
+        fragments = sum(1 for line in f if line.strip())
+    generation_s = args.latency + fragments * args.token_delay
+    env = dict(os.environ, FAKE_LLM_LATENCY=str(args.latency), FAKE_LLM_TOKEN_DELAY=str(args.token_delay),
+               FAKE_LLM_TOOL_LATENCY=str(generation_s))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    os.environ.update(OPENAI_BASE_URL="http://127.0.0.1:8011/v1", OPENAI_API_KEY="sk-fake")
+    from ats_agent import analyze_and_optimize, stream_analyze_and_optimize
+    from benchmarks.fixtures import SAMPLE_RESUME_TEXT, SAMPLE_JD, FAKE_TOOL_RESPONSES
+    try:
+        await wait_up("http://127.0.0.1:8011/stats")
+
+        t = time.perf_counter()
+        blocking = await analyze_and_optimize(SAMPLE_RESUME_TEXT, SAMPLE_JD, use_cache=False)
+        blocking_ms = (time.perf_counter() - t) * 1000
+
+        firsts, counts = {}, {}
+        t = time.perf_counter()
+        async for event in stream_analyze_and_optimize(SAMPLE_RESUME_TEXT, SAMPLE_JD, use_cache=False):
+            firsts.setdefault(event["type"], (time.perf_counter() - t) * 1000)
+            counts[event["type"]] = counts.get(event["type"], 0) + 1
+            if event["type"] == "done":
+                streamed = event["result"]
+
+        recorded = FAKE_TOOL_RESPONSES["produce_optimized_resume"]
+        assert streamed == blocking, "streamed result differs from the blocking one"
+        assert streamed["resume_data"] == recorded["resume_data"], "streamed result differs from the recording"
+        print(f"{fragments} fragments, ~{generation_s * 1000:.0f} ms generation")
+        print(f"blocking:  first data at {blocking_ms:7.0f} ms")
+        for kind in ("score", "gap_analysis", "field", "entry", "bullet", "done"):
+            if kind in firsts:
+                print(f"streaming: first {kind:<12} at {firsts[kind]:7.0f} ms  ({counts[kind]} events)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=0.3, help="time to first token (s)")
+    ap.add_argument("--token-delay", type=float, default=0.015, help="seconds between argument fragments")
+    asyncio.run(main(ap.parse_args()))
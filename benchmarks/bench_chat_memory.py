@@ -0,0 +1,165 @@
+"""
+Per-turn cost of a long chat session: bounded memory (conversation_memory)
+vs. the whole history in a JSON column, resent in full every turn.
+
+    python benchmarks/bench_chat_memory.py [--turns 100] [--prefill-tps 5000]
+
+Drives --turns career-chat turns through orchestrate_chat against the fake
+OpenAI server (prompt prefill modelled at --prefill-tps tokens/s), in
+process, with the job queue running so summary jobs land as they would in
+the app. Reports, at a few turn numbers: turn latency, prompt tokens and the
+time spent loading/saving the session in the DB (throwaway SQLite file),
+each the median of the 5 turns ending there.
+"""
+import os
+import sys
+import time
+import statistics
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPORT_AT = (1, 5, 10, 25, 50, 75, 100)
+
+
+def user_message(turn: int) -> str:
+    return (f"Turn {turn}: I led the migration of our billing service to Kubernetes and cut deploy time "
+            f"from 40 minutes to 6. How should I frame that for a staff engineer role, and what would "
+            f"an interviewer at a payments company push back on?")
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(100):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+def window(rows: list[dict], turn: int, key: str) -> float:
+    return statistics.median(r[key] for r in rows[max(turn - 5, 0):turn])
+
+
+async def memory_turn(session_id: str, turn: int) -> dict:
+    from agent_orchestrator import orchestrate_chat
+    from conversation_memory import ConversationMemory
+    from prompt_budget import count_tokens
+
+    message = user_message(turn)
+    t = time.perf_counter()
+    memory = await asyncio.to_thread(ConversationMemory.open, session_id, "bench@example.com")
+    db_ms = (time.perf_counter() - t) * 1000
+    history = memory.prompt_messages()
+    result = await orchestrate_chat(message, history)
+    t2 = time.perf_counter()
+    await asyncio.to_thread(memory.append, {"role": "user", "content": message},
+                            {"role": "assistant", "content": result["message"]})
+    await asyncio.to_thread(memory.schedule_summary)
+    db_ms += (time.perf_counter() - t2) * 1000
+    return {"ms": (time.perf_counter() - t) * 1000, "db_ms": db_ms,
+            "tokens": sum(count_tokens(m["content"]) for m in history) + count_tokens(message)}
+
+
+async def json_turn(session_id: str, turn: int) -> dict:
+    """The previous shape: every message in ConversationSession.messages, all of it in the prompt."""
+    from agent_orchestrator import orchestrate_chat
+    from models import SessionLocal, User, ConversationSession
+    from prompt_budget import count_tokens
+
+    def load():
+        db = SessionLocal()
+        try:
+            row = db.get(ConversationSession, session_id)
+            if row is None:
+                user = db.query(User).filter(User.email == "bench@example.com").first()
+                if user is None:
+                    user = User(email="bench@example.com")
+                    db.add(user)
+                    db.flush()
+                row = ConversationSession(id=session_id, user_id=user.id, messages=[], context={})
+                db.add(row)
+                db.commit()
+            return list(row.messages or [])
+        finally:
+            db.close()
+
+    def save(messages):
+        db = SessionLocal()
+        try:
+            db.query(ConversationSession).filter(ConversationSession.id == session_id).update({"messages": messages})
+            db.commit()
+        finally:
+            db.close()
+
+    message = user_message(turn)
+    t = time.perf_counter()
+    messages = await asyncio.to_thread(load)
+    db_ms = (time.perf_counter() - t) * 1000
+    history = [{"role": m["role"], "content": m["content"]} for m in messages]
+    result = await orchestrate_chat(message, history)
+    t2 = time.perf_counter()
+    messages += [{"role": "user", "content": message}, {"role": "assistant", "content": result["message"]}]
+    await asyncio.to_thread(save, messages)
+    db_ms += (time.perf_counter() - t2) * 1000
+    return {"ms": (time.perf_counter() - t) * 1000, "db_ms": db_ms,
+            "tokens": sum(count_tokens(m["content"]) for m in history) + count_tokens(message)}
+
+
+async def main(args):
+    env = dict(os.environ, FAKE_LLM_LATENCY="0.05", FAKE_LLM_PREFILL_TPS=str(args.prefill_tps),
+               FAKE_LLM_REPLY_WORDS=str(args.reply_words))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    os.environ.update(OPENAI_BASE_URL="http://127.0.0.1:8011/v1", OPENAI_API_KEY="sk-fake",
+                      DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'memory.db')}")
+    from models import create_tables
+    from job_queue import job_queue
+    from conversation_memory import ConversationMemory, summarize_conversation, MEMORY_RECENT_TURNS, MEMORY_MAX_TOKENS
+
+    async def summarize_job(ctx):
+        return await summarize_conversation(ctx.payload["session_id"], ctx.payload["through"])
+
+    create_tables()
+    job_queue.register("summarize_conversation", summarize_job)
+    job_queue.start()
+    try:
+        await wait_up("http://127.0.0.1:8011/stats")
+        results = {}
+        for label, turn_fn in (("json history", json_turn), ("bounded memory", memory_turn)):
+            session_id = f"bench-{label.replace(' ', '-')}"
+            results[label] = [await turn_fn(session_id, turn) for turn in range(1, args.turns + 1)]
+        print(f"{args.turns} turns, {args.reply_words}-word replies, prefill {args.prefill_tps:g} tok/s; "
+              f"memory: last {MEMORY_RECENT_TURNS} turns verbatim, cap {MEMORY_MAX_TOKENS} tokens")
+        print(f"{'turn':>5} | {'json history: ms':>16} {'tokens':>7} {'db ms':>6} | "
+              f"{'bounded memory: ms':>18} {'tokens':>7} {'db ms':>6}")
+        for turn in REPORT_AT:
+            if turn > args.turns:
+                continue
+            a, b = results["json history"], results["bounded memory"]
+            print(f"{turn:>5} | {window(a, turn, 'ms'):>16.0f} {window(a, turn, 'tokens'):>7.0f} "
+                  f"{window(a, turn, 'db_ms'):>6.1f} | {window(b, turn, 'ms'):>18.0f} "
+                  f"{window(b, turn, 'tokens'):>7.0f} {window(b, turn, 'db_ms'):>6.1f}")
+        memory = ConversationMemory.open("bench-bounded-memory")
+        print(f"summary covers messages 1-{memory.summary_through} of {memory.message_count} "
+              f"({memory.summary_tokens} tokens); {len(memory.tail)} held verbatim")
+    finally:
+        await job_queue.stop()
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=100)
+    ap.add_argument("--prefill-tps", type=float, default=5000)
+    ap.add_argument("--reply-words", type=int, default=120)
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,137 @@
+"""
+Offline IP geolocation (geo_db): build time, file size and lookup latency.
+
+    python benchmarks/bench_geo_db.py [--v4 500000] [--v6 100000] [--lookups 200000]
+
+Generates DB-IP-shaped city and ASN CSV dumps (random disjoint ranges with
+gaps, --cities distinct locations, ASN ranges not aligned with the city
+ones), compiles them with geo_db.build and opens the result. Lookups are
+checked against a reference (plain Python lists, ipaddress parsing) on a
+sample of addresses, then timed: IPv4, IPv6 and misses spread uniformly
+over all ranges (worst case: every lookup decodes a cold record), IPv4
+skewed over --hot addresses the way pixel traffic repeats, each as mean per
+call over --lookups calls and p50/p99 of individually timed calls. For
+comparison, a spyglass geo_cache (LRUCache) hit on the same addresses.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import ipaddress
+from bisect import bisect_right
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from geo_db import GeoDB, build  # noqa: E402
+from caching import LRUCache  # noqa: E402
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def write_csvs(path: str, args, rng: random.Random):
+    cities = [(rng.choice(["US", "IN", "DE", "GB", "FR", "BR", "JP", "CA"]), f"Region {i % 300}", f"City {i}",
+               round(rng.uniform(-60, 70), 4), round(rng.uniform(-180, 180), 4)) for i in range(args.cities)]
+    truth = {4: [], 6: []}
+    with open(f"{path}/city.csv", "w") as city, open(f"{path}/asn.csv", "w") as asn:
+        for version, count, bits in ((4, args.v4, 32), (6, args.v6, 128)):
+            fmt = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+            starts = sorted({rng.getrandbits(bits) for _ in range(2 * count)})
+            for a, b in zip(starts[::2], starts[1::2]):
+                if rng.random() < 0.9:  # leave some holes
+                    loc = rng.choice(cities)
+                    city.write(f"{fmt(a)},{fmt(b)},EU,{loc[0]},{loc[1]},{loc[2]},{loc[3]},{loc[4]}\n")
+                    truth[version].append((a, b, loc))
+            # ASN blocks: coarser, offset from the city ranges
+            starts = sorted({rng.getrandbits(bits) for _ in range(count // 4)})
+            for n, (a, b) in enumerate(zip(starts[::2], starts[1::2])):
+                asn.write(f"{fmt(a)},{fmt(b)},{64512 + n % 1000},AS{64512 + n % 1000} Company {n % 1000} Inc\n")
+            truth[f"starts{version}"] = [r[0] for r in truth[version]]
+    return truth
+
+
+def reference(truth: dict, ip: str):
+    addr = ipaddress.ip_address(ip)
+    ranges, starts = truth[addr.version], truth[f"starts{addr.version}"]
+    i = bisect_right(starts, int(addr)) - 1
+    if i >= 0 and int(addr) <= ranges[i][1]:
+        return ranges[i][2]
+    return None
+
+
+def timed(fn, ips: list[str]) -> dict:
+    t = time.perf_counter()
+    for ip in ips:
+        fn(ip)
+    mean = (time.perf_counter() - t) / len(ips) * 1e9
+    each = []
+    for ip in ips[:50000]:
+        t = time.perf_counter_ns()
+        fn(ip)
+        each.append(time.perf_counter_ns() - t)
+    return {"mean": mean, "p50": pct(each, .5), "p99": pct(each, .99)}
+
+
+def main(args):
+    rng = random.Random(7)
+    tmp = tempfile.mkdtemp()
+    t = time.perf_counter()
+    truth = write_csvs(tmp, args, rng)
+    print(f"generated {len(truth[4])} IPv4 + {len(truth[6])} IPv6 city ranges in {time.perf_counter() - t:.1f} s")
+
+    t = time.perf_counter()
+    counts = build(f"{tmp}/city.csv", f"{tmp}/asn.csv", f"{tmp}/geo.bin")
+    print(f"build: {time.perf_counter() - t:.1f} s -> {counts['v4_ranges']} IPv4 + {counts['v6_ranges']} IPv6 "
+          f"segments, {counts['records']} records, {counts['bytes'] / 1e6:.1f} MB")
+    t = time.perf_counter()
+    db = GeoDB(f"{tmp}/geo.bin")
+    print(f"open: {(time.perf_counter() - t) * 1e6:.0f} us")
+
+    def pick(version: int, inside: bool) -> str:
+        ranges = truth[version]
+        if inside:
+            a, b, _ = rng.choice(ranges)
+            value = rng.randint(a, b)
+        else:
+            value = rng.getrandbits(32 if version == 4 else 128)
+        return str(ipaddress.ip_address(value) if version == 4 else ipaddress.IPv6Address(value))
+
+    sample = [pick(v, inside) for v in (4, 6) for inside in (True, False) for _ in range(2500)]
+    wrong = 0
+    for ip in sample:
+        want, got = reference(truth, ip), db.lookup(ip)
+        if want is None:
+            wrong += got is not None and got["city"] != "Unknown"
+        else:
+            wrong += got is None or (got["country"], got["region"], got["city"]) != want[:3] or \
+                abs(got["latitude"] - want[3]) > 1e-3
+    print(f"checked {len(sample)} addresses against the reference: {wrong} mismatches")
+
+    v4 = [pick(4, True) for _ in range(args.lookups)]
+    hot = v4[:args.hot]
+    skewed = [hot[min(int(rng.paretovariate(1.2)) - 1, len(hot) - 1)] for _ in range(args.lookups)]
+    v6 = [pick(6, True) for _ in range(args.lookups)]
+    miss = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}" for _ in range(args.lookups)]
+    miss = [ip for ip in miss if reference(truth, ip) is None] or miss
+    cache = LRUCache(maxsize=len(v4) * 2, ttl=86400)
+    for ip in v4:
+        cache.set(ip, db.lookup(ip))
+    for label, fn, ips in (("IPv4 hit", db.lookup, v4), ("IPv6 hit", db.lookup, v6), ("IPv4 miss", db.lookup, miss),
+                           ("IPv4 skewed", db.lookup, skewed), ("geo_cache hit", cache.get, v4)):
+        r = timed(fn, ips)
+        print(f"{label:>14}: mean {r['mean']:5.0f} ns  p50 {r['p50']:5.0f} ns  p99 {r['p99']:5.0f} ns")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--v4", type=int, default=500000)
+    ap.add_argument("--v6", type=int, default=100000)
+    ap.add_argument("--cities", type=int, default=20000)
+    ap.add_argument("--lookups", type=int, default=200000)
+    ap.add_argument("--hot", type=int, default=5000, help="distinct IPs behind the skewed (pixel-like) run")
+    main(ap.parse_args())
@@ -0,0 +1,92 @@
+"""
+Grading a 10-question mock interview: one call per answer in sequence vs.
+interview_agent.grade_answers (concurrent, short answers packed).
+
+    python benchmarks/bench_grade_batch.py [--tool-latency 1.0] [--questions 10]
+
+Each tool call takes --tool-latency seconds on the fake OpenAI server, so
+sequential grading costs ~questions x latency; concurrent grading should
+land near one call's latency. Packing also cuts the number of calls (the
+fake server does not charge extra for a longer packed response; a real
+model does, roughly per graded answer).
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import SAMPLE_QUESTIONS  # noqa: E402
+
+
+def mock_interview(n: int) -> list[dict]:
+    base = SAMPLE_QUESTIONS["questions"]
+    items = []
+    for i in range(1, n + 1):
+        q = base[(i - 1) % len(base)]
+        answer = ("In my last role I owned the ledger service. " * (3 if i % 3 else 20)).strip()
+        items.append({"question_id": f"q{i}", "question": q["question"], "answer": answer,
+                      "model_answer": q["model_answer"], "category": q["category"]})
+    return items
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(100):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+async def requests_made() -> int:
+    async with httpx.AsyncClient() as c:
+        return (await c.get("http://127.0.0.1:8011/stats")).json()["requests"]
+
+
+async def main(args):
+    env = dict(os.environ, FAKE_LLM_TOOL_LATENCY=str(args.tool_latency))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    os.environ.update(OPENAI_BASE_URL="http://127.0.0.1:8011/v1", OPENAI_API_KEY="sk-fake")
+    import interview_agent
+    items = mock_interview(args.questions)
+    try:
+        await wait_up("http://127.0.0.1:8011/stats")
+        rows = []
+
+        calls = await requests_made()
+        t = time.perf_counter()
+        for item in items:
+            await interview_agent.grade_answer(item["question"], item["answer"], item["model_answer"], item["category"])
+        rows.append(("sequential", time.perf_counter() - t, await requests_made() - calls, None))
+
+        for label, pack in (("concurrent", 1), ("concurrent+pack", interview_agent.GRADE_PACK_SIZE)):
+            interview_agent.GRADE_PACK_SIZE = pack
+            calls = await requests_made()
+            t = time.perf_counter()
+            result = await interview_agent.grade_answers(items)
+            rows.append((label, time.perf_counter() - t, await requests_made() - calls, result["overall_score"]))
+
+        print(f"{args.questions} answers, {args.tool_latency:.2f} s per call")
+        for label, wall, n_calls, overall in rows:
+            print(f"{label:>16}: {wall * 1000:7.0f} ms  {n_calls:3d} calls"
+                  + (f"  overall_score={overall}" if overall is not None else ""))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tool-latency", type=float, default=1.0)
+    ap.add_argument("--questions", type=int, default=10)
+    asyncio.run(main(ap.parse_args()))
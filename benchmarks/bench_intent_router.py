@@ -0,0 +1,87 @@
+"""
+Accuracy and latency of the local intent router (intent_router).
+
+    python benchmarks/bench_intent_router.py [--folds 5] [--repeat 200]
+
+Trains on intent_examples.jsonl and scores the held-out INTENT_EVAL
+messages: accuracy of the local decision, how many clear the confidence
+threshold (answered without the LLM) and how accurate those are, per
+agent. Also k-fold cross-validation over the examples file, training time,
+and classify() latency (p50/p99 over --repeat passes of the eval set).
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import INTENT_EVAL  # noqa: E402
+from intent_router import IntentRouter, AGENTS, load_examples  # noqa: E402
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def evaluate(router: IntentRouter, labelled) -> dict:
+    decisions = [(router.classify(text), agent) for text, agent in labelled]
+    confident = [(d, a) for d, a in decisions if d["confidence"] >= router.threshold]
+    return {
+        "accuracy": sum(d["primary_agent"] == a for d, a in decisions) / len(decisions),
+        "local_rate": len(confident) / len(decisions),
+        "local_accuracy": sum(d["primary_agent"] == a for d, a in confident) / max(len(confident), 1),
+        "decisions": decisions,
+    }
+
+
+def main(args):
+    examples = load_examples()
+    router = IntentRouter(log_path="")
+    router.load(examples)
+    result = evaluate(router, INTENT_EVAL)
+    print(f"trained on {len(examples)} examples in {router.train_ms:.0f} ms; threshold {router.threshold}")
+    print(f"held-out ({len(INTENT_EVAL)} messages): accuracy {result['accuracy']:.0%}, "
+          f"answered locally {result['local_rate']:.0%} (accuracy {result['local_accuracy']:.0%}), "
+          f"LLM fallback {1 - result['local_rate']:.0%}")
+    sources = Counter(d["source"] for d, _ in result["decisions"])
+    print(f"  local decisions by source: {dict(sources)}")
+    for agent in AGENTS:
+        rows = [(d, a) for d, a in result["decisions"] if a == agent]
+        hits = sum(d["primary_agent"] == a for d, a in rows)
+        print(f"  {agent:>12}: {hits}/{len(rows)}")
+    for d, a in result["decisions"]:
+        if d["primary_agent"] != a:
+            print(f"  miss: {a} -> {d['primary_agent']} ({d['confidence']:.2f}, {d['source']})")
+
+    shuffled = examples[:]
+    random.Random(0).shuffle(shuffled)
+    folds = [shuffled[i::args.folds] for i in range(args.folds)]
+    scores = []
+    for i, held in enumerate(folds):
+        fold_router = IntentRouter(log_path="")
+        fold_router.load([e for j, fold in enumerate(folds) if j != i for e in fold])
+        scores.append(evaluate(fold_router, held))
+    print(f"{args.folds}-fold cross-validation: accuracy {sum(s['accuracy'] for s in scores) / len(scores):.0%}, "
+          f"answered locally {sum(s['local_rate'] for s in scores) / len(scores):.0%} "
+          f"(accuracy {sum(s['local_accuracy'] for s in scores) / len(scores):.0%})")
+
+    timings = []
+    for _ in range(args.repeat):
+        for text, _ in INTENT_EVAL:
+            t = time.perf_counter()
+            router.classify(text)
+            timings.append((time.perf_counter() - t) * 1e6)
+    print(f"classify(): p50 {pct(timings, .5):.0f} us, p99 {pct(timings, .99):.0f} us "
+          f"over {len(timings)} calls")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=200)
+    main(ap.parse_args())
@@ -0,0 +1,88 @@
+"""
+One resume against N job descriptions: JD index vs. scoring each pair.
+
+    python benchmarks/bench_jd_match.py [--jds 10000] [--runs 20]
+
+build  = JDIndex.build: keywords for every JD, CSR arrays written as .npy.
+load   = get_index on a fresh process-level cache (memory-mapped arrays).
+match  = index.top_k(resume, 10): one vectorized pass over all rows.
+naive  = ats_scorer.score(resume, jd) per JD (measured on a sample, scaled up).
+Synthetic JDs: random role/skill mixes over the scorer's skill dictionary.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ats_scorer import ATSScorer, SKILL_SYNONYMS  # noqa: E402
+from jd_index import JDIndex  # noqa: E402
+from benchmarks.fixtures import SAMPLE_RESUME_TEXT  # noqa: E402
+
+ROLES = ["Backend Engineer", "Data Engineer", "Platform Engineer", "ML Engineer", "Frontend Engineer",
+         "Site Reliability Engineer", "Full Stack Developer", "Payments Engineer"]
+DOMAINS = ["payments", "logistics", "healthcare", "ads", "search", "fraud detection", "billing", "streaming"]
+
+
+def synthetic_jds(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    skills = list(SKILL_SYNONYMS)
+    jds = []
+    for i in range(n):
+        must = rng.sample(skills, 8)
+        nice = rng.sample(skills, 4)
+        domain = rng.choice(DOMAINS)
+        jds.append({"id": f"jd-{i}", "text": (
+            f"{rng.choice(ROLES)}, {domain} team\n"
+            f"We build {domain} systems at scale. You will own services end to end.\n"
+            f"Requirements: {', '.join(must)}.\n"
+            f"You have shipped {must[0]} and {must[1]} in production and care about {domain} reliability.\n"
+            f"Nice to have: {', '.join(nice)}.\n"
+        )})
+    return jds
+
+
+def main(args):
+    jds = synthetic_jds(args.jds)
+    with tempfile.TemporaryDirectory() as root:
+        t = time.perf_counter()
+        JDIndex.build(jds, root, index_id="bench")
+        build_s = time.perf_counter() - t
+
+        t = time.perf_counter()
+        index = JDIndex.load(os.path.join(root, "bench"))
+        load_ms = (time.perf_counter() - t) * 1000
+
+        index.top_k(SAMPLE_RESUME_TEXT, 10)  # warm the page cache
+        runs = []
+        for _ in range(args.runs):
+            t = time.perf_counter()
+            top = index.top_k(SAMPLE_RESUME_TEXT, 10)
+            runs.append((time.perf_counter() - t) * 1000)
+
+        sample = jds[:args.naive_sample]
+        scorer = ATSScorer()
+        t = time.perf_counter()
+        for jd in sample:
+            scorer.score(SAMPLE_RESUME_TEXT, jd["text"])
+        naive_ms = (time.perf_counter() - t) * 1000 * len(jds) / len(sample)
+
+        size = sum(os.path.getsize(os.path.join(root, "bench", f)) for f in os.listdir(os.path.join(root, "bench")))
+        print(f"{len(jds)} JDs, vocab {len(index.vocab)}, nnz {len(index.indices)}, {size / 1e6:.1f} MB on disk")
+        print(f"build: {build_s:6.1f} s (one-off)   load: {load_ms:6.1f} ms")
+        print(f"match: median {statistics.median(runs):6.1f} ms  min {min(runs):6.1f} ms  (1 resume x {len(jds)} JDs)")
+        print(f"naive: ~{naive_ms:6.0f} ms  ({naive_ms / statistics.median(runs):.0f}x slower)")
+        print("top 3:", [(r["jd_id"], r["score"]) for r in top[:3]])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jds", type=int, default=10000)
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--naive-sample", type=int, default=500)
+    main(ap.parse_args())
@@ -0,0 +1,66 @@
+"""
+Cold vs. warm LaTeX compile time for a typical resume.
+
+    python benchmarks/bench_latex_compile.py [--runs 5]
+
+cold = the original path: fresh temp dir, two full pdflatex passes.
+warm = latex_service: precompiled preamble format, reused scratch dir,
+       second pass only when the log asks for it.
+Needs pdflatex + mylatexformat (the Docker image has both).
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+
+def cold_compile(latex_source: str) -> float:
+    t = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tex_file = os.path.join(tmpdir, "resume.tex")
+        with open(tex_file, "w", encoding="utf-8") as f:
+            f.write(latex_source)
+        for _ in range(2):
+            subprocess.run(["pdflatex", "-interaction=nonstopmode", "-output-directory", tmpdir, tex_file],
+                           capture_output=True, text=True, timeout=60)
+        assert os.path.exists(os.path.join(tmpdir, "resume.pdf")), "cold compile produced no PDF"
+    return (time.perf_counter() - t) * 1000
+
+
+def main(args):
+    if shutil.which("pdflatex") is None:
+        print("pdflatex not found — run inside the backend Docker image.")
+        return
+    from ats_agent import render_latex
+    from latex_service import latex_service
+    from benchmarks.fixtures import SAMPLE_RESUME_DATA
+    source = render_latex(SAMPLE_RESUME_DATA)
+
+    t = time.perf_counter()
+    latex_service.warm_up(source)
+    print(f"format build (one-off): {(time.perf_counter() - t) * 1000:.0f} ms")
+
+    cold = [cold_compile(source) for _ in range(args.runs)]
+    warm = []
+    for _ in range(args.runs):
+        t = time.perf_counter()
+        latex_service.compile(source)
+        warm.append((time.perf_counter() - t) * 1000)
+
+    print(f"cold: median={statistics.median(cold):7.0f} ms  min={min(cold):7.0f} ms")
+    print(f"warm: median={statistics.median(warm):7.0f} ms  min={min(warm):7.0f} ms")
+    print(f"speedup: {statistics.median(cold) / statistics.median(warm):.1f}x   stats={latex_service.stats()}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    main(ap.parse_args())
@@ -0,0 +1,230 @@
+"""
+Live Spyglass push (live_hub): fan-out of tracked views to 1k dashboards.
+
+    python benchmarks/bench_live_fanout.py [--subscribers 1000] [--events 400] [--rate 50] [--slow 0.1]
+
+In process: --subscribers consumers on one resume topic, --slow of them
+stalling --stall seconds between reads, while --events views are published at
+--rate/s. Reports publish cost per event, publish → consumer latency for
+the consumers that keep up, whether they received every event, and that
+the stalled ones stayed bounded at LIVE_BUFFER with drops reported.
+
+End to end: starts the app (uvicorn, throwaway SQLite, offline geo), opens
+--subscribers SSE streams on /api/spyglass/live/{resume_id}, fires the same
+number of pixel hits at --rate/s and reports pixel → SSE delivery latency
+(this includes the write-behind flush, SPYGLASS_FLUSH_MS) and events
+received per stream. For comparison, the database time the same dashboards
+would spend polling get_tracking_stats every --poll-interval seconds.
+"""
+import os
+import re
+import sys
+import time
+import json
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from live_hub import LiveHub, LIVE_BUFFER  # noqa: E402
+
+HOST = "127.0.0.1"
+APP_PORT = 8012
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] if values else float("nan")
+
+
+# --- in process -------------------------------------------------------------
+
+async def in_process(args):
+    hub = LiveHub()
+    topic = "resume:bench"
+    slow = int(args.subscribers * args.slow)
+    latencies, received, high_water, lost = [], [0] * args.subscribers, [0] * args.subscribers, [0] * args.subscribers
+    done = asyncio.Event()
+
+    async def consumer(i: int):
+        sub = hub.subscribe(topic)
+        try:
+            while not done.is_set():
+                high_water[i] = max(high_water[i], len(sub.buffer))
+                events, dropped = await sub.next_batch(timeout=0.5)
+                now = time.perf_counter()
+                lost[i] += dropped
+                received[i] += len(events)
+                if i >= slow:
+                    latencies.extend((now - json.loads(e)["sent"]) * 1000 for e in events[:1])
+                else:
+                    await asyncio.sleep(args.stall)
+        finally:
+            hub.unsubscribe(sub)
+
+    tasks = [asyncio.create_task(consumer(i)) for i in range(args.subscribers)]
+    await asyncio.sleep(0.1)
+    publish = []
+    for n in range(args.events):
+        t = time.perf_counter()
+        hub.publish({"seq": n, "sent": t, "resume_id": "bench", "event_type": "view", "country": "US",
+                     "city": "City", "company_hint": "Company", "viewed_at": "2026-01-01T00:00:00"}, topic)
+        publish.append((time.perf_counter() - t) * 1e6)
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.sleep(args.stall + 0.5)
+    done.set()
+    await asyncio.gather(*tasks)
+
+    fast = range(slow, args.subscribers)
+    print(f"in process: {args.subscribers} subscribers ({slow} stalling {args.stall:g} s per read), {args.events} events "
+          f"at {args.rate:g}/s, buffer {LIVE_BUFFER}")
+    print(f"  publish: p50 {pct(publish, .5):.0f} us  p99 {pct(publish, .99):.0f} us per event "
+          f"({pct(publish, .5) / args.subscribers * 1000:.0f} ns per subscriber)")
+    print(f"  keeping up: {sum(received[i] == args.events for i in fast)}/{len(fast)} got every event, "
+          f"latency p50 {pct(latencies, .5):.2f} ms  p99 {pct(latencies, .99):.2f} ms")
+    if slow:
+        print(f"  stalling: received {min(received[:slow])}-{max(received[:slow])}, dropped "
+              f"{min(lost[:slow])}-{max(lost[:slow])} each (received + dropped = "
+              f"{'all' if all(received[i] + lost[i] == args.events for i in range(slow)) else 'MISMATCH'}), "
+              f"buffer high water {max(high_water[:slow])}")
+    print(f"  hub: {hub.stats()}")
+
+
+# --- end to end -------------------------------------------------------------
+
+def seed(db_path: str) -> tuple[str, str]:
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    from models import create_tables, SessionLocal, User, Resume
+    create_tables()
+    db = SessionLocal()
+    try:
+        user = User(email="live@example.com")
+        db.add(user)
+        db.flush()
+        resume = Resume(user_id=user.id, original_filename="live.pdf")
+        db.add(resume)
+        db.commit()
+        return resume.id, resume.tracking_token
+    finally:
+        db.close()
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(300):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+async def stream(resume_id: str, ready: list, arrivals: dict, stop: asyncio.Event):
+    reader, writer = await asyncio.open_connection(HOST, APP_PORT)
+    writer.write(f"GET /api/spyglass/live/{resume_id} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode())
+    seen, tail = {}, b""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+        if not head.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(head.split(b"\r\n", 1)[0].decode())
+        await reader.readuntil(b"event: ready")
+        ready.append(1)
+        while not stop.is_set():
+            try:
+                data = await asyncio.wait_for(reader.read(65536), 0.5)
+            except asyncio.TimeoutError:
+                continue
+            if not data:
+                break
+            now = time.perf_counter()
+            tail += data
+            for match in re.finditer(rb"live-bench-(\d+)", tail):
+                seen.setdefault(int(match.group(1)), now)
+            tail = tail[-64:]
+    finally:
+        writer.close()
+        arrivals[id(seen)] = seen
+
+
+async def end_to_end(args):
+    db_path = os.path.join(tempfile.mkdtemp(), "live.db")
+    resume_id, token = seed(db_path)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", SPYGLASS_GEO_HTTP_FALLBACK="0", GEO_DB_PATH="")
+    app = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(APP_PORT),
+                            "--log-level", "warning", "--no-access-log"], cwd=ROOT, env=env,
+                           stdout=subprocess.DEVNULL)
+    try:
+        await wait_up(f"http://{HOST}:{APP_PORT}/")
+        ready, arrivals, stop = [], {}, asyncio.Event()
+        t = time.perf_counter()
+        streams = []
+        for _ in range(args.subscribers):
+            streams.append(asyncio.create_task(stream(resume_id, ready, arrivals, stop)))
+            await asyncio.sleep(0)
+        while len(ready) < args.subscribers:
+            if any(s.done() for s in streams):
+                raise RuntimeError(next(s for s in streams if s.done()).exception())
+            await asyncio.sleep(0.05)
+        print(f"end to end: {args.subscribers} SSE streams open in {time.perf_counter() - t:.1f} s")
+
+        sent = {}
+        async with httpx.AsyncClient(base_url=f"http://{HOST}:{APP_PORT}") as c:
+            for n in range(args.events):
+                sent[n] = time.perf_counter()
+                await c.get(f"/api/track/{token}/pixel.gif",
+                            headers={"User-Agent": f"live-bench-{n}", "X-Forwarded-For": "198.51.100.7"})
+                await asyncio.sleep(max(0.0, sent[n] + 1 / args.rate - time.perf_counter()))
+            await asyncio.sleep(args.drain)
+            stats = (await c.get("/api/cache/stats")).json()["spyglass"]
+            stop.set()
+            await asyncio.gather(*streams, return_exceptions=True)
+
+        latencies = [(at - sent[n]) * 1000 for seen in arrivals.values() for n, at in seen.items() if n in sent]
+        counts = [len(seen) for seen in arrivals.values()]
+        print(f"  {args.events} pixel hits at {args.rate:g}/s: each stream received {min(counts)}-{max(counts)}; "
+              f"{len(latencies)} deliveries, pixel -> SSE p50 {pct(latencies, .5):.0f} ms  "
+              f"p99 {pct(latencies, .99):.0f} ms  max {max(latencies):.0f} ms")
+        print(f"  pipeline: written {stats['written']} in {stats['batches']} batches; hub: {stats['live']}")
+
+        from models import SessionLocal
+        from spyglass_agent import get_tracking_stats
+        db = SessionLocal()
+        try:
+            get_tracking_stats(db, resume_id)
+            t = time.perf_counter()
+            for _ in range(20):
+                get_tracking_stats(db, resume_id)
+            stats_ms = (time.perf_counter() - t) / 20 * 1000
+        finally:
+            db.close()
+        polls = args.subscribers / args.poll_interval
+        print(f"  polling instead: {args.subscribers} dashboards every {args.poll_interval:g} s = {polls:.0f} "
+              f"get_tracking_stats/s x {stats_ms:.1f} ms = {polls * stats_ms:.0f} ms of DB work per second")
+    finally:
+        app.terminate()
+        app.wait()
+
+
+async def main(args):
+    await in_process(args)
+    if not args.in_process_only:
+        await end_to_end(args)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--subscribers", type=int, default=1000)
+    ap.add_argument("--events", type=int, default=400)
+    ap.add_argument("--rate", type=float, default=50)
+    ap.add_argument("--slow", type=float, default=0.1, help="fraction of in-process subscribers that stall")
+    ap.add_argument("--stall", type=float, default=8.0)
+    ap.add_argument("--drain", type=float, default=2.0)
+    ap.add_argument("--poll-interval", type=float, default=5.0)
+    ap.add_argument("--in-process-only", action="store_true")
+    asyncio.run(main(ap.parse_args()))
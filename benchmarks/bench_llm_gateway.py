@@ -0,0 +1,92 @@
+"""
+Exercise the LLM gateway against the local fake OpenAI server.
+
+    python benchmarks/bench_llm_gateway.py [--calls 300] [--rpm 1200] [--error-rate 0.1]
+
+Fires a mixed burst of interactive / pipeline / batch calls (plus a few
+streams) and reports per-class latency, retries and the gateway stats.
+Interactive calls should finish well ahead of batch ones once the
+request bucket is contended.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+import statistics
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(100):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+async def main(args):
+    env = dict(os.environ, FAKE_LLM_ERROR_RATE=str(args.error_rate))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    os.environ.update(OPENAI_BASE_URL="http://127.0.0.1:8011/v1", OPENAI_API_KEY="sk-fake",
+                      LLM_RPM=str(args.rpm))
+    from llm_gateway import LLMGateway
+    gateway = LLMGateway(rpm=args.rpm, max_concurrency=args.concurrency)
+    try:
+        await wait_up("http://127.0.0.1:8011/stats")
+        lat = {"orchestrator": [], "ats": [], "ghostwriter": []}
+        failures = 0
+
+        async def one(agent):
+            nonlocal failures
+            t = time.perf_counter()
+            try:
+                await gateway.chat(agent=agent, model="gpt-4o", messages=[{"role": "user", "content": "hi " * 200}])
+            except Exception:
+                failures += 1
+                return
+            lat[agent].append((time.perf_counter() - t) * 1000)
+
+        async def streamer():
+            tokens = 0
+            async for chunk in gateway.stream_chat(agent="chat", model="gpt-4o",
+                                                   messages=[{"role": "user", "content": "stream"}]):
+                tokens += bool(chunk.choices and chunk.choices[0].delta.content)
+            return tokens
+
+        agents = ["ghostwriter", "ats", "orchestrator"]
+        started = time.perf_counter()
+        jobs = [one(agents[i % 3]) for i in range(args.calls)] + [streamer() for _ in range(5)]
+        await asyncio.gather(*jobs)
+        wall = time.perf_counter() - started
+
+        for agent, samples in lat.items():
+            if samples:
+                print(f"{agent:>12}: n={len(samples):4d} p50={statistics.median(samples):8.1f}ms "
+                      f"max={max(samples):8.1f}ms")
+        print(f"wall={wall:.2f}s failures={failures}")
+        print("gateway:", gateway.stats())
+        async with httpx.AsyncClient() as c:
+            print("server:", (await c.get("http://127.0.0.1:8011/stats")).json())
+    finally:
+        await gateway.aclose()
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=300)
+    ap.add_argument("--rpm", type=float, default=1200)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--error-rate", type=float, default=0.1)
+    asyncio.run(main(ap.parse_args()))
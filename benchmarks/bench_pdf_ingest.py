@@ -0,0 +1,105 @@
+"""
+Peak memory and wall time of PDF ingestion for 1, 10 and 100-page inputs.
+
+    python benchmarks/bench_pdf_ingest.py
+
+"legacy"    = the original handler: whole upload in memory, BytesIO, `+=` per page.
+"streaming" = spool in 64 KiB chunks to a temp file, mmap, per-page generator, one join.
+
+Each measurement runs in a fresh subprocess so ru_maxrss is not polluted by
+earlier runs; tracemalloc peak is reported alongside (Python heap only).
+"""
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class _FakeUpload:
+    """Just enough of starlette's UploadFile for spool_upload()."""
+
+    def __init__(self, path):
+        self._f = open(path, "rb")
+
+    async def read(self, n=-1):
+        return self._f.read(n)
+
+
+def legacy(path):
+    from pypdf import PdfReader
+    with open(path, "rb") as f:
+        contents = f.read()
+    reader = PdfReader(io.BytesIO(contents))
+    resume_text = ""
+    for page in reader.pages:
+        resume_text += page.extract_text() or ""
+    return resume_text, None
+
+
+def streaming(path):
+    from pdf_extractor import spool_upload, iter_page_text
+    spooled, _ = asyncio.run(spool_upload(_FakeUpload(path)))
+    try:
+        started = time.perf_counter()
+        first_page_ms = None
+        parts = []
+        for text in iter_page_text(spooled):
+            if first_page_ms is None:
+                first_page_ms = (time.perf_counter() - started) * 1000
+            parts.append(text)
+        return "".join(parts), first_page_ms
+    finally:
+        os.unlink(spooled)
+
+
+def run_one(mode, path):
+    import pypdf  # noqa: F401 — keep import cost out of the numbers
+    import pdf_extractor  # noqa: F401
+    fn = {"legacy": legacy, "streaming": streaming}[mode]
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t = time.perf_counter()
+    text, first_ms = fn(path)
+    wall = (time.perf_counter() - t) * 1000
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()  # second pass: heap peak (tracemalloc distorts timings)
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    print(json.dumps({
+        "wall_ms": wall, "first_page_ms": first_ms, "py_peak_kib": peak / 1024,
+        "rss_growth_kib": rss - base_rss, "chars": len(text),
+    }))
+
+
+def main():
+    from benchmarks.pdfgen import make_pdf
+    print(f"{'pages':>5} {'mode':>10} {'size':>9} {'wall ms':>9} {'1st page':>9} {'py peak':>10} {'rss +':>10}")
+    for pages in (1, 10, 100):
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(make_pdf(pages, lines_per_page=60))
+        try:
+            size = os.path.getsize(f.name)
+            for mode in ("legacy", "streaming"):
+                out = subprocess.run([sys.executable, __file__, "--one", mode, f.name],
+                                     capture_output=True, text=True, cwd=ROOT, check=True)
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                first = f"{r['first_page_ms']:.1f}" if r["first_page_ms"] is not None else "-"
+                print(f"{pages:>5} {mode:>10} {size / 1024:>7.0f}Ki {r['wall_ms']:>9.1f} {first:>9} "
+                      f"{r['py_peak_kib']:>8.0f}Ki {r['rss_growth_kib']:>8.0f}Ki")
+        finally:
+            os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--one":
+        run_one(sys.argv[2], sys.argv[3])
+    else:
+        main()
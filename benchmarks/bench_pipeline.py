@@ -0,0 +1,66 @@
+"""
+End-to-end timing of run_full_optimization_pipeline against the fake
+OpenAI server, with the per-node trace.
+
+    python benchmarks/bench_pipeline.py [--tool-latency 0.5]
+
+Each tool call takes --tool-latency seconds, so a sequential pipeline
+(ATS, then ghostwriter's two calls, then interviewer) costs ~4x that;
+the DAG should land near 2x (ATS + slowest branch).
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(100):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+async def main(args):
+    env = dict(os.environ, FAKE_LLM_TOOL_LATENCY=str(args.tool_latency))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    os.environ.update(OPENAI_BASE_URL="http://127.0.0.1:8011/v1", OPENAI_API_KEY="sk-fake",
+                      ATS_CACHE_DISABLED="1")
+    from benchmarks.fixtures import SAMPLE_RESUME_TEXT, SAMPLE_JD
+    from agent_orchestrator import run_full_optimization_pipeline
+    try:
+        await wait_up("http://127.0.0.1:8011/stats")
+        t = time.perf_counter()
+        result = await run_full_optimization_pipeline(
+            SAMPLE_RESUME_TEXT, SAMPLE_JD, "bench-user", "http://localhost:8000", "tok",
+            output_dir="/tmp/resumegod_bench",
+        )
+        wall = (time.perf_counter() - t) * 1000
+        print(f"status={result['status']} wall={wall:.0f}ms "
+              f"(sequential estimate {4 * args.tool_latency * 1000:.0f}ms)")
+        for span in result["trace"]:
+            print(f"  {span['node']:>12} {span['status']:>8} "
+                  f"start={span.get('start_ms', 0):8.1f}ms dur={span.get('duration_ms', 0):8.1f}ms")
+        for node, err in result["errors"].items():
+            print(f"  ! {node}: {err[:100]}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tool-latency", type=float, default=0.5)
+    asyncio.run(main(ap.parse_args()))
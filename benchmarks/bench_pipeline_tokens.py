@@ -0,0 +1,112 @@
+"""
+Prompt tokens per full pipeline run: raw resume text to every agent vs. the
+parsed resume (resume_parser) with per-agent slices.
+
+    python benchmarks/bench_pipeline_tokens.py [--roles 8]
+
+Runs run_full_optimization_pipeline against the fake OpenAI server for the
+fixture resume and a longer multi-page one, once with parsed=None and once
+with the parsed artifact. Prompt sizes per tool call are read back from the
+server (~4 chars/token). Prompt budgets (prompt_budget) are on in both runs.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import SAMPLE_RESUME_TEXT, SAMPLE_JD  # noqa: E402
+
+TOOLS = {
+    "produce_optimized_resume": "ats",
+    "generate_killer_questions": "interviewer",
+    "create_linkedin_content": "ghostwriter",
+    "recommend_courses": "affiliate",
+}
+
+
+def multi_page_resume(roles: int) -> str:
+    """The fixture resume with extra older roles, a summary, certifications and interests."""
+    head, _, rest = SAMPLE_RESUME_TEXT.partition("EDUCATION")
+    education, _, rest = rest.partition("EXPERIENCE")
+    experience, _, rest = rest.partition("PROJECTS")
+    older = "".join(
+        f"\nContoso {i} - Software Engineer - {2017 - i} - {2018 - i} - Remote\n"
+        + "".join(f"- Shipped feature {j} for the Contoso {i} billing platform, improving conversion by {j + 3}%\n"
+                  for j in range(5))
+        for i in range(roles)
+    )
+    return (head + "SUMMARY\nBackend engineer with 8 years building payment systems at scale.\n\n"
+            + "EXPERIENCE" + experience.rstrip("\n") + "\n" + older
+            + "\nPROJECTS" + rest
+            + "\nEDUCATION" + education
+            + "CERTIFICATIONS\nAWS Certified Solutions Architect - Associate, 2020\nCKA, 2021\n"
+            + "\nINTERESTS\nRock climbing, chess, sourdough, marathon running, film photography\n")
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(100):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+async def run_once(resume_text: str, parsed) -> dict:
+    from agent_orchestrator import run_full_optimization_pipeline
+    async with httpx.AsyncClient() as c:
+        before = (await c.get("http://127.0.0.1:8011/stats")).json()["prompt_chars_by_tool"]
+        result = await run_full_optimization_pipeline(
+            resume_text, SAMPLE_JD, "bench-user", "http://localhost:8000", "tok",
+            output_dir="/tmp/resumegod_bench", parsed=parsed,
+        )
+        after = (await c.get("http://127.0.0.1:8011/stats")).json()["prompt_chars_by_tool"]
+    failed = {node: err for node, err in result["errors"].items() if node != "latex"}  # pdflatex is optional here
+    if failed:
+        raise RuntimeError(f"pipeline nodes failed: {failed}")
+    return {TOOLS.get(t, t): (after[t] - before.get(t, 0)) // 4 for t in after}
+
+
+async def main(args):
+    env = dict(os.environ, FAKE_LLM_TOOL_LATENCY="0.01", FAKE_LLM_LATENCY="0.01")
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    os.environ.update(OPENAI_BASE_URL="http://127.0.0.1:8011/v1", OPENAI_API_KEY="sk-fake",
+                      ATS_CACHE_DISABLED="1")
+    from resume_parser import parse_resume
+    try:
+        await wait_up("http://127.0.0.1:8011/stats")
+        for label, text in (("fixture", SAMPLE_RESUME_TEXT), (f"+{args.roles} roles", multi_page_resume(args.roles))):
+            t = time.perf_counter()
+            parsed = parse_resume(text)
+            parse_ms = (time.perf_counter() - t) * 1000
+            raw = await run_once(text, None)
+            sliced = await run_once(text, parsed)
+            print(f"{label}: {len(text)} chars, parsed in {parse_ms:.1f} ms "
+                  f"({len(parsed['experience'])} roles, "
+                  f"{sum(len(e['bullets']) for e in parsed['experience'])} bullets)")
+            print(f"  {'agent':>12} {'raw':>7} {'parsed':>7} {'saved':>6}")
+            for agent in raw:
+                print(f"  {agent:>12} {raw[agent]:>7} {sliced[agent]:>7} "
+                      f"{100 * (1 - sliced[agent] / raw[agent]):5.0f}%")
+            total_raw, total_sliced = sum(raw.values()), sum(sliced.values())
+            print(f"  {'total':>12} {total_raw:>7} {total_sliced:>7} "
+                  f"{100 * (1 - total_sliced / total_raw):5.0f}%")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--roles", type=int, default=8)
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,126 @@
+"""
+Prompt tokens and latency per agent, raw vs. budgeted prompts, over a small
+fixture corpus of long, PDF-shaped resumes and boilerplate-heavy JDs.
+
+    python benchmarks/bench_prompt_budget.py [--prefill-tps 4000]
+
+Runs the ATS, Interviewer, Ghostwriter and Affiliate calls against the fake
+OpenAI server, which charges prompt_tokens / --prefill-tps seconds per call,
+once with prompt_budget disabled and once enabled. Prompt sizes are read
+back from the server, so they are exactly what was sent.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import SAMPLE_RESUME_TEXT, SAMPLE_JD, SAMPLE_RESUME_DATA, SAMPLE_GAP_ANALYSIS  # noqa: E402
+
+JD_BOILERPLATE = """
+About us: we are a fast-growing company on a mission to move money for everyone.
+Benefits include: competitive salary, equity, health, dental and vision, 401(k) match, unlimited PTO.
+We offer a hybrid work model and a yearly learning budget.
+We are an equal opportunity employer. All qualified applicants will receive consideration without regard
+to race, color, religion, sex, sexual orientation, gender identity, national origin, disability or veteran status.
+If you need a reasonable accommodation during the application process, contact us.
+"""
+
+
+def long_resume(roles: int) -> str:
+    """The sample resume as a multi-page PDF extraction: extra roles, page footers,
+    a running header, odd bullets and spacing."""
+    head, _, rest = SAMPLE_RESUME_TEXT.partition("EXPERIENCE")
+    pages = [head + "EXPERIENCE" + rest.split("EDUCATION")[0]]
+    for i in range(roles):
+        pages.append(
+            f"Contoso {i}  -  Software Engineer  -  {2010 - i} - {2011 - i}  -  Remote\n"
+            + "".join(f"•   Shipped feature {j} for the billing   platform, improving conversion by {j + 3}%\n"
+                      for j in range(5))
+        )
+    pages.append("EDUCATION" + SAMPLE_RESUME_TEXT.split("EDUCATION", 1)[1])
+    pages.append("INTERESTS\nRock climbing, chess, sourdough, marathon running, film photography\n")
+    out = []
+    for n, page in enumerate(pages, start=1):
+        out.append("Jordan Rivera — Resume\n" + page + f"\nPage {n} of {len(pages)}\n")
+    return "\n\n".join(out)
+
+
+CORPUS = [
+    (SAMPLE_RESUME_TEXT, SAMPLE_JD),
+    (long_resume(6), SAMPLE_JD + JD_BOILERPLATE),
+    (long_resume(20), (SAMPLE_JD + JD_BOILERPLATE) * 2),
+    (long_resume(60), (SAMPLE_JD + JD_BOILERPLATE) * 3),
+]
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(100):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+async def run_corpus(enabled: bool) -> tuple[dict, dict]:
+    import prompt_budget
+    from ats_agent import analyze_and_optimize
+    from interview_agent import generate_interview_questions
+    from ghostwriter_agent import generate_linkedin_post, generate_affiliate_recommendations
+    prompt_budget.ENABLED = enabled
+
+    resume_data = dict(SAMPLE_RESUME_DATA, experience=SAMPLE_RESUME_DATA["experience"] * 8)
+    calls = {
+        "ats": lambda r, jd: analyze_and_optimize(r, jd, use_cache=False),
+        "interviewer": lambda r, jd: generate_interview_questions(r, jd, SAMPLE_GAP_ANALYSIS),
+        "ghostwriter": lambda r, jd: generate_linkedin_post(resume_data, jd),
+        "affiliate": lambda r, jd: generate_affiliate_recommendations(SAMPLE_GAP_ANALYSIS),
+    }
+    chars, wall = {}, {}
+    async with httpx.AsyncClient() as c:
+        for agent, call in calls.items():
+            before = (await c.get("http://127.0.0.1:8011/stats")).json()["prompt_chars"]
+            t = time.perf_counter()
+            for resume, jd in CORPUS:
+                await call(resume, jd)
+            wall[agent] = (time.perf_counter() - t) * 1000
+            chars[agent] = (await c.get("http://127.0.0.1:8011/stats")).json()["prompt_chars"] - before
+    return chars, wall
+
+
+async def main(args):
+    env = dict(os.environ, FAKE_LLM_PREFILL_TPS=str(args.prefill_tps), FAKE_LLM_LATENCY="0.01")
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    os.environ.update(OPENAI_BASE_URL="http://127.0.0.1:8011/v1", OPENAI_API_KEY="sk-fake")
+    try:
+        await wait_up("http://127.0.0.1:8011/stats")
+        raw_chars, raw_wall = await run_corpus(enabled=False)
+        fit_chars, fit_wall = await run_corpus(enabled=True)
+        import prompt_budget
+        print(f"corpus: {len(CORPUS)} resume/JD pairs, tokenizer={prompt_budget.stats()['tokenizer']}, "
+              f"prefill {args.prefill_tps:.0f} tok/s")
+        print(f"{'agent':>12} {'tokens raw':>11} {'tokens fit':>11} {'saved':>6} {'ms raw':>8} {'ms fit':>8}")
+        for agent in raw_chars:
+            raw_t, fit_t = raw_chars[agent] // 4, fit_chars[agent] // 4
+            print(f"{agent:>12} {raw_t:>11} {fit_t:>11} {100 * (1 - fit_t / raw_t):5.0f}% "
+                  f"{raw_wall[agent]:8.0f} {fit_wall[agent]:8.0f}")
+        print("budget stats:", prompt_budget.stats()["agents"])
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--prefill-tps", type=float, default=4000)
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,92 @@
+"""
+Question bank lookups: exact repeats, near-duplicates and misses.
+
+    python benchmarks/bench_question_bank.py [--entries 5000] [--lookups 500]
+
+Fills a throwaway SQLite bank with --entries synthetic resume/JD pairs,
+loads it the way a worker does at startup, then times question_bank.lookup
+for repeated pairs, lightly edited pairs (a bullet reworded, a skill
+dropped, a line appended to the JD) and unseen pairs. The alternative to a
+hit is a full gpt-4o generate_killer_questions call (seconds).
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_question_bank.db"
+
+from models import create_tables, SessionLocal, QuestionBankEntry  # noqa: E402
+from question_bank import QuestionBank, signature, resume_fingerprint, jd_fingerprint  # noqa: E402
+from ats_scorer import SKILL_SYNONYMS  # noqa: E402
+from benchmarks.fixtures import SAMPLE_RESUME_TEXT, SAMPLE_QUESTIONS  # noqa: E402
+from benchmarks.bench_jd_match import synthetic_jds  # noqa: E402
+
+
+def resume_variant(rng: random.Random, i: int) -> str:
+    skills = rng.sample(list(SKILL_SYNONYMS), 6)
+    return SAMPLE_RESUME_TEXT.replace("Jordan Rivera", f"Candidate {i}") + (
+        f"Other: {', '.join(skills)}\n"
+        f"- Owned the {skills[0]} and {skills[1]} migration for team {i}\n"
+    )
+
+
+def edit(rng: random.Random, resume: str, jd: str) -> tuple[str, str]:
+    lines = resume.splitlines()
+    bullet = rng.choice([n for n, line in enumerate(lines) if line.startswith("- ")])
+    lines[bullet] = lines[bullet].replace("Built", "Designed and built").replace("Led", "Managed")
+    return "\n".join(lines), jd + "\nApply now - we are hiring across time zones."
+
+
+def pct(values, p):
+    return sorted(values)[min(int(len(values) * p), len(values) - 1)]
+
+
+def main(args):
+    rng = random.Random(3)
+    create_tables()
+    jds = [jd["text"] for jd in synthetic_jds(args.entries + args.lookups, seed=11)]
+    pairs = [(resume_variant(rng, i), jds[i]) for i in range(args.entries)]
+
+    t = time.perf_counter()
+    db = SessionLocal()
+    db.add_all(QuestionBankEntry(signature=signature(r, jd, 5), resume_fingerprint=resume_fingerprint(r),
+                                 jd_fingerprint=jd_fingerprint(jd), questions=SAMPLE_QUESTIONS, served_count=0)
+               for r, jd in pairs)
+    db.commit()
+    db.close()
+    fill_s = time.perf_counter() - t
+
+    bank = QuestionBank(capacity=args.entries)
+    t = time.perf_counter()
+    bank.sync(force=True)
+    load_ms = (time.perf_counter() - t) * 1000
+
+    workloads = {
+        "exact": [rng.choice(pairs) for _ in range(args.lookups)],
+        "near": [edit(rng, *rng.choice(pairs)) for _ in range(args.lookups)],
+        "miss": [(resume_variant(rng, args.entries + i), jds[args.entries + i]) for i in range(args.lookups)],
+    }
+    print(f"{len(bank)} entries (fingerprinted + inserted in {fill_s:.1f} s, loaded in {load_ms:.0f} ms)")
+    for name, queries in workloads.items():
+        times, outcomes = [], {"exact": 0, "near": 0, "miss": 0}
+        for resume, jd in queries:
+            t = time.perf_counter()
+            hit = bank.lookup(resume, jd, 5)
+            times.append((time.perf_counter() - t) * 1000)
+            outcomes[hit["match"] if hit else "miss"] += 1
+        print(f"{name:>6}: p50 {statistics.median(times):5.2f} ms  p99 {pct(times, 0.99):5.2f} ms  "
+              f"→ exact {outcomes['exact']}, near {outcomes['near']}, miss {outcomes['miss']}")
+    print("stats:", bank.stats())
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=5000)
+    ap.add_argument("--lookups", type=int, default=500)
+    main(ap.parse_args())
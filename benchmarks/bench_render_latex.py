@@ -0,0 +1,91 @@
+"""
+render_latex throughput on a large resume, before vs. after.
+
+    python benchmarks/bench_render_latex.py [--seconds 2] [--jobs 40]
+
+before = the original path: from_string() on every call, then a recursive
+         escape_dict() running nine str.replace passes over every string.
+after  = ats_agent.render_latex: template compiled once at import, values
+         escaped in one str.translate pass as they are emitted (finalize).
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+from jinja2 import Environment, BaseLoader  # noqa: E402
+
+from ats_agent import render_latex, JAKES_RESUME_TEMPLATE  # noqa: E402
+from benchmarks.fixtures import SAMPLE_RESUME_DATA  # noqa: E402
+
+LEGACY_ENV = Environment(
+    loader=BaseLoader(),
+    variable_start_string="<<", variable_end_string=">>",
+    block_start_string="<%", block_end_string="%>",
+    comment_start_string="<#", comment_end_string="#>",
+)
+
+
+def legacy_render_latex(resume_data: dict, tracking_url: str = "") -> str:
+    template = LEGACY_ENV.from_string(JAKES_RESUME_TEMPLATE)
+
+    def escape_latex(s):
+        if not isinstance(s, str):
+            return s
+        for old, new in [("&", r"\&"), ("%", r"\%"), ("$", r"\$"), ("#", r"\#"), ("_", r"\_"),
+                         ("{", r"\{"), ("}", r"\}"), ("~", r"\textasciitilde{}"), ("^", r"\textasciicircum{}")]:
+            s = s.replace(old, new)
+        return s
+
+    def escape_dict(obj):
+        if isinstance(obj, str):
+            return escape_latex(obj)
+        if isinstance(obj, list):
+            return [escape_dict(i) for i in obj]
+        if isinstance(obj, dict):
+            return {k: escape_dict(v) for k, v in obj.items()}
+        return obj
+
+    return template.render(**escape_dict(resume_data), tracking_url=tracking_url)
+
+
+def large_resume(jobs: int) -> dict:
+    data = dict(SAMPLE_RESUME_DATA)
+    base = SAMPLE_RESUME_DATA["experience"][0]
+    data["experience"] = [
+        {**base, "company": f"{base['company']} #{i}",
+         "bullets": [f"Cut p99 latency 40% & saved $12k/mo on svc_{i}_{j} (~{j}% of ^traffic)"
+                     for j in range(8)]}
+        for i in range(jobs)
+    ]
+    return data
+
+
+def throughput(fn, data, seconds: float) -> float:
+    fn(data)  # warm
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        fn(data)
+        n += 1
+    return n / (time.perf_counter() - t0)
+
+
+def main(args):
+    data = large_resume(args.jobs)
+    assert legacy_render_latex(data) == render_latex(data), "outputs diverge on backslash-free input"
+    before = throughput(legacy_render_latex, data, args.seconds)
+    after = throughput(render_latex, data, args.seconds)
+    print(f"resume: {args.jobs} jobs x 8 bullets, {len(render_latex(data)) / 1024:.0f} KiB of LaTeX")
+    print(f"before: {before:8.0f} renders/s")
+    print(f"after:  {after:8.0f} renders/s   ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=2.0)
+    ap.add_argument("--jobs", type=int, default=40)
+    main(ap.parse_args())
@@ -0,0 +1,190 @@
+"""
+Load test for the Spyglass tracking pixel (/api/track/{token}/pixel.gif).
+
+    python benchmarks/bench_spyglass_pixel.py [--rate 5000] [--seconds 10] [--conns 64] [--geo-ms 20] [--baseline]
+
+Starts a stub geolocation service (ipinfo.io-shaped JSON after --geo-ms)
+and the app (uvicorn, throwaway SQLite DB seeded with --resumes resumes),
+then fires pixel requests at --rate req/s for --seconds over --conns
+keep-alive connections, from --ips distinct client IPs (X-Forwarded-For,
+skewed so a few IPs account for most views, as recruiters re-open a
+resume). The load generator speaks raw HTTP/1.1 on asyncio sockets so the
+client costs as little CPU as possible.
+
+With --baseline, GET / (no work at all) is loaded first at the same rate,
+to separate the pixel's own cost from the server and client overhead.
+
+Reported: pixel latency p50/p99/max as seen by the client, achieved rate,
+and after the app drains: rows in tracking_logs vs. pixels served, INSERT
+batches, dropped events and geo cache hit rate (from /api/cache/stats),
+plus how many lookups reached the stub.
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+from fastapi import FastAPI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HOST = "127.0.0.1"
+APP_PORT = 8012
+GEO_PORT = 8013
+PIXEL_PATH = "/api/track/{token}/pixel.gif"
+
+# --- stub geolocation service ----------------------------------------------
+
+geo_stub = FastAPI()
+geo_calls = 0
+
+
+@geo_stub.get("/{ip}/json")
+async def stub_lookup(ip: str):
+    global geo_calls
+    geo_calls += 1
+    await asyncio.sleep(float(os.getenv("STUB_GEO_MS", "20")) / 1000)
+    last = int(ip.rsplit(".", 1)[-1])
+    return {"ip": ip, "city": f"City {last % 50}", "region": "Region", "country": ["US", "IN", "DE", "GB"][last % 4],
+            "loc": "37.7749,-122.4194", "org": f"AS{15169 + last % 20} Company {last % 20} LLC"}
+
+
+@geo_stub.get("/calls")
+async def stub_calls():
+    return {"calls": geo_calls}
+
+
+# --- load generator ---------------------------------------------------------
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] if values else float("nan")
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(300):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+def seed(db_path: str, count: int) -> list[str]:
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    from models import create_tables, SessionLocal, User, Resume
+    create_tables()
+    db = SessionLocal()
+    try:
+        user = User(email="pixel@example.com")
+        db.add(user)
+        db.flush()
+        resumes = [Resume(user_id=user.id, original_filename=f"r{i}.pdf") for i in range(count)]
+        db.add_all(resumes)
+        db.commit()
+        return [r.tracking_token for r in resumes]
+    finally:
+        db.close()
+
+
+async def connection(i: int, path: str, rate: float, conns: int, tokens: list[str], ips: list[str],
+                     deadline: float, latencies: list, errors: list):
+    rng = random.Random(i)
+    interval = conns / rate
+    reader, writer = await asyncio.open_connection(HOST, APP_PORT)
+    next_at = time.perf_counter() + rng.uniform(0, interval)
+    try:
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            if next_at > now:
+                await asyncio.sleep(next_at - now)
+            next_at = max(next_at + interval, time.perf_counter() - interval)
+            token = rng.choice(tokens)
+            ip = ips[min(int(rng.paretovariate(1.2)) - 1, len(ips) - 1)]
+            request = (f"GET {path.format(token=token)} HTTP/1.1\r\nHost: {HOST}\r\n"
+                       f"User-Agent: Mozilla/5.0 (load {i})\r\nX-Forwarded-For: {ip}\r\n\r\n").encode()
+            sent = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = next(int(line.split(b":", 1)[1]) for line in head.split(b"\r\n")
+                          if line.lower().startswith(b"content-length"))
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - sent) * 1000)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0].decode())
+    finally:
+        writer.close()
+
+
+async def main(args):
+    db_path = os.path.join(tempfile.mkdtemp(), "pixel.db")
+    tokens = seed(db_path, args.resumes)
+    ips = [f"198.51.{i // 250}.{i % 250 + 1}" for i in range(args.ips)]
+    geo = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.bench_spyglass_pixel:geo_stub",
+                            "--port", str(GEO_PORT), "--log-level", "warning"], cwd=ROOT,
+                           env=dict(os.environ, STUB_GEO_MS=str(args.geo_ms)))
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}",
+               SPYGLASS_GEO_URL=f"http://{HOST}:{GEO_PORT}/{{ip}}/json")
+    app = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", HOST, "--port", str(APP_PORT),
+                            "--log-level", "warning", "--no-access-log"], cwd=ROOT, env=env,
+                           stdout=subprocess.DEVNULL)
+    try:
+        await wait_up(f"http://{HOST}:{GEO_PORT}/calls")
+        await wait_up(f"http://{HOST}:{APP_PORT}/")
+        async def load(path: str, rate: float, seconds: float, conns: int):
+            latencies, errors = [], []
+            started = time.perf_counter()
+            await asyncio.gather(*(connection(c, path, rate, conns, tokens, ips, started + seconds, latencies, errors)
+                                   for c in range(conns)))
+            return latencies, errors, time.perf_counter() - started
+
+        print(f"target {args.rate:g} req/s for {args.seconds:g} s over {args.conns} connections, {args.ips} client IPs, "
+              f"geo stub {args.geo_ms:g} ms, {os.cpu_count()} CPU")
+        warm = (await load(PIXEL_PATH, 500, 1, 8))[0]  # connections, routing, the tracker cache
+        paths = [("GET / (baseline)", "/")] if args.baseline else []
+        for label, path in paths + [("pixel", PIXEL_PATH)]:
+            latencies, errors, wall = await load(path, args.rate, args.seconds, args.conns)
+            print(f"{label:>16}: {len(latencies) / wall:5.0f} req/s ({len(errors)} non-200)  "
+                  f"p50 {pct(latencies, .5):6.2f} ms  p99 {pct(latencies, .99):6.2f} ms  max {max(latencies):6.1f} ms")
+        await asyncio.sleep(args.flush_wait)
+        async with httpx.AsyncClient() as c:
+            spyglass = (await c.get(f"http://{HOST}:{APP_PORT}/api/cache/stats")).json()["spyglass"]
+            geo_calls = (await c.get(f"http://{HOST}:{GEO_PORT}/calls")).json()["calls"]
+        with sqlite3.connect(db_path) as db:
+            rows = db.execute("SELECT count(*) FROM tracking_logs").fetchone()[0]
+            located = db.execute("SELECT count(*) FROM tracking_logs WHERE company_hint LIKE 'Company %'").fetchone()[0]
+        served = len(latencies) + len(warm)
+        print(f"persisted {rows}/{served} rows ({located} geolocated) in {spyglass['batches']} batches "
+              f"(avg {spyglass['avg_batch']}), dropped {spyglass['dropped']}, queued {spyglass['queued']}, "
+              f"failed {spyglass['failed']}")
+        geo_cache = spyglass["geo_cache"]
+        print(f"geo cache hit rate {geo_cache['hit_rate']:.1%} ({geo_cache['size']} IPs); "
+              f"{geo_calls} lookups reached the geo service")
+    finally:
+        for proc in (app, geo):
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=float, default=5000)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--conns", type=int, default=64)
+    ap.add_argument("--ips", type=int, default=2000)
+    ap.add_argument("--resumes", type=int, default=200)
+    ap.add_argument("--geo-ms", type=float, default=20)
+    ap.add_argument("--baseline", action="store_true", help="first load GET / the same way, for comparison")
+    ap.add_argument("--flush-wait", type=float, default=2.0)
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,190 @@
+"""
+Spyglass rollups: get_tracking_stats from the rollup tables vs. the SQL
+aggregation over raw TrackingLog rows it replaced, plus what the rollups
+cost to maintain.
+
+    python benchmarks/bench_tracking_rollups.py [--rows 100000] [--other-rows 400000]
+
+In a throwaway SQLite file: seeds --rows raw views (90 days) for one resume
+without rollups and folds them with compact() (compaction throughput), seeds
+--other-rows over --other-resumes resumes through write_events() the way the
+pixel pipeline writes, and times 500-row batches written with and without
+folding. Then checks that both versions of the stats agree (unique viewers:
+HyperLogLog estimate vs. exact COUNT DISTINCT), times them for the hot
+resume and a typical one, runs compaction with the default retention and
+shows the stats are unchanged after the old raw rows are gone, and reports
+HyperLogLog error over a range of cardinalities.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def sql_tracking_stats(db, resume_id: str) -> dict:
+    """get_tracking_stats before the rollups: GROUP BY / COUNT DISTINCT over the raw rows."""
+    from sqlalchemy import func, distinct
+    from models import TrackingLog
+    from spyglass_agent import HIDDEN_COMPANY_HINTS, MAP_POINTS_LIMIT
+    of_resume = TrackingLog.resume_id == resume_id
+    country, day = func.coalesce(TrackingLog.country, "Unknown"), func.date(TrackingLog.viewed_at)
+    total_views, geo_breakdown, timeline_dict = 0, {}, defaultdict(int)
+    for country_name, date, views in db.query(country, day, func.count(TrackingLog.id)).filter(
+            of_resume).group_by(country, day):
+        total_views += views
+        geo_breakdown[country_name] = geo_breakdown.get(country_name, 0) + views
+        timeline_dict[str(date) if date else "Unknown"] += views
+    unique_viewers = db.query(func.count(distinct(TrackingLog.ip_address))).filter(of_resume).scalar()
+    places = db.query(
+        TrackingLog.latitude, TrackingLog.longitude, TrackingLog.city, TrackingLog.company_hint,
+        func.count(TrackingLog.id), func.max(TrackingLog.viewed_at)
+    ).filter(of_resume).group_by(
+        TrackingLog.latitude, TrackingLog.longitude, TrackingLog.city, TrackingLog.company_hint
+    ).all()
+    located = sorted((p for p in places if p[0] and p[1]), key=lambda p: p[4], reverse=True)
+    return {
+        "total_views": total_views, "unique_viewers": unique_viewers, "geo_breakdown": geo_breakdown,
+        "company_hints": list({p[3] for p in places if p[3] and p[3] not in HIDDEN_COMPANY_HINTS}),
+        "timeline": [{"date": d, "views": c} for d, c in sorted(timeline_dict.items())],
+        "map_points": [{"lat": lat, "lng": lng, "city": city, "company": company, "views": views}
+                       for lat, lng, city, company, views, _ in located[:MAP_POINTS_LIMIT]],
+    }
+
+
+def make_rows(rng: random.Random, ips: int):
+    places = [(rng.choice(["US", "IN", "DE", "GB", "FR", "CA", "SG", "BR", None]), f"City {i}",
+               round(rng.uniform(-60, 70), 4), round(rng.uniform(-180, 180), 4)) for i in range(60)]
+    companies = [f"Company {i}" for i in range(40)] + ["Unknown"] * 5 + [None] * 5
+    now = datetime.utcnow()
+
+    def row(resume_id, days=90):
+        country, city, lat, lon = rng.choice(places)
+        return {"resume_id": resume_id, "event_type": "view", "ip_address": f"203.0.{rng.randrange(ips) // 250}."
+                f"{rng.randrange(250)}", "user_agent": "Mozilla/5.0", "country": country, "city": city,
+                "region": "Region", "latitude": lat, "longitude": lon, "referer": None,
+                "company_hint": rng.choice(companies),
+                "viewed_at": now - timedelta(seconds=rng.uniform(0, days * 86400))}
+    return row
+
+
+def timed(fn, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        runs.append((time.perf_counter() - t) * 1000)
+    return result, statistics.median(runs)
+
+
+def compare(old: dict, new: dict) -> object:
+    checks = {
+        "views": old["total_views"] == new["total_views"],
+        "geo": old["geo_breakdown"] == new["geo_breakdown"],
+        "timeline": old["timeline"] == new["timeline"],
+        "companies": set(old["company_hints"]) == set(new["company_hints"]),
+        "map": sorted(p["views"] for p in old["map_points"]) == sorted(p["views"] for p in new["map_points"]),
+    }
+    return all(checks.values()) or [name for name, ok in checks.items() if not ok]
+
+
+def main(args):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'rollups.db')}"
+    from sqlalchemy import insert
+    from models import create_tables, SessionLocal, User, Resume, TrackingLog, TrackingRollup
+    from spyglass_agent import get_tracking_stats
+    from tracking_rollups import write_events, compact, TRACKING_RAW_RETENTION_DAYS
+    from hyperloglog import HyperLogLog
+
+    create_tables()
+    rng = random.Random(5)
+    row = make_rows(rng, args.ips)
+    db = SessionLocal()
+    user = User(email="rollup-bench@example.com")
+    db.add(user)
+    db.flush()
+    resumes = [Resume(user_id=user.id) for _ in range(args.other_resumes + 2)]
+    db.add_all(resumes)
+    db.commit()
+    resume_ids = [r.id for r in resumes]
+    hot, side, others = resume_ids[0], resume_ids[1], resume_ids[2:]
+
+    # Raw history for the hot resume, folded afterwards by compaction
+    for start in range(0, args.rows, 5000):
+        db.execute(insert(TrackingLog), [row(hot) for _ in range(min(5000, args.rows - start))])
+    db.commit()
+    t = time.perf_counter()
+    folded = compact(retention_days=10000)["folded"]
+    elapsed = time.perf_counter() - t
+    print(f"compaction: folded {folded} raw events in {elapsed:.1f} s ({folded / elapsed:,.0f} events/s)")
+
+    # Everyone else through the pipeline's write path
+    t = time.perf_counter()
+    for start in range(0, args.other_rows, 500):
+        write_events([row(rng.choice(others)) for _ in range(min(500, args.other_rows - start))])
+    elapsed = time.perf_counter() - t
+    print(f"write_events: {args.other_rows} events over {len(others)} resumes in {elapsed:.1f} s "
+          f"({args.other_rows / elapsed:,.0f} events/s)")
+
+    # Write cost of a pipeline batch, with and without folding
+    plain, folding = [], []
+    for _ in range(args.batches):
+        batch = [row(side, days=1) for _ in range(500)]
+        t = time.perf_counter()
+        db.execute(insert(TrackingLog), batch)
+        db.commit()
+        plain.append((time.perf_counter() - t) * 1000)
+        batch = [row(side, days=1) for _ in range(500)]
+        t = time.perf_counter()
+        write_events(batch)
+        folding.append((time.perf_counter() - t) * 1000)
+    print(f"500-row batch: insert only {statistics.median(plain):.1f} ms, insert + rollups "
+          f"{statistics.median(folding):.1f} ms (median of {args.batches})")
+    compact(retention_days=10000)
+
+    typical = others[0]
+    print(f"{'':>24} {'raw SQL ms':>11} {'rollups ms':>11} {'agree':>6} {'viewers exact/est':>19}")
+    results = {}
+    for label, resume_id in (("hot resume", hot), ("typical resume", typical)):
+        old, old_ms = timed(lambda: sql_tracking_stats(db, resume_id), args.repeat)
+        new, new_ms = timed(lambda: get_tracking_stats(db, resume_id), args.repeat)
+        results[resume_id] = new
+        print(f"{label + ' (' + str(old['total_views']) + ')':>24} {old_ms:11.1f} {new_ms:11.1f} "
+              f"{str(compare(old, new)):>6} {old['unique_viewers']:>9}/{new['unique_viewers']:<9}")
+    days = db.query(TrackingRollup).filter(TrackingRollup.resume_id == hot, TrackingRollup.period == "day").count()
+    print(f"hot resume: {days} day rollups for {results[hot]['total_views']} views")
+
+    raw_before = db.query(TrackingLog).count()
+    t = time.perf_counter()
+    deleted = compact()["deleted"]
+    print(f"compaction at {TRACKING_RAW_RETENTION_DAYS:g} days: deleted {deleted} of {raw_before} raw events "
+          f"in {time.perf_counter() - t:.1f} s")
+    after = get_tracking_stats(db, hot)
+    same = all(after[k] == results[hot][k] for k in ("total_views", "unique_viewers", "geo_breakdown", "timeline"))
+    print(f"hot resume stats unchanged after deleting raw history: {same}")
+    db.close()
+
+    print("HyperLogLog (precision 12, 4 KB dense):  distinct   estimate   error  bytes")
+    for n in (10, 100, 1000, 10000, 100000, 1000000):
+        sketch = HyperLogLog()
+        sketch.update(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}/{i >> 24}" for i in range(n))
+        estimate = sketch.count()
+        print(f"{n:>49} {estimate:>10} {(estimate - n) / n:+7.2%} {len(sketch.to_bytes()):>6}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100000)
+    ap.add_argument("--other-rows", type=int, default=400000)
+    ap.add_argument("--other-resumes", type=int, default=50)
+    ap.add_argument("--ips", type=int, default=5000)
+    ap.add_argument("--batches", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=3)
+    main(ap.parse_args())
@@ -0,0 +1,188 @@
+"""
+Spyglass analytics at scale: get_tracking_stats with SQL aggregation and
+keyset-paginated events vs. the previous version, which loaded every
+TrackingLog row into ORM objects and aggregated in Python.
+
+    python benchmarks/bench_tracking_stats.py [--rows 100000] [--database-url postgresql://...]
+
+Seeds --rows views for one resume (90 days, --ips viewers, a few dozen
+countries/cities/companies) plus --other-rows spread over --other-resumes
+other resumes, in a throwaway SQLite file unless --database-url points elsewhere
+(tables are created there and the seeded rows deleted afterwards). Checks
+that both versions agree, then reports time (median of --repeat runs) and
+peak Python memory for each, the same for a typical resume (one of the
+others), the event page at increasing depths with
+keyset vs. OFFSET pagination, and the new stats with the
+(resume_id, viewed_at) index dropped.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def legacy_tracking_stats(db, resume_id: str) -> dict:
+    """get_tracking_stats before SQL aggregation (all rows, Python loops, every event returned)."""
+    from models import TrackingLog
+    logs = db.query(TrackingLog).filter(TrackingLog.resume_id == resume_id).all()
+    unique_ips = set(log.ip_address for log in logs)
+    geo_breakdown, company_hints = {}, []
+    for log in logs:
+        country = log.country or "Unknown"
+        geo_breakdown[country] = geo_breakdown.get(country, 0) + 1
+        if log.company_hint and log.company_hint not in ("Unknown", "Local Development"):
+            company_hints.append(log.company_hint)
+    events = [{"id": log.id, "event_type": log.event_type, "ip_address": log.ip_address, "country": log.country,
+               "city": log.city, "company_hint": log.company_hint, "user_agent": log.user_agent,
+               "latitude": log.latitude, "longitude": log.longitude,
+               "viewed_at": log.viewed_at.isoformat() if log.viewed_at else None}
+              for log in sorted(logs, key=lambda x: x.viewed_at, reverse=True)]
+    timeline_dict = defaultdict(int)
+    for log in logs:
+        timeline_dict[log.viewed_at.strftime("%Y-%m-%d") if log.viewed_at else "Unknown"] += 1
+    return {
+        "total_views": len(logs), "unique_viewers": len(unique_ips), "events": events,
+        "geo_breakdown": geo_breakdown, "company_hints": list(set(company_hints)),
+        "timeline": [{"date": d, "views": c} for d, c in sorted(timeline_dict.items())],
+        "map_points": [{"lat": log.latitude, "lng": log.longitude, "city": log.city, "company": log.company_hint,
+                        "time": log.viewed_at.isoformat() if log.viewed_at else None}
+                       for log in logs if log.latitude and log.longitude],
+    }
+
+
+def seed(db, resume_ids: list[str], rows: int, other_rows: int, ips: int, rng: random.Random):
+    from sqlalchemy import insert
+    from models import TrackingLog
+    places = [(rng.choice(["US", "IN", "DE", "GB", "FR", "CA", "SG", "BR", None]), f"City {i}",
+               round(rng.uniform(-60, 70), 4), round(rng.uniform(-180, 180), 4)) for i in range(60)]
+    companies = [f"Company {i}" for i in range(40)] + ["Unknown"] * 5 + [None] * 5
+    now = datetime.utcnow()
+
+    def row(resume_id):
+        country, city, lat, lon = rng.choice(places)
+        return {"resume_id": resume_id, "event_type": "view", "ip_address": f"203.0.{rng.randrange(ips) // 250}."
+                f"{rng.randrange(250)}", "user_agent": "Mozilla/5.0", "country": country, "city": city,
+                "region": "Region", "latitude": lat, "longitude": lon, "referer": None,
+                "company_hint": rng.choice(companies),
+                "viewed_at": now - timedelta(seconds=rng.uniform(0, 90 * 86400))}
+
+    for owner, count in ((resume_ids[0], rows), *((r, other_rows // len(resume_ids[1:])) for r in resume_ids[1:])):
+        for start in range(0, count, 5000):
+            db.execute(insert(TrackingLog), [row(owner) for _ in range(min(5000, count - start))])
+    db.commit()
+
+
+def timed(fn, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        runs.append((time.perf_counter() - t) * 1000)
+    return result, statistics.median(runs)
+
+
+def peak_mb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main(args):
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'stats.db')}"
+    from models import create_tables, engine, SessionLocal, User, Resume, TrackingLog
+    from spyglass_agent import get_tracking_stats, list_tracking_events
+
+    create_tables()
+    rng = random.Random(3)
+    db = SessionLocal()
+    user = User(email=f"stats-bench-{time.time_ns()}@example.com")
+    db.add(user)
+    db.flush()
+    resumes = [Resume(user_id=user.id) for _ in range(args.other_resumes + 1)]
+    db.add_all(resumes)
+    db.commit()
+    resume_ids = [r.id for r in resumes]
+    t = time.perf_counter()
+    seed(db, resume_ids, args.rows, args.other_rows, args.ips, rng)
+    print(f"{engine.dialect.name}: seeded {args.rows} views for one resume + {args.other_rows} over "
+          f"{args.other_resumes} others in {time.perf_counter() - t:.1f} s")
+    target = resume_ids[0]
+    try:
+        old, old_ms = timed(lambda: legacy_tracking_stats(db, target), args.repeat)
+        new, new_ms = timed(lambda: get_tracking_stats(db, target), args.repeat)
+        point_views = Counter((p["lat"], p["lng"], p["city"], p["company"]) for p in old["map_points"])
+        checks = {
+            "totals": (old["total_views"], old["unique_viewers"]) == (new["total_views"], new["unique_viewers"]),
+            "geo": old["geo_breakdown"] == new["geo_breakdown"],
+            "timeline": old["timeline"] == new["timeline"],
+            "companies": set(old["company_hints"]) == set(new["company_hints"]),
+            "events": old["events"][:len(new["events"])] == new["events"],
+            "map": all(point_views[(p["lat"], p["lng"], p["city"], p["company"])] == p["views"]
+                       for p in new["map_points"]),
+        }
+        agree = all(checks.values()) or [name for name, ok in checks.items() if not ok]
+        print(f"results agree: {agree} ({new['total_views']} views, {new['unique_viewers']} viewers, "
+              f"{len(new['timeline'])} days, {len(old['map_points'])} map points -> {len(new['map_points'])} locations)")
+        db.expire_all()
+        old_mb = peak_mb(lambda: legacy_tracking_stats(db, target))
+        db.expire_all()
+        new_mb = peak_mb(lambda: get_tracking_stats(db, target))
+        print(f"{'':>22} {'ms':>8} {'peak MB':>8} {'events returned':>16}")
+        print(f"{'python aggregation':>22} {old_ms:8.0f} {old_mb:8.1f} {len(old['events']):>16}")
+        print(f"{'sql aggregation':>22} {new_ms:8.0f} {new_mb:8.1f} {len(new['events']):>16}")
+        typical = resume_ids[1]
+        _, typical_old_ms = timed(lambda: legacy_tracking_stats(db, typical), args.repeat)
+        typical_stats, typical_ms = timed(lambda: get_tracking_stats(db, typical), args.repeat)
+        print(f"typical resume ({typical_stats['total_views']} views): python {typical_old_ms:.0f} ms, "
+              f"sql {typical_ms:.1f} ms")
+
+        print("event page (50) at depth:  keyset ms   OFFSET ms")
+        cursor, pages = None, 0
+        for depth in sorted({d for d in (0, 100, 1000, args.rows // 50 - 1) if 0 <= d < args.rows // 50}):
+            while pages < depth:
+                cursor = list_tracking_events(db, target, 50, cursor)["next_cursor"]
+                pages += 1
+            page, keyset_ms = timed(lambda: list_tracking_events(db, target, 50, cursor), args.repeat)
+            _, offset_ms = timed(lambda: db.query(TrackingLog).filter(TrackingLog.resume_id == target).order_by(
+                TrackingLog.viewed_at.desc(), TrackingLog.id.desc()).offset(depth * 50).limit(50).all(), args.repeat)
+            print(f"{depth:>25}  {keyset_ms:9.2f}  {offset_ms:10.2f}")
+
+        index = next(i for i in TrackingLog.__table__.indexes if i.name == "ix_tracking_logs_resume_viewed")
+        index.drop(bind=engine)
+        try:
+            _, noindex_ms = timed(lambda: get_tracking_stats(db, target), args.repeat)
+            _, noindex_typical_ms = timed(lambda: get_tracking_stats(db, typical), args.repeat)
+            _, noindex_page_ms = timed(lambda: list_tracking_events(db, target, 50), args.repeat)
+        finally:
+            index.create(bind=engine)
+        print(f"without (resume_id, viewed_at) index: stats {noindex_ms:.0f} ms, typical resume "
+              f"{noindex_typical_ms:.1f} ms, first page {noindex_page_ms:.2f} ms")
+    finally:
+        if args.database_url:
+            db.query(TrackingLog).filter(TrackingLog.resume_id.in_(resume_ids)).delete(synchronize_session=False)
+            db.query(Resume).filter(Resume.id.in_(resume_ids)).delete(synchronize_session=False)
+            db.query(User).filter(User.id == user.id).delete(synchronize_session=False)
+            db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100000)
+    ap.add_argument("--other-rows", type=int, default=400000)
+    ap.add_argument("--other-resumes", type=int, default=50)
+    ap.add_argument("--ips", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--database-url", default="")
+    main(ap.parse_args())
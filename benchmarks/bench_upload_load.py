@@ -0,0 +1,125 @@
+"""
+Load benchmark: p99 latency of `/` and `/ws/chat` with and without 50
+concurrent 30-page PDF uploads in flight.
+
+    python benchmarks/bench_upload_load.py [--uploads 50] [--pages 30] [--seconds 10]
+
+Starts the fake OpenAI server and the backend as subprocesses.
+Requires `websockets` (shipped with uvicorn[standard]).
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+import statistics
+
+import httpx
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from benchmarks.pdfgen import make_pdf  # noqa: E402
+
+API = "http://127.0.0.1:8010"
+WS = "ws://127.0.0.1:8010/ws/chat/bench"
+
+
+def pct(samples, p):
+    if not samples:
+        return float("nan")
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(len(s) * p))]
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(100):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+async def probe_root(stop, out):
+    async with httpx.AsyncClient() as c:
+        while not stop.is_set():
+            t = time.perf_counter()
+            await c.get(f"{API}/")
+            out.append((time.perf_counter() - t) * 1000)
+            await asyncio.sleep(0.02)
+
+
+async def probe_ws(stop, out):
+    async with websockets.connect(WS) as ws:
+        while not stop.is_set():
+            t = time.perf_counter()
+            await ws.send('{"message": "ping"}')
+            first = None
+            while True:
+                frame = await ws.recv()
+                if first is None:
+                    first = (time.perf_counter() - t) * 1000
+                if '"done"' in frame:
+                    break
+            out.append(first)
+
+
+async def uploader(stop, pdf, codes):
+    async with httpx.AsyncClient(timeout=60) as c:
+        while not stop.is_set():
+            r = await c.post(
+                f"{API}/api/resume/upload",
+                files={"file": ("r.pdf", pdf, "application/pdf")},
+                data={"user_email": "bench@example.com"},
+            )
+            codes[r.status_code] = codes.get(r.status_code, 0) + 1
+            if r.status_code == 429:
+                await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+
+
+async def phase(seconds, uploads, pdf):
+    stop = asyncio.Event()
+    root_ms, ws_ms, codes = [], [], {}
+    tasks = [asyncio.create_task(probe_root(stop, root_ms)), asyncio.create_task(probe_ws(stop, ws_ms))]
+    tasks += [asyncio.create_task(uploader(stop, pdf, codes)) for _ in range(uploads)]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return root_ms, ws_ms, codes
+
+
+async def main(args):
+    pdf = make_pdf(args.pages, lines_per_page=60)
+    env = dict(os.environ, OPENAI_BASE_URL="http://127.0.0.1:8011/v1", OPENAI_API_KEY="sk-fake")
+    procs = [
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                          "--log-level", "warning"], cwd=ROOT, env=env),
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", "8010",
+                          "--log-level", "warning"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL),
+    ]
+    try:
+        await wait_up("http://127.0.0.1:8011/docs")
+        await wait_up(f"{API}/")
+        print(f"PDF: {args.pages} pages, {len(pdf) / 1024:.0f} KiB")
+        for label, n in (("idle", 0), (f"{args.uploads} uploads", args.uploads)):
+            root_ms, ws_ms, codes = await phase(args.seconds, n, pdf)
+            print(f"[{label:>12}] GET /     p50={statistics.median(root_ms):7.2f}ms p99={pct(root_ms, .99):7.2f}ms n={len(root_ms)}")
+            print(f"[{label:>12}] /ws/chat  p50={statistics.median(ws_ms):7.2f}ms p99={pct(ws_ms, .99):7.2f}ms n={len(ws_ms)} (first token)")
+            if codes:
+                print(f"[{label:>12}] upload status codes: {codes}")
+    finally:
+        for p in procs:
+            p.terminate()
+            p.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--uploads", type=int, default=50)
+    ap.add_argument("--pages", type=int, default=30)
+    ap.add_argument("--seconds", type=float, default=10)
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,162 @@
+"""
+Websocket load test for the live interview channel (/ws/chat/{session_id}).
+
+    python benchmarks/bench_ws_chat.py [--sessions 500] [--turns 3] [--think 3] [--frame-ms 30 0]
+
+Starts the fake OpenAI server and the app (uvicorn, throwaway SQLite DB),
+then opens --sessions concurrent websocket sessions; each sends --turns
+answers, waits for the streamed reply, and "thinks" 0.5-1.5x --think
+seconds before answering again. Every 10th session cancels its second
+turn after the first token frame. Run once per --frame-ms value: 30
+coalesces deltas into ~30 ms frames, 0 sends each delta as it arrives.
+
+Reported: time to first token frame and full turn (p50/p99), frames and
+upstream deltas per turn, app CPU seconds per turn, cancelled turns and the
+upstream streams the fake server saw aborted, and the persisted turn count
+read back from the DB.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import sqlite3
+import tempfile
+import subprocess
+
+import httpx
+from websockets.asyncio.client import connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP = "127.0.0.1:8012"
+FAKE = "127.0.0.1:8011"
+
+
+async def wait_up(url):
+    async with httpx.AsyncClient() as c:
+        for _ in range(300):
+            try:
+                await c.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} never came up")
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] if values else float("nan")
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def session(i: int, turns: int, think: float, stats: dict):
+    rng = random.Random(i)
+    await asyncio.sleep(rng.uniform(0, think))  # staggered arrivals
+    async with connect(f"ws://{APP}/ws/chat/load-{i}?user_email=load{i}@example.com",
+                       open_timeout=60, max_queue=None) as ws:
+        json.loads(await ws.recv())  # session frame
+        for turn in range(turns):
+            if turn:
+                await asyncio.sleep(think * rng.uniform(0.5, 1.5))
+            cancel = i % 10 == 0 and turn == 1
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"type": "message", "message": f"Answer {turn} from candidate {i}"}))
+            first, frames = None, 0
+            while True:
+                frame = json.loads(await ws.recv())
+                if frame["type"] == "token":
+                    frames += 1
+                    if first is None:
+                        first = time.perf_counter()
+                        stats["ttft"].append((first - sent) * 1000)
+                        if cancel:
+                            await ws.send(json.dumps({"type": "cancel"}))
+                elif frame["type"] == "done":
+                    stats["turn"].append((time.perf_counter() - sent) * 1000)
+                    stats["frames"].append(frames)
+                    stats["deltas"].append(frame["deltas"])
+                    break
+                elif frame["type"] == "cancelled":
+                    stats["cancelled"] += 1
+                    break
+                else:
+                    stats["errors"].append(frame.get("message"))
+                    break
+
+
+async def run(args, frame_ms: float) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(), f"ws_{int(frame_ms)}.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", OPENAI_BASE_URL=f"http://{FAKE}/v1",
+               OPENAI_API_KEY="sk-fake", CHAT_FRAME_MS=str(frame_ms), LLM_MAX_CONCURRENCY="2000",
+               LLM_MAX_CONNECTIONS="2000", LLM_RPM="1000000", LLM_TPM="1000000000", JOB_WORKERS="1")
+    app = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "8012",
+                            "--log-level", "warning", "--ws-max-queue", "1024"], cwd=ROOT, env=env,
+                           stdout=subprocess.DEVNULL)
+    try:
+        await wait_up(f"http://{APP}/")
+        async with httpx.AsyncClient() as c:
+            aborted_before = (await c.get(f"http://{FAKE}/stats")).json()["streams_aborted"]
+        stats = {"ttft": [], "turn": [], "frames": [], "deltas": [], "cancelled": 0, "errors": []}
+        t, cpu = time.perf_counter(), cpu_seconds(app.pid)
+        results = await asyncio.gather(*(session(i, args.turns, args.think, stats) for i in range(args.sessions)),
+                                       return_exceptions=True)
+        wall, cpu = time.perf_counter() - t, cpu_seconds(app.pid) - cpu
+        await asyncio.sleep(0.5)  # let cancelled turns finish saving
+        async with httpx.AsyncClient() as c:
+            aborted = (await c.get(f"http://{FAKE}/stats")).json()["streams_aborted"] - aborted_before
+        with sqlite3.connect(db_path) as db:
+            saved = db.execute("SELECT count(*) FROM conversation_messages WHERE role = 'assistant'").fetchone()[0]
+        stats.update(wall=wall, cpu=cpu, aborted=aborted, saved=saved,
+                     failed=[repr(r) for r in results if isinstance(r, Exception)])
+        return stats
+    finally:
+        app.terminate()
+        app.wait()
+
+
+async def main(args):
+    env = dict(os.environ, FAKE_LLM_TOKEN_DELAY=str(args.token_delay), FAKE_LLM_REPLY_WORDS=str(args.words),
+               FAKE_LLM_LATENCY="0.05")
+    fake = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.fake_openai:app", "--port", "8011",
+                             "--log-level", "warning"], cwd=ROOT, env=env)
+    try:
+        await wait_up(f"http://{FAKE}/stats")
+        print(f"{args.sessions} sessions x {args.turns} turns, {args.words} deltas per reply "
+              f"every {args.token_delay * 1000:.0f} ms, ~{args.think:g} s think time, {os.cpu_count()} CPU")
+        for frame_ms in args.frame_ms:
+            s = await run(args, frame_ms)
+            turns = args.sessions * args.turns
+            print(f"frame {frame_ms:g} ms: wall {s['wall']:.1f} s, sessions failed {len(s['failed'])}, "
+                  f"turn errors {len(s['errors'])}")
+            print(f"  first token p50 {pct(s['ttft'], .5):6.0f} ms  p99 {pct(s['ttft'], .99):6.0f} ms")
+            print(f"  full turn   p50 {pct(s['turn'], .5):6.0f} ms  p99 {pct(s['turn'], .99):6.0f} ms")
+            print(f"  frames/turn {sum(s['frames']) / max(len(s['frames']), 1):6.1f}  "
+                  f"deltas/turn {sum(s['deltas']) / max(len(s['deltas']), 1):6.1f}  "
+                  f"app CPU {s['cpu'] * 1000 / turns:5.1f} ms/turn")
+            print(f"  cancelled {s['cancelled']} (upstream aborted {s['aborted']}), "
+                  f"turns saved {s['saved']}/{turns}")
+            for failure in (s["failed"] + s["errors"])[:3]:
+                print("  !", failure[:200] if failure else failure)
+    finally:
+        fake.terminate()
+        fake.wait()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=500)
+    ap.add_argument("--turns", type=int, default=3)
+    ap.add_argument("--words", type=int, default=60)
+    ap.add_argument("--token-delay", type=float, default=0.02)
+    ap.add_argument("--think", type=float, default=3.0)
+    ap.add_argument("--frame-ms", type=float, nargs="+", default=[30, 0])
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,149 @@
+"""
+Minimal OpenAI-compatible chat completions server for local benchmarks.
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8011/v1
+
+    uvicorn benchmarks.fake_openai:app --port 8011
+
+Forced tool calls are answered with FAKE_TOOL_RESPONSES[name] (or `{}`).
+Streamed forced tool calls replay benchmarks/recordings/<name>.jsonl (one
+argument fragment per line, FAKE_LLM_TOKEN_DELAY apart) when it exists.
+FAKE_LLM_ERROR_RATE injects 429/503 responses to exercise client retries.
+FAKE_LLM_PREFILL_TPS adds prompt_tokens / TPS seconds (≈4 chars/token) to
+every call, so prompt size shows up in latency; /stats counts prompt chars.
+"""
+import json
+import time
+import random
+import asyncio
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.fixtures import FAKE_TOOL_RESPONSES as DEFAULT_TOOL_RESPONSES
+
+FAKE_LATENCY_S = float(os.getenv("FAKE_LLM_LATENCY", "0.05"))
+FAKE_TOKEN_DELAY_S = float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0.005"))
+FAKE_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_TOOL_LATENCY_S = float(os.getenv("FAKE_LLM_TOOL_LATENCY", str(FAKE_LATENCY_S)))  # per tool call
+FAKE_PREFILL_TPS = float(os.getenv("FAKE_LLM_PREFILL_TPS", "0"))  # 0 = prompt size is free
+FAKE_REPLY_WORDS = int(os.getenv("FAKE_LLM_REPLY_WORDS", "32"))  # words per plain-text reply
+
+# Tool-call arguments returned per function name; benchmarks may mutate this.
+FAKE_TOOL_RESPONSES: dict = dict(DEFAULT_TOOL_RESPONSES)
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+STATS = {"requests": 0, "errors_injected": 0, "prompt_chars": 0, "prompt_chars_by_tool": {},
+         "streams_completed": 0, "streams_aborted": 0}
+
+app = FastAPI(title="fake-openai")
+
+
+def _chunk(content: str, finish: str = None, delta: dict = None) -> str:
+    if delta is None:
+        delta = {"content": content} if content else {}
+    body = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+    }
+    return f"data: {json.dumps(body)}\n\n"
+
+
+def _tool_fragments(name: str) -> list:
+    path = os.path.join(RECORDINGS_DIR, f"{name}.jsonl")
+    if os.path.exists(path):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    args = json.dumps(FAKE_TOOL_RESPONSES.get(name, {}))
+    return [args[i:i + 4] for i in range(0, len(args), 4)]
+
+
+def _stream_tool_call(name: str) -> StreamingResponse:
+    async def gen():
+        yield _chunk("", delta={"role": "assistant", "tool_calls": [
+            {"index": 0, "id": "call_fake", "type": "function", "function": {"name": name, "arguments": ""}}]})
+        for fragment in _tool_fragments(name):
+            yield _chunk("", delta={"tool_calls": [{"index": 0, "function": {"arguments": fragment}}]})
+            await asyncio.sleep(FAKE_TOKEN_DELAY_S)
+        yield _chunk("", finish="tool_calls")
+        yield "data: [DONE]\n\n"
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    STATS["requests"] += 1
+    if FAKE_ERROR_RATE and random.random() < FAKE_ERROR_RATE:
+        STATS["errors_injected"] += 1
+        status = random.choice((429, 503))
+        return JSONResponse(
+            status_code=status,
+            headers={"retry-after": "0.05"} if status == 429 else {},
+            content={"error": {"message": "injected failure", "type": "fake", "code": status}},
+        )
+    words = ("This is a simulated answer from the fake model " * (FAKE_REPLY_WORDS // 9 + 1)).split()[:FAKE_REPLY_WORDS]
+    prompt_chars = sum(len(m.get("content") or "") for m in payload.get("messages", []))
+    tool_choice = payload.get("tool_choice")
+    tool = tool_choice["function"]["name"] if isinstance(tool_choice, dict) else "chat"
+    STATS["prompt_chars"] += prompt_chars
+    STATS["prompt_chars_by_tool"][tool] = STATS["prompt_chars_by_tool"].get(tool, 0) + prompt_chars
+    await asyncio.sleep(FAKE_LATENCY_S + (prompt_chars / 4 / FAKE_PREFILL_TPS if FAKE_PREFILL_TPS else 0))
+
+    if isinstance(tool_choice, dict) and payload.get("stream"):
+        return _stream_tool_call(tool_choice["function"]["name"])
+    if isinstance(tool_choice, dict) and not payload.get("stream"):
+        name = tool_choice["function"]["name"]
+        await asyncio.sleep(max(FAKE_TOOL_LATENCY_S - FAKE_LATENCY_S, 0))
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{
+                        "id": "call_fake",
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(FAKE_TOOL_RESPONSES.get(name, {}))},
+                    }],
+                },
+                "finish_reason": "tool_calls",
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+        }
+
+    if payload.get("stream"):
+        async def gen():
+            completed = False
+            try:
+                for w in words:
+                    yield _chunk(w + " ")
+                    await asyncio.sleep(FAKE_TOKEN_DELAY_S)
+                yield _chunk("", finish="stop")
+                yield "data: [DONE]\n\n"
+                completed = True
+            finally:
+                STATS["streams_completed" if completed else "streams_aborted"] += 1
+        return StreamingResponse(gen(), media_type="text/event-stream")
+
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": len(words), "total_tokens": 10 + len(words)},
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return STATS
@@ -0,0 +1,193 @@
+"""
+Shared benchmark fixtures: a realistic resume, a job description, and the
+canned tool-call payloads the fake OpenAI server answers with.
+"""
+
+SAMPLE_RESUME_TEXT = """Jordan Rivera
+jordan.rivera@example.com | +1 415 555 0134 | linkedin.com/in/jrivera | github.com/jrivera
+
+EDUCATION
+University of Washington, B.S. Computer Science, 2014 - 2018, Seattle, WA
+
+EXPERIENCE
+Acme Payments - Senior Software Engineer - 2021 - Present - San Francisco, CA
+- Built a Python/FastAPI ledger service handling 12k requests/sec with p99 under 40 ms
+- Migrated batch settlement jobs from cron to Kafka consumers, cutting settlement delay from 6 h to 9 min
+- Led a team of 4 engineers through a PostgreSQL 11 to 15 upgrade with zero downtime
+- Introduced Redis-based idempotency keys, eliminating duplicate charges
+
+Globex Analytics - Software Engineer - 2018 - 2021 - Seattle, WA
+- Wrote Go microservices for event ingestion on Kubernetes (GKE)
+- Built Terraform modules for multi-region deployments
+- Reduced AWS spend 22% by right-sizing EC2 fleets and moving cold data to S3 Glacier
+
+PROJECTS
+OpenTrace - Python, OpenTelemetry, ClickHouse - 2022
+- Open-source tracing backend with 1.2k GitHub stars
+
+SKILLS
+Languages: Python, Go, SQL, TypeScript
+Infrastructure: Kubernetes, Docker, Terraform, AWS, GCP
+Data: PostgreSQL, Redis, Kafka, ClickHouse
+"""
+
+SAMPLE_JD = """Senior Backend Engineer, Payments Platform
+
+We are looking for a Senior Backend Engineer to design and scale our payments platform.
+You will own distributed systems that move money reliably across regions.
+
+Requirements:
+- 5+ years of experience building backend services in Python or Go
+- Deep experience with PostgreSQL, Redis and Kafka
+- Experience with Kubernetes, Docker and infrastructure as code (Terraform)
+- Strong understanding of system design, microservices and event-driven architecture
+- Experience with observability: Prometheus, Grafana, OpenTelemetry
+- Familiarity with gRPC and REST API design
+
+Nice to have:
+- Experience with PCI DSS compliance
+- Experience mentoring engineers and leading projects
+- Rust or Java experience
+"""
+
+SAMPLE_RESUME_DATA = {
+    "name": "Jordan Rivera",
+    "phone": "+1 415 555 0134",
+    "email": "jordan.rivera@example.com",
+    "linkedin": "https://linkedin.com/in/jrivera",
+    "linkedin_text": "linkedin.com/in/jrivera",
+    "github": "https://github.com/jrivera",
+    "github_text": "github.com/jrivera",
+    "education": [
+        {"institution": "University of Washington", "degree": "B.S. Computer Science",
+         "dates": "2014 -- 2018", "location": "Seattle, WA"},
+    ],
+    "experience": [
+        {"company": "Acme Payments", "title": "Senior Software Engineer", "dates": "2021 -- Present",
+         "location": "San Francisco, CA", "bullets": [
+             "Built a Python/FastAPI ledger microservice handling 12k requests/sec with p99 < 40 ms",
+             "Migrated settlement to event-driven Kafka consumers, cutting delay from 6 h to 9 min",
+             "Led 4 engineers through a zero-downtime PostgreSQL 11 → 15 upgrade",
+             "Introduced Redis idempotency keys, eliminating duplicate charges (100% reduction)",
+         ]},
+        {"company": "Globex Analytics", "title": "Software Engineer", "dates": "2018 -- 2021",
+         "location": "Seattle, WA", "bullets": [
+             "Wrote Go microservices for event ingestion on Kubernetes (GKE) with Docker",
+             "Built Terraform infrastructure-as-code modules for multi-region deployments",
+             "Reduced AWS spend 22% by right-sizing EC2 fleets & tiering cold data to S3 Glacier",
+         ]},
+    ],
+    "projects": [
+        {"name": "OpenTrace", "tech": "Python, OpenTelemetry, ClickHouse", "dates": "2022",
+         "bullets": ["Open-source tracing backend with 1.2k GitHub stars and #1 on Hacker News"]},
+    ],
+    "skills": [
+        {"category": "Languages", "items": "Python, Go, SQL, TypeScript"},
+        {"category": "Infrastructure", "items": "Kubernetes, Docker, Terraform, AWS, GCP"},
+        {"category": "Data", "items": "PostgreSQL, Redis, Kafka, ClickHouse"},
+    ],
+}
+
+SAMPLE_GAP_ANALYSIS = {
+    "ats_score_before": 58,
+    "ats_score_after": 86,
+    "keywords_injected": ["microservices", "event-driven", "infrastructure as code"],
+    "keywords_missing": ["gRPC", "Prometheus", "PCI DSS"],
+    "strengths": ["Payments domain", "Quantified impact"],
+    "critical_gaps": [
+        {"skill": "gRPC", "importance": "high", "recommendation": "Build a small gRPC service"},
+        {"skill": "PCI DSS", "importance": "medium", "recommendation": "Take a PCI DSS primer"},
+    ],
+    "roast": "Solid engineer hiding behind generic bullets. The payments story is there but buried.",
+}
+
+SAMPLE_QUESTIONS = {
+    "questions": [
+        {"id": f"q{i}", "question": f"Question {i} about the ledger service?", "category": cat,
+         "difficulty": "hard", "model_answer": "A structured STAR answer with numbers."}
+        for i, cat in enumerate(["technical", "technical", "behavioral", "behavioral", "gap_probe"], start=1)
+    ],
+    "overall_readiness_assessment": "Strong on delivery, thin on observability.",
+    "highest_risk_area": "gRPC and observability depth",
+}
+
+SAMPLE_GRADE = {
+    "score": 7,
+    "verdict": "strong",
+    "strengths": ["Specific metrics"],
+    "weaknesses": ["No mention of trade-offs"],
+    "coaching_note": "Lead with the outcome, then the constraint.",
+}
+
+FAKE_TOOL_RESPONSES = {
+    "produce_optimized_resume": {"gap_analysis": SAMPLE_GAP_ANALYSIS, "resume_data": SAMPLE_RESUME_DATA},
+    "generate_killer_questions": SAMPLE_QUESTIONS,
+    "grade_interview_answer": SAMPLE_GRADE,
+    # packed grading: one grade per question id the benchmarks use (q1..q20)
+    "grade_interview_answers": {"grades": [dict(SAMPLE_GRADE, question_id=f"q{i}") for i in range(1, 21)]},
+    "create_linkedin_content": {
+        "primary_post": "Two years ago I almost quit engineering...",
+        "hashtags": ["payments", "backend", "career"],
+        "headline_options": ["I almost quit.", "Nobody tells you this.", "6 hours to 9 minutes."],
+    },
+    "recommend_courses": {
+        "courses": [{"skill": "gRPC", "course_title": "gRPC Masterclass", "platform": "Udemy",
+                     "priority": "high", "affiliate_url": "https://www.udemy.com/course/grpc-masterclass/"}],
+        "learning_roadmap": "gRPC first, then Prometheus.",
+    },
+    "route_intent": {"agent": "ORCHESTRATOR", "confidence": 0.7},
+}
+
+# Held-out chat messages for the intent router (not in intent_examples.jsonl).
+INTENT_EVAL = [
+    ("Is my resume good enough for a Netflix SRE job?", "ATS"),
+    ("please look over my resume and make it better", "ATS"),
+    ("how do I make my experience section sound more senior", "ATS"),
+    ("rework my resume for a frontend position at Shopify", "ATS"),
+    ("my CV doesn't get callbacks, what's wrong with it", "ATS"),
+    ("what's my resume missing for this SRE job description", "ATS"),
+    ("can you boost my resume match for this posting", "ATS"),
+    ("put more metrics into my bullet points", "ATS"),
+    ("does my resume have enough keywords", "ATS"),
+    ("reformat my resume, the columns confuse parsers", "ATS"),
+    ("did the Airbnb recruiter ever open the resume I sent?", "SPYGLASS"),
+    ("how many people have seen my resume so far", "SPYGLASS"),
+    ("where in the world are my resume opens coming from", "SPYGLASS"),
+    ("any views on my application since Friday?", "SPYGLASS"),
+    ("make me a link to my resume that tells me when it's opened", "SPYGLASS"),
+    ("is my resume getting any attention", "SPYGLASS"),
+    ("show the opens for the resume I sent to Microsoft", "SPYGLASS"),
+    ("how often has my CV been downloaded", "SPYGLASS"),
+    ("which recruiters saw my resume", "SPYGLASS"),
+    ("track my resume views", "SPYGLASS"),
+    ("let's rehearse for my interview on Thursday", "INTERVIEWER"),
+    ("throw some hard system design questions at me", "INTERVIEWER"),
+    ("how did I do on that answer?", "INTERVIEWER"),
+    ("what would they ask me about the payments migration", "INTERVIEWER"),
+    ("I want to practice answering behavioral questions", "INTERVIEWER"),
+    ("pretend you're the hiring manager and interview me", "INTERVIEWER"),
+    ("give me another question", "INTERVIEWER"),
+    ("what's the best way to answer a question about failure", "INTERVIEWER"),
+    ("help me prep for my Amazon loop", "INTERVIEWER"),
+    ("score how I answered the leadership question", "INTERVIEWER"),
+    ("write something for LinkedIn about my promotion", "GHOSTWRITER"),
+    ("can you draft a letter to go with my application", "GHOSTWRITER"),
+    ("message to send a recruiter asking about openings", "GHOSTWRITER"),
+    ("make my LinkedIn bio sound more human", "GHOSTWRITER"),
+    ("what should I study to get better at Go", "GHOSTWRITER"),
+    ("post about my hackathon win", "GHOSTWRITER"),
+    ("email to thank the panel after today's interview", "GHOSTWRITER"),
+    ("suggest a certification for cloud engineering", "GHOSTWRITER"),
+    ("write an open to work announcement", "GHOSTWRITER"),
+    ("draft a note asking my old boss for a referral", "GHOSTWRITER"),
+    ("hey", "ORCHESTRATOR"),
+    ("thank you so much", "ORCHESTRATOR"),
+    ("should I take the startup offer or stay at my bank job", "ORCHESTRATOR"),
+    ("what salary should I ask for as a mid level engineer in Toronto", "ORCHESTRATOR"),
+    ("I'm burned out and thinking about quitting", "ORCHESTRATOR"),
+    ("how do I move from QA into software engineering", "ORCHESTRATOR"),
+    ("what can this tool help me with", "ORCHESTRATOR"),
+    ("is it worth getting an MBA", "ORCHESTRATOR"),
+    ("how do I negotiate equity", "ORCHESTRATOR"),
+    ("what should I focus on in my job hunt", "ORCHESTRATOR"),
+]
@@ -0,0 +1,49 @@
+"""
+Tiny dependency-free PDF writer for benchmarks.
+Produces N pages of Helvetica text that pypdf can extract.
+"""
+
+LOREM = (
+    "Senior Software Engineer with 8 years building distributed systems in Python, Go and Rust. "
+    "Led migration of a monolith to Kubernetes microservices, cutting p99 latency by 40 percent. "
+    "Designed Redis-backed rate limiting and PostgreSQL partitioning for 2B events per day."
+)
+
+
+def make_pdf(pages: int, lines_per_page: int = 45) -> bytes:
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")  # placeholder, patched below
+    page_ids = []
+    for p in range(pages):
+        lines = [f"Page {p + 1} line {i + 1}: {LOREM[(i * 7) % 60:][:90]}" for i in range(lines_per_page)]
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 760 Td"]
+        for line in lines:
+            ops.append("(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+    return bytes(out)
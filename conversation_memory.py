@@ -0,0 +1,243 @@
+"""
+ResumeGod V4.0 — Conversation memory
+Bounded history for chat sessions (ConversationSession). Messages are
+appended to conversation_messages, one INSERT each, instead of rewriting
+the whole history as a JSON blob every turn. A prompt gets the session's
+rolling summary plus the newest messages verbatim, capped at
+MEMORY_MAX_TOKENS, so its size stops growing after the first few turns.
+
+Summarizing happens off the hot path: once MEMORY_SUMMARIZE_EVERY turns
+have aged out of the last MEMORY_RECENT_TURNS, a "summarize_conversation"
+job folds them into the summary. Until it lands they stay in the prompt
+(still under the cap). A connection only ever holds the unsummarized tail.
+"""
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import update, func
+from sqlalchemy.exc import IntegrityError
+
+from llm_gateway import llm
+from job_queue import job_queue
+from models import SessionLocal, User, ConversationSession, ConversationMessage
+from prompt_budget import count_tokens
+
+MEMORY_MODEL = os.getenv("MEMORY_MODEL", "gpt-4o-mini")
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "6"))  # newest turns always kept verbatim
+MEMORY_SUMMARIZE_EVERY = int(os.getenv("MEMORY_SUMMARIZE_EVERY", "4"))  # aged-out turns per summary job
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "3000"))  # summary + history per prompt
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "400"))
+
+# Most messages held per session: the verbatim window, a batch waiting for its
+# summary job and one more in case that job is slow.
+MEMORY_TAIL = (MEMORY_RECENT_TURNS + 2 * MEMORY_SUMMARIZE_EVERY) * 2
+
+SUMMARY_PROMPT = """You keep the running memory of a conversation between a candidate and ResumeGod's career agents.
+Update the summary with the new messages. Keep what the agents will need later: the candidate's background,
+target role and goals, decisions made, questions asked and how they were answered, open follow-ups.
+Drop pleasantries. Plain prose or short bullets, at most {words} words."""
+
+_summarizing: dict[str, int] = {}  # session id → seq its queued summary job folds up to
+
+
+def _entry(seq: int, role: str, content: str, tokens: int, meta: Optional[dict]) -> dict:
+    return {"seq": seq, "role": role, "content": content, "tokens": tokens, **(meta or {})}
+
+
+def _import_legacy(db, row: ConversationSession):
+    """Sessions from before conversation_messages kept every message in the messages JSON column."""
+    for seq, m in enumerate(row.messages, start=1):
+        content = m.get("content") or ""
+        db.add(ConversationMessage(session_id=row.id, seq=seq, role=m["role"], content=content,
+                                   tokens=count_tokens(content),
+                                   meta={k: m[k] for k in ("hidden", "status") if m.get(k)} or None))
+    row.message_count = len(row.messages)
+    row.turn_count = sum(1 for m in row.messages if m["role"] == "assistant")
+    row.messages = []
+    db.commit()
+
+
+class ConversationMemory:
+    """What a prompt needs from a session: its context, the summary and the unsummarized tail."""
+
+    def __init__(self, row: ConversationSession, tail: list[dict]):
+        self.session_id = row.id
+        self.context = dict(row.context or {})
+        self.summary = row.summary or ""
+        self.summary_through = row.summary_through or 0
+        self.summary_tokens = count_tokens(self.summary) if self.summary else 0
+        self.message_count = row.message_count or 0
+        self.turn_count = row.turn_count or 0
+        self.tail = tail
+
+    @classmethod
+    def open(cls, session_id: str, user_email: Optional[str] = None,
+             agent: str = "orchestrator") -> Optional["ConversationMemory"]:
+        """Load a session; with user_email, an unknown id starts a new one for that user.
+        Reads the row and at most MEMORY_TAIL messages, however long the session is."""
+        db = SessionLocal()
+        try:
+            row = db.get(ConversationSession, session_id)
+            if row is None:
+                if not user_email:
+                    return None
+                user = db.query(User).filter(User.email == user_email).first()
+                if user is None:
+                    user = User(email=user_email)
+                    db.add(user)
+                    db.flush()
+                row = ConversationSession(id=session_id, user_id=user.id, messages=[], context={},
+                                          active_agent=agent, summary_through=0, message_count=0, turn_count=0)
+                db.add(row)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()  # a concurrent open created this session first
+                    row = db.get(ConversationSession, session_id)
+                    if row is None:
+                        raise
+            elif row.messages and not row.message_count:
+                try:
+                    _import_legacy(db, row)
+                except IntegrityError:
+                    db.rollback()  # a concurrent open imported it first
+                    db.refresh(row)
+            rows = (db.query(ConversationMessage)
+                    .filter(ConversationMessage.session_id == session_id,
+                            ConversationMessage.seq > (row.summary_through or 0))
+                    .order_by(ConversationMessage.seq.desc())
+                    .limit(MEMORY_TAIL)
+                    .all())
+            return cls(row, [_entry(m.seq, m.role, m.content, m.tokens, m.meta) for m in reversed(rows)])
+        finally:
+            db.close()
+
+    def prompt_messages(self, max_tokens: int = MEMORY_MAX_TOKENS) -> list[dict]:
+        """History for a prompt: the summary as a system message, then as many of
+        the newest messages as fit in max_tokens (oldest dropped first)."""
+        used, recent = self.summary_tokens, []
+        for m in reversed(self.tail):
+            used += m["tokens"]
+            if used > max_tokens:
+                break
+            recent.append({"role": m["role"], "content": m["content"]})
+        head = [{"role": "system", "content": f"Conversation so far (summary):\n{self.summary}"}] if self.summary else []
+        return head + recent[::-1]
+
+    def append(self, *messages: dict):
+        """Persist new messages ({"role", "content"}, optionally "hidden"/"status"):
+        one INSERT each plus one UPDATE of the session's counters. Also picks up
+        a summary written since the last append and drops the tail it covers.
+
+        The counters are bumped first, so the UPDATE's row lock (the write lock
+        on SQLite) reserves this batch's seqs until commit: turns appended
+        concurrently from REST and the websocket queue up instead of colliding
+        on (session_id, seq)."""
+        assistant = sum(1 for m in messages if m["role"] == "assistant")
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(ConversationSession)
+                .where(ConversationSession.id == self.session_id)
+                .values(message_count=func.coalesce(ConversationSession.message_count, 0) + len(messages),
+                        turn_count=func.coalesce(ConversationSession.turn_count, 0) + assistant,
+                        updated_at=datetime.utcnow())
+            )
+            row = db.get(ConversationSession, self.session_id)
+            seq, added = row.message_count - len(messages), []
+            for m in messages:
+                seq += 1
+                meta = {k: m[k] for k in ("hidden", "status") if m.get(k)} or None
+                tokens = count_tokens(m["content"])
+                db.add(ConversationMessage(session_id=self.session_id, seq=seq, role=m["role"],
+                                           content=m["content"], tokens=tokens, meta=meta))
+                added.append(_entry(seq, m["role"], m["content"], tokens, meta))
+            self.message_count, self.turn_count = row.message_count, row.turn_count
+            if (row.summary_through or 0) != self.summary_through:
+                self.summary, self.summary_through = row.summary or "", row.summary_through
+                self.summary_tokens = count_tokens(self.summary)
+            db.commit()
+        finally:
+            db.close()
+        self.tail = [m for m in self.tail + added if m["seq"] > self.summary_through][-MEMORY_TAIL:]
+
+    def save_context(self, context: dict, agent: str):
+        db = SessionLocal()
+        try:
+            db.query(ConversationSession).filter(ConversationSession.id == self.session_id).update({
+                "context": context, "active_agent": agent, "updated_at": datetime.utcnow(),
+            })
+            db.commit()
+        finally:
+            db.close()
+        self.context = dict(context)
+
+    def schedule_summary(self) -> Optional[str]:
+        """Queue a "summarize_conversation" job once MEMORY_SUMMARIZE_EVERY turns have
+        aged out of the verbatim window; one per session at a time. Returns its job id."""
+        through = self.message_count - MEMORY_RECENT_TURNS * 2
+        if through - self.summary_through < MEMORY_SUMMARIZE_EVERY * 2:
+            return None
+        if _summarizing.get(self.session_id, 0) > self.summary_through:
+            return None  # already queued
+        _summarizing[self.session_id] = through
+        return job_queue.enqueue("summarize_conversation", {"session_id": self.session_id, "through": through})
+
+
+async def summarize_conversation(session_id: str, through: int) -> dict:
+    """
+    Fold messages (summary_through, through] into the session's summary (at
+    most MEMORY_TAIL of them per run). The write only applies if
+    summary_through has not moved meanwhile, so an overlapping run is a no-op.
+    """
+    try:
+        db = SessionLocal()
+        try:
+            row = db.get(ConversationSession, session_id)
+            if row is None:
+                raise ValueError(f"Unknown session {session_id}")
+            summary, start = row.summary or "", row.summary_through or 0
+            rows = (db.query(ConversationMessage)
+                    .filter(ConversationMessage.session_id == session_id,
+                            ConversationMessage.seq > start, ConversationMessage.seq <= through)
+                    .order_by(ConversationMessage.seq)
+                    .limit(MEMORY_TAIL)
+                    .all())
+            transcript = [(m.seq, m.role, m.content) for m in rows]
+        finally:
+            db.close()
+        if not transcript:
+            return {"summary_through": start, "folded": 0}
+
+        upto = transcript[-1][0]
+        lines = "\n".join(f"{role.upper()}: {content}" for _, role, content in transcript)
+        response = await llm.chat(
+            agent="memory",
+            model=MEMORY_MODEL,
+            max_tokens=MEMORY_SUMMARY_TOKENS,
+            temperature=0.2,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT.format(words=MEMORY_SUMMARY_TOKENS * 3 // 4)},
+                {"role": "user", "content": f"CURRENT SUMMARY:\n{summary or '(none yet)'}\n\nNEW MESSAGES:\n{lines}"},
+            ],
+        )
+        new_summary = (response.choices[0].message.content or "").strip()
+
+        db = SessionLocal()
+        try:
+            updated = db.execute(
+                update(ConversationSession)
+                .where(ConversationSession.id == session_id, ConversationSession.summary_through == start)
+                .values(summary=new_summary, summary_through=upto)
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+        if not updated:
+            return {"summary_through": start, "folded": 0}
+        print(f"[Memory] Session {session_id}: folded messages {start + 1}-{upto} into the summary")
+        return {"summary_through": upto, "folded": len(transcript), "summary_tokens": count_tokens(new_summary)}
+    finally:
+        if _summarizing.get(session_id) == through:
+            del _summarizing[session_id]
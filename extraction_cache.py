@@ -0,0 +1,89 @@
+"""
+ResumeGod V4.0 — Extracted-text cache
+Content-addressed: SHA-256 of the uploaded PDF bytes → extracted text,
+page count and extraction timings. Two tiers: an in-process LRU and the
+`extracted_texts` table, so re-uploads of a known file never touch pypdf.
+The LRU is used from the event loop; table reads and writes run in a thread.
+"""
+import os
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from caching import LRUCache
+from models import SessionLocal, ExtractedText
+
+EXTRACT_CACHE_SIZE = int(os.getenv("EXTRACT_CACHE_SIZE", "256"))
+
+
+class ExtractionCache:
+    def __init__(self, maxsize: int = EXTRACT_CACHE_SIZE):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.db_hits = 0
+        self.db_misses = 0
+        self.stores = 0
+
+    async def get(self, sha256: str) -> Optional[dict]:
+        entry = self.memory.get(sha256)
+        if entry is not None:
+            return entry
+
+        entry = await asyncio.to_thread(self._load, sha256)
+        if entry is None:
+            self.db_misses += 1
+            return None
+        self.db_hits += 1
+        self.memory.set(sha256, entry)
+        return entry
+
+    @staticmethod
+    def _load(sha256: str) -> Optional[dict]:
+        db = SessionLocal()
+        try:
+            row = db.get(ExtractedText, sha256)
+            if row is None:
+                return None
+            row.hit_count = (row.hit_count or 0) + 1
+            row.last_hit_at = datetime.utcnow()
+            db.commit()
+            return {
+                "text": row.text,
+                "page_count": row.page_count,
+                "extract_ms": row.extract_ms,
+                "first_page_ms": row.first_page_ms,
+            }
+        finally:
+            db.close()
+
+    async def put(self, sha256: str, extraction: dict):
+        entry = {
+            "text": extraction["text"],
+            "page_count": extraction["page_count"],
+            "extract_ms": extraction.get("extract_ms"),
+            "first_page_ms": extraction.get("first_page_ms"),
+        }
+        self.memory.set(sha256, entry)
+        await asyncio.to_thread(self._store, sha256, entry)
+
+    def _store(self, sha256: str, entry: dict):
+        db = SessionLocal()
+        try:
+            db.merge(ExtractedText(sha256=sha256, **entry))
+            db.commit()
+            self.stores += 1
+        except Exception as e:
+            db.rollback()
+            print(f"[Extraction Cache] Persist failed for {sha256[:12]}: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "stores": self.stores,
+        }
+
+
+extraction_cache = ExtractionCache()
@@ -0,0 +1,365 @@
+"""
+ResumeGod V4.0 — Offline IP geolocation
+A compiled, read-only table of IP ranges (IPv4 and IPv6) → country, region,
+city, lat/lon and company (ASN org). The file is memory-mapped and searched
+by bisection over fixed-width columns, so a lookup touches a handful of
+pages and allocates nothing but the result (decoded records are kept for
+reuse); the OS page cache is shared by every worker process.
+
+Build it from CSV dumps (DB-IP lite, or any CSV with the columns below):
+
+    python geo_db.py build dbip-city-lite.csv --asn dbip-asn-lite.csv -o geo.bin
+    python geo_db.py lookup geo.bin 8.8.8.8 2001:4860:4860::8888
+
+City CSV: start_ip,end_ip (or network as CIDR),country,region,city,latitude,longitude[,org]
+ASN CSV:  start_ip,end_ip (or network),asn,org
+Headerless files are read in the DB-IP column order (start,end,continent,
+country,region,city,lat,lon and start,end,asn,org).
+
+File layout (little-endian): a header, then per family a prefix index
+(65537 u32: first range starting at or after each top-16-bit prefix, so a
+search only bisects the few ranges under one prefix) and columns — IPv4
+start/end/record (u32), IPv6 start/end as high/low u64 halves plus record
+(u32) — then the record table (four string ids + lat/lon in 1e-4 degrees
+as i32), string
+offsets (u32) and the UTF-8 string blob.
+"""
+import os
+import sys
+import csv
+import mmap
+import struct
+import socket
+import argparse
+import ipaddress
+from bisect import bisect_left, bisect_right
+from array import array
+from typing import Optional
+
+MAGIC = b"RGGEO\x00\x00\x01"
+HEADER = struct.Struct("<8sIIIII")  # magic, v4 ranges, v6 ranges, records, strings, blob bytes
+RECORD = struct.Struct("<IIIIii")  # country, region, city, company (string ids), latitude, longitude
+V4_MAPPED = b"\x00" * 10 + b"\xff\xff"
+MAX_DECODED = 65536  # decoded records (and strings) kept around
+PREFIX_BITS = 16
+PREFIXES = 1 << PREFIX_BITS
+NO_COORDINATE = -(1 << 31)  # latitude/longitude of a record without coordinates
+
+
+class GeoDBError(Exception):
+    pass
+
+
+class GeoDB:
+    """Read side. lookup() returns the same dict shape as spyglass_agent.geolocate_ip, or None."""
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise GeoDBError("geo database files are little-endian; big-endian hosts are not supported")
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            raise GeoDBError(f"{path}: truncated")
+        magic, n4, n6, n_records, n_strings, blob_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise GeoDBError(f"{path}: not a geo database (bad magic)")
+        view, offset = memoryview(self._mm), HEADER.size
+
+        def column(fmt: str, count: int, width: int) -> memoryview:
+            nonlocal offset
+            col = view[offset:offset + count * width].cast(fmt)
+            offset += count * width
+            return col
+
+        self._v4_index = column("I", PREFIXES + 1, 4)
+        self._v4_start, self._v4_end, self._v4_rec = column("I", n4, 4), column("I", n4, 4), column("I", n4, 4)
+        self._v6_index = column("I", PREFIXES + 1, 4)
+        self._v6_start_hi, self._v6_start_lo = column("Q", n6, 8), column("Q", n6, 8)
+        self._v6_end_hi, self._v6_end_lo = column("Q", n6, 8), column("Q", n6, 8)
+        self._v6_rec = column("I", n6, 4)
+        self._records_at = offset
+        offset += n_records * RECORD.size
+        self._string_offsets = column("I", n_strings + 1, 4)
+        self._blob_at = offset
+        if offset + blob_size != len(self._mm):
+            raise GeoDBError(f"{path}: size mismatch (corrupt or truncated)")
+        self.v4_ranges, self.v6_ranges, self.records = n4, n6, n_records
+        self._decoded: dict[int, dict] = {}
+        self._strings: dict[int, str] = {}  # "" reads as "Unknown"
+        self.hits = 0
+        self.misses = 0
+
+    def _string(self, i: int) -> str:
+        value = self._strings.get(i)
+        if value is None:
+            start, end = self._string_offsets[i], self._string_offsets[i + 1]
+            value = self._mm[self._blob_at + start:self._blob_at + end].decode() or "Unknown"
+            if len(self._strings) >= MAX_DECODED:
+                self._strings.clear()
+            self._strings[i] = value
+        return value
+
+    def _record(self, i: int) -> dict:
+        geo = self._decoded.get(i)
+        if geo is None:
+            country, region, city, company, lat, lon = RECORD.unpack_from(self._mm, self._records_at + i * RECORD.size)
+            located = lat != NO_COORDINATE
+            geo = {
+                "country": self._string(country),
+                "city": self._string(city),
+                "region": self._string(region),
+                "latitude": lat / 1e4 if located else None,
+                "longitude": lon / 1e4 if located else None,
+                "company_hint": self._string(company),
+            }
+            if len(self._decoded) >= MAX_DECODED:
+                self._decoded.clear()
+            self._decoded[i] = geo
+        return geo
+
+    def lookup(self, ip: str) -> Optional[dict]:
+        """Geo for an IPv4/IPv6 address string; None if unparseable or not in any range.
+        The dict is shared between calls — don't mutate it."""
+        try:
+            if ":" not in ip:
+                packed = socket.inet_aton(ip)
+            else:
+                packed = socket.inet_pton(socket.AF_INET6, ip)
+                if packed[:12] != V4_MAPPED:
+                    return self._lookup_v6(int.from_bytes(packed[:8], "big"), int.from_bytes(packed[8:], "big"))
+                packed = packed[12:]
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        key = int.from_bytes(packed, "big")
+        prefix = key >> (32 - PREFIX_BITS)
+        # starts before index[prefix] are below this prefix, those from index[prefix + 1] above it
+        i = bisect_right(self._v4_start, key, self._v4_index[prefix], self._v4_index[prefix + 1]) - 1
+        if i < 0 or key > self._v4_end[i]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        geo = self._decoded.get(self._v4_rec[i])
+        return geo if geo is not None else self._record(self._v4_rec[i])
+
+    def _lookup_v6(self, hi: int, lo: int) -> Optional[dict]:
+        # Ranges are sorted by (start_hi, start_lo). Bisect on the high half;
+        # only when several ranges start inside our /64 does the low half matter.
+        prefix = hi >> (64 - PREFIX_BITS)
+        start_hi, start_lo = self._v6_start_hi, self._v6_start_lo
+        first = self._v6_index[prefix]
+        i = bisect_right(start_hi, hi, first, self._v6_index[prefix + 1]) - 1
+        if i >= 0 and start_hi[i] == hi and start_lo[i] > lo:
+            left = bisect_left(start_hi, hi, min(first, i), i)
+            i = max(bisect_right(start_lo, lo, left, i) - 1, left - 1)
+        if i < 0:
+            self.misses += 1
+            return None
+        end_hi = self._v6_end_hi[i]
+        if end_hi < hi or (end_hi == hi and self._v6_end_lo[i] < lo):
+            self.misses += 1
+            return None
+        self.hits += 1
+        geo = self._decoded.get(self._v6_rec[i])
+        return geo if geo is not None else self._record(self._v6_rec[i])
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "v4_ranges": self.v4_ranges,
+            "v6_ranges": self.v6_ranges,
+            "records": self.records,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        self._v4_index = self._v4_start = self._v4_end = self._v4_rec = None
+        self._v6_index = self._v6_start_hi = self._v6_start_lo = self._v6_end_hi = self._v6_end_lo = self._v6_rec = None
+        self._string_offsets = None
+        self._mm.close()
+
+
+# --- build side ----------------------------------------------------------------
+
+def _range(row: dict) -> tuple[int, int, int]:
+    """(version, first, last) from a network (CIDR) or start_ip/end_ip."""
+    if row.get("network"):
+        net = ipaddress.ip_network(row["network"].strip(), strict=False)
+        return net.version, int(net.network_address), int(net.broadcast_address)
+    first, last = ipaddress.ip_address(row["start_ip"].strip()), ipaddress.ip_address(row["end_ip"].strip())
+    if first.version != last.version or int(last) < int(first):
+        raise ValueError(f"bad range {first} - {last}")
+    return first.version, int(first), int(last)
+
+
+def _float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _company(org: Optional[str]) -> str:
+    # "AS15169 Google LLC" → "Google LLC", as the ipinfo.io provider does
+    org = (org or "").strip()
+    return org.split(" ", 1)[1] if org.startswith("AS") and " " in org else org
+
+
+def _rows(path: str, headerless: list[str]):
+    with open(path, newline="", encoding="utf-8") as f:
+        first = f.readline()
+        f.seek(0)
+        try:
+            ipaddress.ip_address(first.split(",", 1)[0].strip().strip('"'))
+            reader = csv.DictReader(f, fieldnames=headerless)
+        except ValueError:
+            reader = csv.DictReader(f)
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        yield from reader
+
+
+def read_city_csv(path: str) -> dict[int, list]:
+    """{4: [...], 6: [...]} of (first, last, (country, region, city, lat, lon, org))."""
+    ranges = {4: [], 6: []}
+    for row in _rows(path, ["start_ip", "end_ip", "continent", "country", "region", "city", "latitude", "longitude"]):
+        version, first, last = _range(row)
+        ranges[version].append((first, last, (
+            (row.get("country") or row.get("country_code") or "").strip(),
+            (row.get("region") or row.get("stateprov") or "").strip(),
+            (row.get("city") or "").strip(),
+            _float(row.get("latitude")),
+            _float(row.get("longitude")),
+            _company(row.get("org")),
+        )))
+    return ranges
+
+
+def read_asn_csv(path: str) -> dict[int, list]:
+    """{4: [...], 6: [...]} of (first, last, company)."""
+    ranges = {4: [], 6: []}
+    for row in _rows(path, ["start_ip", "end_ip", "asn", "org"]):
+        version, first, last = _range(row)
+        ranges[version].append((first, last, _company(row.get("org") or row.get("as_organization"))))
+    return ranges
+
+
+def _disjoint(ranges: list, label: str) -> list:
+    ranges.sort(key=lambda r: r[0])
+    for prev, cur in zip(ranges, ranges[1:]):
+        if cur[0] <= prev[1]:
+            raise ValueError(f"{label}: overlapping ranges starting at {prev[0]} and {cur[0]}")
+    return ranges
+
+
+def overlay(city: list, asn: list) -> list:
+    """Split two sorted lists of disjoint (first, last, value) ranges into
+    (first, last, city_value, asn_value) segments covering either, merging
+    neighbours that end up identical."""
+    out, i, j, pos = [], 0, 0, 0
+    while True:
+        while i < len(city) and city[i][1] < pos:
+            i += 1
+        while j < len(asn) and asn[j][1] < pos:
+            j += 1
+        a = city[i] if i < len(city) else None
+        b = asn[j] if j < len(asn) else None
+        if a is None and b is None:
+            return out
+        start = max(pos, min(r[0] for r in (a, b) if r))
+        covering = [r for r in (a, b) if r and r[0] <= start]
+        upcoming = [r for r in (a, b) if r and r[0] > start]
+        end = min([r[1] for r in covering] + [r[0] - 1 for r in upcoming])
+        values = (a[2] if a in covering else None, b[2] if b in covering else None)
+        if out and out[-1][1] + 1 == start and out[-1][2:] == values:
+            out[-1] = (out[-1][0], end, *values)
+        else:
+            out.append((start, end, *values))
+        pos = end + 1
+
+
+def build(city_csv: Optional[str], asn_csv: Optional[str], out_path: str) -> dict:
+    """Compile CSV dumps into a geo database file. Returns counts."""
+    if not city_csv and not asn_csv:
+        raise ValueError("need a city CSV, an ASN CSV or both")
+    city = read_city_csv(city_csv) if city_csv else {4: [], 6: []}
+    asn = read_asn_csv(asn_csv) if asn_csv else {4: [], 6: []}
+
+    strings, string_ids = [""], {"": 0}
+    records, record_ids = [], {}
+
+    def string_id(value: str) -> int:
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    def record_id(geo: Optional[tuple], company: Optional[str]) -> int:
+        country, region, city_name, lat, lon, org = geo or ("", "", "", None, None, "")
+        key = (country, region, city_name, lat, lon, company or org)
+        if key not in record_ids:
+            record_ids[key] = len(records)
+            located = lat is not None and lon is not None
+            records.append(RECORD.pack(string_id(country), string_id(region), string_id(city_name),
+                                       string_id(company or org),
+                                       round(lat * 1e4) if located else NO_COORDINATE,
+                                       round(lon * 1e4) if located else NO_COORDINATE))
+        return record_ids[key]
+
+    columns = {}
+    for version in (4, 6):
+        segments = overlay(_disjoint(city[version], f"IPv{version} city ranges"),
+                           _disjoint(asn[version], f"IPv{version} ASN ranges"))
+        columns[version] = ([s[0] for s in segments], [s[1] for s in segments],
+                            [record_id(s[2], s[3]) for s in segments])
+
+    blob = "".join(strings).encode()
+    string_offsets, at = [], 0
+    for value in strings:
+        string_offsets.append(at)
+        at += len(value.encode())
+    string_offsets.append(at)
+
+    mask = (1 << 64) - 1
+    v4_start, v4_end, v4_rec = columns[4]
+    v6_start, v6_end, v6_rec = columns[6]
+    v4_index = [bisect_left(v4_start, p << (32 - PREFIX_BITS)) for p in range(PREFIXES)] + [len(v4_start)]
+    v6_index = [bisect_left(v6_start, p << (128 - PREFIX_BITS)) for p in range(PREFIXES)] + [len(v6_start)]
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(v4_start), len(v6_start), len(records), len(strings), len(blob)))
+        for values, fmt in ((v4_index, "I"), (v4_start, "I"), (v4_end, "I"), (v4_rec, "I"), (v6_index, "I"),
+                            ([v >> 64 for v in v6_start], "Q"), ([v & mask for v in v6_start], "Q"),
+                            ([v >> 64 for v in v6_end], "Q"), ([v & mask for v in v6_end], "Q"),
+                            (v6_rec, "I")):
+            f.write(array(fmt, values).tobytes())
+        f.write(b"".join(records))
+        f.write(array("I", string_offsets).tobytes())
+        f.write(blob)
+    os.replace(tmp, out_path)
+    return {"v4_ranges": len(v4_start), "v6_ranges": len(v6_start), "records": len(records),
+            "strings": len(strings), "bytes": os.path.getsize(out_path)}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build or query an offline IP geolocation database")
+    sub = ap.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="compile CSV dumps into a database file")
+    b.add_argument("city_csv", nargs="?")
+    b.add_argument("--asn", dest="asn_csv")
+    b.add_argument("-o", "--output", required=True)
+    q = sub.add_parser("lookup", help="look addresses up in a database file")
+    q.add_argument("path")
+    q.add_argument("ips", nargs="+")
+    args = ap.parse_args()
+    if args.command == "build":
+        counts = build(args.city_csv, args.asn_csv, args.output)
+        print(f"Wrote {args.output}: {counts['v4_ranges']} IPv4 + {counts['v6_ranges']} IPv6 ranges, "
+              f"{counts['records']} records, {counts['bytes'] / 1e6:.1f} MB")
+    else:
+        db = GeoDB(args.path)
+        for ip in args.ips:
+            print(ip, db.lookup(ip))
@@ -3,11 +3,9 @@ ResumeGod V4.0 — Agent 4: The Ghostwriter
 Role: Personal brand strategist. Writes viral LinkedIn "humble brag" posts.
 Reads the optimized resume and crafts copy-paste ready announcement content.
 """
-import os
 import json
-from openai import AsyncOpenAI
-
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm_gateway import llm
+from prompt_budget import fit_resume_data, fit_jd, fit_json
 
 GHOSTWRITER_SYSTEM_PROMPT = """You are The Ghostwriter — a viral LinkedIn content strategist who has ghost-written posts
 that collectively generated 50M+ impressions for tech professionals.
@@ -97,16 +95,17 @@ async def generate_linkedin_post(
 LATEST ROLE: {latest_role.get('title', 'N/A')} at {latest_role.get('company', 'N/A')}
 TONE: {tone}
 
-FULL RESUME DATA:
-{json.dumps(resume_data, indent=2)}
+RESUME DATA:
+{fit_resume_data(resume_data, "ghostwriter")}
 
 TARGET ROLE THEY'RE APPLYING FOR:
-{job_description[:500]}
+{fit_jd(job_description, "ghostwriter")}
 
 Write a {tone} LinkedIn post announcing this career update.
 Make it feel authentic, not corporate. This should get 500+ likes."""
 
-    response = await client.chat.completions.create(
+    response = await llm.chat(
+        agent="ghostwriter",
         model="gpt-4o",
         messages=[
             {"role": "system", "content": GHOSTWRITER_SYSTEM_PROMPT},
@@ -187,14 +186,15 @@ async def generate_affiliate_recommendations(
     ]
 
     user_prompt = f"""SKILL GAPS IDENTIFIED:
-Critical Gaps: {json.dumps(critical_gaps, indent=2)}
+Critical Gaps: {fit_json(critical_gaps, 'affiliate')}
 Missing Keywords: {', '.join(missing_keywords)}
 
 Recommend the top {max_recommendations} most impactful courses to close these gaps.
 Use real platform names and realistic URL structures.
 Focus on what will ACTUALLY help them get hired in 30-90 days."""
 
-    response = await client.chat.completions.create(
+    response = await llm.chat(
+        agent="affiliate",
         model="gpt-4o",
         messages=[
             {"role": "system", "content": AFFILIATE_SYSTEM_PROMPT},
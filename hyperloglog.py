@@ -0,0 +1,74 @@
+"""
+ResumeGod V4.0 — HyperLogLog
+Fixed-size distinct counter for the Spyglass rollups: "unique viewers" for
+a day is a sketch of at most 4 KB instead of every IP address, sketches for
+any range of days merge by taking the register-wise max, and the estimate
+is within ~1.6% (standard error at precision 12). Small cardinalities are
+counted almost exactly (linear counting) and serialized sparsely.
+"""
+import hashlib
+from typing import Iterable, Optional
+
+import numpy as np
+
+HLL_PRECISION = 12  # 2^12 registers
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[np.ndarray] = None):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, value: str):
+        h = _hash64(value)
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1  # position of the first 1 bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HyperLogLog precision {other.p} into {self.p}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        """b"S" + precision + (u16 index, u8 rank) pairs while that is smaller, else b"D" + precision + registers."""
+        used = np.flatnonzero(self.registers)
+        if len(used) * 3 < self.m:
+            return b"S" + bytes([self.p]) + used.astype("<u2").tobytes() + self.registers[used].tobytes()
+        return b"D" + bytes([self.p]) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "HyperLogLog":
+        if not data:
+            return cls()
+        kind, p = data[:1], data[1]
+        if kind == b"D":
+            return cls(p, np.frombuffer(data, dtype=np.uint8, offset=2).copy())
+        if kind != b"S":
+            raise ValueError("Not a HyperLogLog sketch")
+        sketch = cls(p)
+        used = (len(data) - 2) // 3
+        index = np.frombuffer(data, dtype="<u2", count=used, offset=2)
+        sketch.registers[index] = np.frombuffer(data, dtype=np.uint8, count=used, offset=2 + 2 * used)
+        return sketch
@@ -0,0 +1,240 @@
+"""
+ResumeGod V4.0 — Intent router
+Picks the agent for a chat message locally, in well under a millisecond:
+high-precision keyword rules first, then a small linear model (softmax
+regression over hashed word and character n-grams) trained at startup from
+the labelled examples in INTENT_EXAMPLES_PATH. Only messages the model is
+unsure about (confidence < INTENT_CONFIDENCE_THRESHOLD) go to the LLM.
+
+Every decision is appended to INTENT_LOG_PATH as a JSON line carrying the
+same "text"/"agent" fields as the examples file, so reviewed lines can be
+copied into it; the model is retrained from that file on the next start.
+"""
+import os
+import re
+import json
+import math
+import time
+import zlib
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from llm_gateway import llm
+
+AGENTS = ("ATS", "SPYGLASS", "INTERVIEWER", "GHOSTWRITER", "ORCHESTRATOR")
+
+INTENT_EXAMPLES_PATH = os.getenv(
+    "INTENT_EXAMPLES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_examples.jsonl")
+)
+INTENT_LOG_PATH = os.getenv("INTENT_LOG_PATH", "/tmp/resumegod_intents.jsonl")  # empty = don't log
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.6"))
+INTENT_LLM_FALLBACK = os.getenv("INTENT_LLM_FALLBACK", "1").lower() not in ("0", "false", "no")
+INTENT_MODEL = os.getenv("INTENT_MODEL", "gpt-4o-mini")
+INTENT_DIM = 4096  # hashed features
+INTENT_EPOCHS = 300
+INTENT_LEARNING_RATE = 8.0
+INTENT_L2 = 1e-4
+RULE_CONFIDENCE = 0.95
+
+# Phrases that settle the route on their own. A message matching rules for
+# two different agents is left to the model.
+RULES = [
+    (re.compile(r"\bats\b|applicant tracking|resume score|score my (resume|cv)|optimi[sz]e (my )?(resume|cv)|"
+                r"tailor (my )?(resume|cv)|keywords? (am i )?missing|gap analysis", re.I), "ATS"),
+    (re.compile(r"who (viewed|opened|read|looked at)|tracking (link|pixel)|(resume|cv) (views?|opens?|analytics)|"
+                r"(viewed|opened) my (resume|cv|application)", re.I), "SPYGLASS"),
+    (re.compile(r"mock interview|practice interview|interview questions?|grade my answer|star method", re.I),
+     "INTERVIEWER"),
+    (re.compile(r"linkedin (post|headline|about|summary|profile)|cover letter|ghostwrite|"
+                r"recommend (some )?courses", re.I), "GHOSTWRITER"),
+]
+
+ROUTER_SYSTEM_PROMPT = """You route a job seeker's chat message to one ResumeGod agent:
+ATS — scores, optimizes, tailors or fixes the resume against a job description.
+SPYGLASS — resume tracking: who viewed or opened the resume, view stats, tracking links.
+INTERVIEWER — mock interviews, interview questions, grading interview answers.
+GHOSTWRITER — LinkedIn posts/profile, cover letters, outreach messages, course recommendations.
+ORCHESTRATOR — general career advice, salary, offers, greetings, anything else."""
+
+ROUTE_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "route_intent",
+            "description": "Pick the agent that should handle the message",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "agent": {"type": "string", "enum": list(AGENTS)},
+                    "confidence": {"type": "number", "description": "0-1"}
+                },
+                "required": ["agent"]
+            }
+        }
+    }
+]
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def features(text: str) -> np.ndarray:
+    """Hashed feature indices: words, word bigrams and character trigrams of each word."""
+    words = _WORD_RE.findall(text.lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    grams += [f"#{w[i:i + 3]}" for w in (f"<{w}>" for w in words) for i in range(len(w) - 2)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode()) % INTENT_DIM for g in grams), dtype=np.int64))
+
+
+def load_examples(path: str = INTENT_EXAMPLES_PATH) -> list[tuple[str, str]]:
+    examples = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if row.get("agent") in AGENTS and row.get("text"):
+                    examples.append((row["text"], row["agent"]))
+    return examples
+
+
+def train(examples: list[tuple[str, str]], epochs: int = INTENT_EPOCHS) -> tuple[np.ndarray, np.ndarray]:
+    """Full-batch gradient descent on softmax cross-entropy with L2. Returns (weights, bias)."""
+    x = np.zeros((len(examples), INTENT_DIM), dtype=np.float32)
+    y = np.zeros((len(examples), len(AGENTS)), dtype=np.float32)
+    for i, (text, agent) in enumerate(examples):
+        idx = features(text)
+        x[i, idx] = 1 / math.sqrt(max(len(idx), 1))
+        y[i, AGENTS.index(agent)] = 1
+    weights = np.zeros((INTENT_DIM, len(AGENTS)), dtype=np.float32)
+    bias = np.zeros(len(AGENTS), dtype=np.float32)
+    for _ in range(epochs):
+        logits = x @ weights + bias
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        grad = (probs - y) / len(examples)
+        weights -= INTENT_LEARNING_RATE * (x.T @ grad + INTENT_L2 * weights)
+        bias -= INTENT_LEARNING_RATE * grad.sum(axis=0)
+    return weights, bias
+
+
+class IntentRouter:
+    def __init__(self, examples_path: str = INTENT_EXAMPLES_PATH, log_path: str = INTENT_LOG_PATH,
+                 threshold: float = INTENT_CONFIDENCE_THRESHOLD):
+        self.examples_path = examples_path
+        self.log_path = log_path
+        self.threshold = threshold
+        self.weights: Optional[np.ndarray] = None
+        self.bias: Optional[np.ndarray] = None
+        self.examples = 0
+        self.train_ms = 0.0
+        self.decisions = Counter()  # by source: rule, model, llm, fallback, untrained
+        self._lock = threading.Lock()
+        self._log = None
+
+    def load(self, examples: Optional[list[tuple[str, str]]] = None):
+        """Train on the examples file (or the given examples)."""
+        started = time.perf_counter()
+        examples = examples if examples is not None else load_examples(self.examples_path)
+        weights, bias = train(examples)
+        with self._lock:
+            self.weights, self.bias, self.examples = weights, bias, len(examples)
+        self.train_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"[Intent Router] Trained on {len(examples)} examples in {self.train_ms} ms")
+
+    # --- local decision ------------------------------------------------------
+
+    def scores(self, text: str) -> np.ndarray:
+        if self.weights is None:
+            raise RuntimeError("Intent router is not trained; call load() first")
+        idx = features(text)
+        logits = self.weights[idx].sum(axis=0) / math.sqrt(max(len(idx), 1)) + self.bias
+        probs = np.exp(logits - logits.max())
+        return probs / probs.sum()
+
+    def classify(self, text: str) -> dict:
+        """Rules, then the model. Never calls out; ~tens of microseconds."""
+        ruled = {agent for pattern, agent in RULES if pattern.search(text)}
+        if len(ruled) == 1:
+            return {"primary_agent": ruled.pop(), "confidence": RULE_CONFIDENCE, "source": "rule"}
+        if self.weights is None:  # startup training failed; never train on the event loop
+            return {"primary_agent": "ORCHESTRATOR", "confidence": 0.0, "source": "untrained"}
+        probs = self.scores(text)
+        best = int(np.argmax(probs))
+        return {"primary_agent": AGENTS[best], "confidence": round(float(probs[best]), 3), "source": "model"}
+
+    # --- routing -------------------------------------------------------------
+
+    async def _ask_llm(self, message: str, history: Optional[list[dict]]) -> dict:
+        recent = "\n".join(f"{m['role'].upper()}: {m['content'][:300]}" for m in (history or [])[-2:]
+                           if m["role"] != "system")
+        response = await llm.chat(
+            agent="orchestrator",
+            model=INTENT_MODEL,
+            max_tokens=50,
+            temperature=0,
+            messages=[
+                {"role": "system", "content": ROUTER_SYSTEM_PROMPT},
+                {"role": "user", "content": f"RECENT CONVERSATION:\n{recent}\n\nMESSAGE: {message}" if recent
+                 else f"MESSAGE: {message}"}
+            ],
+            tools=ROUTE_TOOLS,
+            tool_choice={"type": "function", "function": {"name": "route_intent"}},
+        )
+        picked = json.loads(response.choices[0].message.tool_calls[0].function.arguments)
+        if picked.get("agent") not in AGENTS:
+            raise ValueError(f"LLM routed to unknown agent {picked.get('agent')!r}")
+        return {"primary_agent": picked["agent"], "confidence": float(picked.get("confidence") or 0.8),
+                "source": "llm"}
+
+    async def route(self, message: str, history: Optional[list[dict]] = None,
+                    context: Optional[dict] = None, llm_fallback: bool = INTENT_LLM_FALLBACK) -> dict:
+        """Route a message; with llm_fallback=False the local decision stands however unsure it is."""
+        started = time.perf_counter()
+        local = self.classify(message)
+        decision = local
+        if local["confidence"] < self.threshold and llm_fallback:
+            try:
+                decision = await self._ask_llm(message, history)
+            except Exception as e:
+                print(f"[Intent Router] LLM fallback failed, keeping local route: {e}")
+                decision = dict(local, source="fallback")
+        decision["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        self.decisions[decision["source"]] += 1
+        self.log(message, decision, local)
+        return decision
+
+    def log(self, message: str, decision: dict, local: dict):
+        if not self.log_path:
+            return
+        line = json.dumps({
+            "at": datetime.utcnow().isoformat(),
+            "text": message[:500],
+            "agent": decision["primary_agent"],
+            "confidence": decision["confidence"],
+            "source": decision["source"],
+            "local_agent": local["primary_agent"],
+            "local_confidence": local["confidence"],
+        })
+        try:
+            with self._lock:
+                if self._log is None:
+                    self._log = open(self.log_path, "a", buffering=1)
+                self._log.write(line + "\n")
+        except OSError as e:
+            print(f"[Intent Router] Decision log unavailable: {e}")
+            self.log_path = ""
+
+    def stats(self) -> dict:
+        total = sum(self.decisions.values())
+        return {
+            "examples": self.examples,
+            "train_ms": self.train_ms,
+            "decisions": dict(self.decisions),
+            "local_rate": round((self.decisions["rule"] + self.decisions["model"]) / total, 3) if total else 0.0,
+        }
+
+
+intent_router = IntentRouter()
@@ -6,10 +6,11 @@ Persona: Sharp, professional, like a senior FAANG interviewer.
 """
 import os
 import json
-from typing import Optional
-from openai import AsyncOpenAI
-
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import asyncio
+from typing import AsyncIterator, Optional
+from llm_gateway import llm
+from prompt_budget import fit_resume, fit_jd, fit_json
+from resume_parser import agent_slice
 
 INTERVIEWER_SYSTEM_PROMPT = """You are The Interviewer — a senior talent acquisition specialist with 15 years at top-tier tech companies.
 Your interrogation style is precise, probing, and designed to expose gaps between what a resume claims and what a candidate actually knows.
@@ -32,15 +33,24 @@ Score from 0-10 using this rubric:
 
 Be brutally honest. No participation trophies. A score of 7 means genuinely good."""
 
+LIVE_INTERVIEW_PROMPT = """You are running a live mock interview over chat.
+Each turn after the candidate answers:
+1. Grade the answer: "Score: X/10", one line on what worked, one on what was missing.
+2. Ask the next question — exactly one, no preamble.
+Keep every turn under 120 words. Never answer your own questions.
+When the candidate says they are done (or you run out of questions), give a 3-line overall verdict."""
+
 
 async def generate_interview_questions(
     resume_text: str,
     job_description: str,
     gap_analysis: Optional[dict] = None,
-    count: int = 5
+    count: int = 5,
+    parsed: Optional[dict] = None
 ) -> list[dict]:
     """
     Generate targeted interview questions based on resume weaknesses and JD requirements.
+    With `parsed` (resume_parser), only the recent roles, projects and skills are sent.
     """
 
     gaps_context = ""
@@ -48,7 +58,7 @@ async def generate_interview_questions(
         gaps_context = f"""
 Known weakness areas from resume analysis:
 - ATS Score: {gap_analysis.get('ats_score_before', 'N/A')}/100
-- Critical Gaps: {json.dumps(gap_analysis.get('critical_gaps', []), indent=2)}
+- Critical Gaps: {fit_json(gap_analysis.get('critical_gaps', []), 'interviewer')}
 - Missing Keywords: {', '.join(gap_analysis.get('keywords_missing', []))}
 """
 
@@ -109,18 +119,20 @@ Known weakness areas from resume analysis:
         }
     ]
 
+    resume_block = agent_slice(parsed, "interviewer") if parsed else resume_text
     user_prompt = f"""RESUME:
-{resume_text}
+{fit_resume(resume_block, "interviewer")}
 
 TARGET JOB DESCRIPTION:
-{job_description}
+{fit_jd(job_description, "interviewer")}
 
 {gaps_context}
 
 Generate {count} killer interview questions. Target the weakest parts of this resume.
 Include at least 2 technical depth questions, 2 behavioral (STAR-format expected), and 1 gap probe."""
 
-    response = await client.chat.completions.create(
+    response = await llm.chat(
+        agent="interviewer",
         model="gpt-4o",
         messages=[
             {"role": "system", "content": INTERVIEWER_SYSTEM_PROMPT},
@@ -135,6 +147,80 @@ Include at least 2 technical depth questions, 2 behavioral (STAR-format expected
     return result
 
 
+GRADE_CONCURRENCY = int(os.getenv("GRADE_CONCURRENCY", "10"))  # grading calls in flight per batch
+GRADE_PACK_SIZE = int(os.getenv("GRADE_PACK_SIZE", "4"))  # short Q/A pairs per packed call (1 = never pack)
+GRADE_PACK_MAX_CHARS = int(os.getenv("GRADE_PACK_MAX_CHARS", "600"))  # answers longer than this get their own call
+
+GRADE_PROPERTIES = {
+    "score": {
+        "type": "number",
+        "description": "Score from 0-10"
+    },
+    "verdict": {
+        "type": "string",
+        "enum": ["reject", "weak", "acceptable", "strong", "exceptional"]
+    },
+    "strengths": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "What they did well"
+    },
+    "weaknesses": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "What was missing or vague"
+    },
+    "coaching_note": {
+        "type": "string",
+        "description": "Specific, actionable advice to improve this answer"
+    },
+    "improved_answer_snippet": {
+        "type": "string",
+        "description": "First 2 sentences of how they should have opened this answer"
+    }
+}
+GRADE_REQUIRED = ["score", "verdict", "strengths", "weaknesses", "coaching_note"]
+
+GRADE_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "grade_interview_answer",
+            "description": "Grade a candidate's answer",
+            "parameters": {
+                "type": "object",
+                "properties": GRADE_PROPERTIES,
+                "required": GRADE_REQUIRED
+            }
+        }
+    }
+]
+
+GRADE_BATCH_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "grade_interview_answers",
+            "description": "Grade several of a candidate's answers, each one independently",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "grades": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {"question_id": {"type": "string"}, **GRADE_PROPERTIES},
+                            "required": ["question_id", *GRADE_REQUIRED]
+                        }
+                    }
+                },
+                "required": ["grades"]
+            }
+        }
+    }
+]
+
+
 async def grade_answer(
     question: str,
     user_answer: str,
@@ -146,48 +232,6 @@ async def grade_answer(
     Returns score, feedback, and what was missing.
     """
 
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "grade_interview_answer",
-                "description": "Grade a candidate's answer",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "score": {
-                            "type": "number",
-                            "description": "Score from 0-10"
-                        },
-                        "verdict": {
-                            "type": "string",
-                            "enum": ["reject", "weak", "acceptable", "strong", "exceptional"]
-                        },
-                        "strengths": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "What they did well"
-                        },
-                        "weaknesses": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "What was missing or vague"
-                        },
-                        "coaching_note": {
-                            "type": "string",
-                            "description": "Specific, actionable advice to improve this answer"
-                        },
-                        "improved_answer_snippet": {
-                            "type": "string",
-                            "description": "First 2 sentences of how they should have opened this answer"
-                        }
-                    },
-                    "required": ["score", "verdict", "strengths", "weaknesses", "coaching_note"]
-                }
-            }
-        }
-    ]
-
     user_prompt = f"""INTERVIEW QUESTION: {question}
 QUESTION CATEGORY: {category}
 
@@ -199,13 +243,14 @@ BENCHMARK MODEL ANSWER (9/10 quality):
 
 Grade this answer. Be honest — this person's career depends on accurate feedback."""
 
-    response = await client.chat.completions.create(
+    response = await llm.chat(
+        agent="interviewer",
         model="gpt-4o",
         messages=[
             {"role": "system", "content": GRADER_SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt}
         ],
-        tools=tools,
+        tools=GRADE_TOOLS,
         tool_choice={"type": "function", "function": {"name": "grade_interview_answer"}},
         temperature=0.4,
     )
@@ -213,20 +258,148 @@ Grade this answer. Be honest — this person's career depends on accurate feedba
     return json.loads(response.choices[0].message.tool_calls[0].function.arguments)
 
 
+async def grade_answer_pack(items: list[dict]) -> dict[str, dict]:
+    """
+    Grade several short Q/A pairs in one call. Items need question_id, question,
+    answer, model_answer, category. Returns {question_id: grade} for the grades
+    the model returned; callers grade anything missing on its own.
+    """
+    blocks = "\n\n".join(f"""--- QUESTION_ID: {item['question_id']}
+INTERVIEW QUESTION: {item['question']}
+QUESTION CATEGORY: {item.get('category', 'general')}
+
+CANDIDATE'S ANSWER:
+{item['answer']}
+
+BENCHMARK MODEL ANSWER (9/10 quality):
+{item.get('model_answer', '')}""" for item in items)
+
+    user_prompt = f"""{blocks}
+
+Grade each of these {len(items)} answers on its own merits — one entry per QUESTION_ID.
+Be honest — this person's career depends on accurate feedback."""
+
+    response = await llm.chat(
+        agent="interviewer",
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": GRADER_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        tools=GRADE_BATCH_TOOLS,
+        tool_choice={"type": "function", "function": {"name": "grade_interview_answers"}},
+        temperature=0.4,
+    )
+
+    grades = json.loads(response.choices[0].message.tool_calls[0].function.arguments).get("grades") or []
+    wanted = {str(item["question_id"]) for item in items}
+    return {str(g.get("question_id")): g for g in grades if str(g.get("question_id")) in wanted}
+
+
+def _overall_score(grades: list[dict]) -> Optional[float]:
+    scores = [float(g["score"]) for g in grades if isinstance(g.get("score"), (int, float))]
+    return round(sum(scores) / len(scores), 1) if scores else None
+
+
+async def grade_answers(items: list[dict], concurrency: int = GRADE_CONCURRENCY) -> dict:
+    """
+    Grade a whole mock interview concurrently. Items: [{question_id, question,
+    answer, model_answer, category}]. Answers under GRADE_PACK_MAX_CHARS are
+    packed GRADE_PACK_SIZE to a call; the rest get one call each. At most
+    `concurrency` calls are in flight. A failed grade becomes {"error": ...}
+    and is left out of overall_score.
+    """
+    # The model hands ids back as strings; key everything by str(question_id).
+    ids = [i["question_id"] for i in items]
+    items = [dict(i, question_id=str(i["question_id"])) for i in items]
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    grades: dict[str, dict] = {}
+
+    async def single(item: dict):
+        async with semaphore:
+            try:
+                grades[item["question_id"]] = await grade_answer(
+                    item["question"], item["answer"], item.get("model_answer", ""), item.get("category", "general")
+                )
+            except Exception as e:
+                grades[item["question_id"]] = {"error": f"{type(e).__name__}: {e}"}
+
+    async def packed(pack: list[dict]):
+        async with semaphore:
+            try:
+                got = await grade_answer_pack(pack)
+            except Exception as e:
+                print(f"[Interviewer] Packed grading failed ({e}); grading {len(pack)} answers one by one")
+                got = {}
+        grades.update(got)
+        await asyncio.gather(*(single(item) for item in pack if item["question_id"] not in got))
+
+    packable = GRADE_PACK_SIZE > 1
+    short = [i for i in items if packable and len(i["answer"]) <= GRADE_PACK_MAX_CHARS]
+    long = [i for i in items if not (packable and len(i["answer"]) <= GRADE_PACK_MAX_CHARS)]
+    packs = [short[n:n + GRADE_PACK_SIZE] for n in range(0, len(short), GRADE_PACK_SIZE)]
+    await asyncio.gather(*(single(i) for i in long), *(packed(p) if len(p) > 1 else single(p[0]) for p in packs))
+
+    ordered = [dict(grades[i["question_id"]], question_id=qid) for i, qid in zip(items, ids)]
+    return {"grades": ordered, "overall_score": _overall_score(ordered)}
+
+
+def live_interview_messages(context: dict, history: list[dict], message: str) -> list[dict]:
+    """Prompt for one live-interview turn. `context` holds the resume slice,
+    JD and (optionally) banked questions to work through, set at session start;
+    `history` is ConversationMemory.prompt_messages() (summary + recent turns)."""
+    system = f"{INTERVIEWER_SYSTEM_PROMPT}\n\n{LIVE_INTERVIEW_PROMPT}"
+    if context.get("resume_brief"):
+        system += f"\n\nRESUME:\n{context['resume_brief']}"
+    if context.get("job_description"):
+        system += f"\n\nTARGET JOB DESCRIPTION:\n{fit_jd(context['job_description'], 'interviewer')}"
+    if context.get("questions"):
+        listed = "\n".join(f"{n}. {q}" for n, q in enumerate(context["questions"], start=1))
+        system += f"\n\nWork through these questions in order:\n{listed}"
+    return [
+        {"role": "system", "content": system},
+        *({"role": m["role"], "content": m["content"]} for m in history),
+        {"role": "user", "content": message},
+    ]
+
+
+async def stream_live_interview_turn(messages: list[dict]) -> AsyncIterator[str]:
+    """Text deltas of the interviewer's reply (grading feedback, then the next question).
+    Closing the generator aborts the upstream stream."""
+    stream = llm.stream_chat(agent="chat", model="gpt-4o", messages=messages, temperature=0.6)
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.aclose()
+
+
 async def run_interview_agent(
     resume_text: str,
     job_description: str,
     gap_analysis: Optional[dict] = None,
-    mode: str = "generate"  # "generate" | "grade"
+    mode: str = "generate",  # "generate" | "grade"
+    parsed: Optional[dict] = None,
+    answers: Optional[list[dict]] = None
 ) -> dict:
-    """Entry point for the Interviewer agent."""
+    """Entry point for the Interviewer agent. mode="grade" grades `answers` (see grade_answers)."""
 
     if mode == "generate":
-        result = await generate_interview_questions(resume_text, job_description, gap_analysis)
+        result = await generate_interview_questions(resume_text, job_description, gap_analysis, parsed=parsed)
         return {
             "agent": "interviewer",
             "mode": "questions_generated",
             "data": result
         }
 
+    if mode == "grade":
+        if not answers:
+            return {"agent": "interviewer", "error": "No answers to grade"}
+        return {
+            "agent": "interviewer",
+            "mode": "answers_graded",
+            "data": await grade_answers(answers)
+        }
+
     return {"agent": "interviewer", "error": "Invalid mode"}
@@ -0,0 +1,266 @@
+"""
+ResumeGod V4.0 — Live interview channel
+The stateful mock interview behind /ws/chat/{session_id}. The session's
+memory (conversation_memory) is loaded once per connection; each turn
+streams the Interviewer's grading feedback and next question token by
+token, and the turn's two messages are appended when it ends.
+
+Protocol (JSON frames):
+    client → {"type": "start", "resume_id": ..., "job_description": ...}   optional: interview this resume
+             {"type": "message", "message": "..."}                          an answer; starts a turn
+             {"type": "cancel"}                                             abort the turn in progress
+    server → {"type": "session", "session_id", "turns", "context"}
+             {"type": "token", "content"}      deltas coalesced into ~CHAT_FRAME_MS frames
+             {"type": "done", "turn", "frames", "deltas"}
+             {"type": "cancelled", "turn"}
+             {"type": "error", "message"}
+"""
+import os
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from models import SessionLocal, Resume
+from conversation_memory import ConversationMemory
+from interview_agent import live_interview_messages, stream_live_interview_turn
+from prompt_budget import fit_resume
+from resume_parser import agent_slice, is_current, parse_resume
+from question_bank import question_bank
+
+CHAT_FRAME_MS = float(os.getenv("CHAT_FRAME_MS", "30"))  # 0 = send each delta as soon as it arrives
+CHAT_FRAME_MAX_CHARS = int(os.getenv("CHAT_FRAME_MAX_CHARS", "2048"))  # flush early past this
+CHAT_OPENING_MESSAGE = "I'm ready. Ask your first question."
+
+
+class FrameCoalescer:
+    """
+    Buffers text deltas and sends them as one "token" frame per interval.
+    The first delta goes out at once; later ones are held until the frame
+    window since the last send has passed (or the buffer is large).
+    """
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]], interval_ms: float = CHAT_FRAME_MS):
+        self.send = send
+        self.interval = interval_ms / 1000
+        self.frames = 0
+        self.deltas = 0
+        self._buffer: list[str] = []
+        self._size = 0
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    def push(self, text: str):
+        self._buffer.append(text)
+        self._size += len(text)
+        self.deltas += 1
+        self._wakeup.set()
+
+    async def _flush(self):
+        if self._buffer:
+            text = "".join(self._buffer)
+            self._buffer.clear()
+            self._size = 0
+            await self.send({"type": "token", "content": text})
+            self.frames += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last = -self.interval
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            wait = self.interval - (loop.time() - last)
+            while wait > 0 and not self._closed and self._size < CHAT_FRAME_MAX_CHARS:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)  # woken early by close/large buffer
+                    self._wakeup.clear()
+                except asyncio.TimeoutError:
+                    pass
+                wait = self.interval - (loop.time() - last)
+            await self._flush()
+            last = loop.time()
+            if self._closed:
+                return
+
+    async def close(self):
+        """Send whatever is buffered and stop."""
+        self._closed = True
+        self._wakeup.set()
+        await self._task
+
+    def abort(self):
+        self._task.cancel()
+
+
+class ChatSession:
+    """A session's memory, held for the life of one connection."""
+
+    def __init__(self, memory: ConversationMemory):
+        self.memory = memory
+        self.session_id = memory.session_id
+        self.context = memory.context
+
+    @property
+    def turns(self) -> int:
+        return self.memory.turn_count
+
+    @classmethod
+    def load(cls, session_id: str, user_email: Optional[str]) -> Optional["ChatSession"]:
+        """Load the session; with user_email, an unknown id starts a new one for that user."""
+        memory = ConversationMemory.open(session_id, user_email, agent="interviewer")
+        return cls(memory) if memory else None
+
+    def save_turn(self, *messages: dict):
+        """Append the turn's messages; queue a summary if older turns have piled up."""
+        self.memory.append(*messages)
+        self.memory.schedule_summary()
+
+    def prepare(self, resume_id: Optional[str], job_description: Optional[str]) -> Optional[str]:
+        """Interview context for a resume: its Interviewer slice and the JD (saved
+        with the session). Returns the resume text (None without a resume)."""
+        context = {"resume_id": resume_id, "job_description": job_description or ""}
+        raw_text = None
+        if resume_id:
+            db = SessionLocal()
+            try:
+                resume = db.get(Resume, resume_id)
+                if resume is None or not resume.raw_text:
+                    raise ValueError(f"Unknown resume {resume_id}")
+                raw_text, parsed = resume.raw_text, resume.parsed
+                context["job_description"] = job_description or resume.job_description or ""
+            finally:
+                db.close()
+            parsed = parsed if is_current(parsed) else parse_resume(raw_text)
+            context["resume_brief"] = fit_resume(agent_slice(parsed, "interviewer"), "interviewer")
+        self.context = context
+        return raw_text
+
+    def attach_banked_questions(self, raw_text: str):
+        """Questions from the question bank for this resume+JD, if it has them (event loop only)."""
+        hit = question_bank.lookup(raw_text, self.context["job_description"] or "Software Engineer", 5)
+        if hit:
+            self.context["questions"] = [q["question"] for q in hit["questions"].get("questions", [])]
+
+    def save_context(self):
+        self.memory.save_context(self.context, "interviewer")
+
+
+def _session_frame(session: ChatSession) -> dict:
+    return {"type": "session", "session_id": session.session_id, "turns": session.turns,
+            "context": {k: v for k, v in session.context.items() if k != "resume_brief"}}
+
+
+async def _send(websocket: WebSocket, frame: dict):
+    try:
+        await websocket.send_json(frame)
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # client went away; the turn still ends (and is saved) normally
+
+
+async def run_turn(websocket: WebSocket, session: ChatSession, message: str, cancel: asyncio.Event,
+                   visible: bool = True):
+    """Stream one Interviewer reply. Setting `cancel` aborts the upstream
+    stream (only the stream: a cancel arriving after it ended is a no-op);
+    the partial reply is kept, marked cancelled. The turn is saved before
+    "done"/"cancelled" is sent, so the client can answer right away."""
+    turn = session.turns + 1
+    coalescer = FrameCoalescer(lambda frame: _send(websocket, frame))
+    reply: list[str] = []
+    stream = stream_live_interview_turn(
+        live_interview_messages(session.context, session.memory.prompt_messages(), message)
+    )
+
+    async def consume():
+        async for delta in stream:
+            reply.append(delta)
+            coalescer.push(delta)
+
+    async def finish(status: str):
+        if reply:
+            user = {"role": "user", "content": message, "hidden": not visible}
+            assistant = {"role": "assistant", "content": "".join(reply), "status": status if status != "done" else None}
+            await asyncio.to_thread(session.save_turn, user, assistant)
+
+    consumer = asyncio.create_task(consume())
+    cancelled = asyncio.create_task(cancel.wait())
+    await asyncio.wait({consumer, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+    cancelled.cancel()
+    if not consumer.done():
+        consumer.cancel()
+    try:
+        await consumer
+    except asyncio.CancelledError:
+        await stream.aclose()
+        await coalescer.close()
+        await finish("cancelled")
+        await _send(websocket, {"type": "cancelled", "turn": turn})
+    except Exception as e:
+        coalescer.abort()
+        print(f"[Interviewer] Live turn failed for {session.session_id}: {e}")
+        await finish("error")
+        await _send(websocket, {"type": "error", "message": f"Interviewer unavailable: {type(e).__name__}"})
+    else:
+        await coalescer.close()
+        await finish("done")
+        await _send(websocket, {"type": "done", "turn": turn, "frames": coalescer.frames,
+                                "deltas": coalescer.deltas})
+
+
+async def run_interview_channel(websocket: WebSocket, session_id: str, user_email: Optional[str] = None):
+    await websocket.accept()
+    session = await asyncio.to_thread(ChatSession.load, session_id, user_email)
+    if session is None:
+        await websocket.send_json({"type": "error", "message": f"Unknown session {session_id}; pass user_email"})
+        await websocket.close(code=4404)
+        return
+    await websocket.send_json(_session_frame(session))
+
+    turn_task: Optional[asyncio.Task] = None
+    cancel = asyncio.Event()
+    try:
+        while True:
+            try:
+                payload = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "message": "Frames must be JSON"})
+                continue
+            kind = payload.get("type", "message")
+            if kind == "cancel":
+                cancel.set()
+                continue
+            if turn_task is not None and not turn_task.done():
+                await websocket.send_json({"type": "error", "message": "A turn is in progress; cancel it first"})
+                continue
+            if kind == "start":
+                try:
+                    raw_text = await asyncio.to_thread(session.prepare, payload.get("resume_id"),
+                                                       payload.get("job_description"))
+                except ValueError as e:
+                    await websocket.send_json({"type": "error", "message": str(e)})
+                    continue
+                if raw_text:
+                    session.attach_banked_questions(raw_text)
+                await asyncio.to_thread(session.save_context)
+                await websocket.send_json(_session_frame(session))
+                cancel = asyncio.Event()
+                turn_task = asyncio.create_task(run_turn(websocket, session, CHAT_OPENING_MESSAGE, cancel,
+                                                         visible=False))
+            elif kind == "message" and (payload.get("message") or "").strip():
+                cancel = asyncio.Event()
+                turn_task = asyncio.create_task(run_turn(websocket, session, payload["message"].strip(), cancel))
+            else:
+                await websocket.send_json({"type": "error", "message": f"Unsupported frame {kind!r}"})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"[Interviewer] Channel {session_id} closed: {e}")
+        try:
+            await websocket.close(code=1011)
+        except RuntimeError:
+            pass
+    finally:
+        if turn_task is not None and not turn_task.done():
+            cancel.set()  # the partial reply is still saved
+            await asyncio.gather(turn_task, return_exceptions=True)
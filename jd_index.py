@@ -0,0 +1,186 @@
+"""
+ResumeGod V4.0 — JD index for batch matching
+One resume against hundreds/thousands of job descriptions in one pass.
+Each JD's weighted keywords (ats_scorer, IDF fitted on the whole corpus)
+become a row of a sparse CSR matrix over a shared vocabulary. The arrays
+are written as .npy files and memory-mapped on load, so an index is built
+once and reused by every process. Scoring a resume is: index its text
+against the vocabulary, gather the matched weights, and sum them per row.
+
+Layout of <JD_INDEX_DIR>/<index_id>/:
+    vocab.json   term list (column ids)
+    ids.json     JD ids (row ids)
+    indptr.npy / indices.npy / data.npy   CSR rows, weights normalized per row
+    jds.jsonl + offsets.npy               JD texts, for the LLM rewrite step
+"""
+import os
+import json
+import uuid
+import shutil
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from ats_scorer import ATSScorer, ResumeIndex, SCORER_VERSION
+from caching import LockedLRUCache
+
+JD_INDEX_DIR = os.getenv("JD_INDEX_DIR", "/tmp/resumegod_jd_index")
+JD_INDEX_CACHE = int(os.getenv("JD_INDEX_CACHE", "8"))  # loaded indexes kept open
+
+
+class JDIndexError(ValueError):
+    pass
+
+
+class JDIndex:
+    def __init__(self, path: str, ids: list, vocab: list, indptr: np.ndarray, indices: np.ndarray,
+                 data: np.ndarray, offsets: np.ndarray):
+        self.path = path
+        self.ids = ids
+        self.rows = {jd_id: i for i, jd_id in enumerate(ids)}
+        self.vocab = vocab
+        self.vocab_set = frozenset(vocab)
+        self.term_ids = {t: i for i, t in enumerate(vocab)}
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def index_id(self) -> str:
+        return os.path.basename(self.path)
+
+    # --- build / load --------------------------------------------------------
+
+    @classmethod
+    def build(cls, jds: list[dict], root: str = JD_INDEX_DIR, index_id: Optional[str] = None) -> "JDIndex":
+        """jds: [{"id": ..., "text": ...}]. Writes the index atomically and returns it loaded."""
+        if not jds:
+            raise JDIndexError("No job descriptions given")
+        ids = [str(jd.get("id", i)) for i, jd in enumerate(jds)]
+        if len(set(ids)) != len(ids):
+            raise JDIndexError("JD ids must be unique")
+        texts = [jd.get("text") or "" for jd in jds]
+
+        scorer = ATSScorer.fit(texts)
+        term_ids: dict[str, int] = {}
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        cols, vals = [], []
+        for row, text in enumerate(texts):
+            kw = scorer.keywords(text)
+            cols.extend(term_ids.setdefault(t, len(term_ids)) for t in kw.terms)
+            vals.append(kw.weights / kw.total)
+            indptr[row + 1] = indptr[row] + len(kw.terms)
+
+        index_id = index_id or uuid.uuid4().hex
+        path = os.path.join(root, index_id)
+        os.makedirs(root, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=root, prefix=".build-")
+        try:
+            np.save(os.path.join(tmp, "indptr.npy"), indptr)
+            np.save(os.path.join(tmp, "indices.npy"), np.asarray(cols, dtype=np.int32))
+            np.save(os.path.join(tmp, "data.npy"),
+                    np.concatenate(vals).astype(np.float32) if vals else np.zeros(0, np.float32))
+            offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+            with open(os.path.join(tmp, "jds.jsonl"), "wb") as f:
+                for row, text in enumerate(texts):
+                    f.write(json.dumps(text).encode() + b"\n")
+                    offsets[row + 1] = f.tell()
+            np.save(os.path.join(tmp, "offsets.npy"), offsets)
+            with open(os.path.join(tmp, "vocab.json"), "w") as f:
+                json.dump(list(term_ids), f)
+            with open(os.path.join(tmp, "ids.json"), "w") as f:
+                json.dump(ids, f)
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump({"scorer": SCORER_VERSION, "jds": len(ids), "vocab": len(term_ids)}, f)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(tmp, path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> "JDIndex":
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            raise JDIndexError(f"No JD index at {path}")
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("scorer") != SCORER_VERSION:
+            raise JDIndexError(f"JD index built with scorer {meta.get('scorer')}; rebuild it")
+        with open(os.path.join(path, "vocab.json")) as f:
+            vocab = json.load(f)
+        with open(os.path.join(path, "ids.json")) as f:
+            ids = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                  for name in ("indptr", "indices", "data", "offsets")}
+        return cls(path, ids, vocab, **arrays)
+
+    # --- scoring -------------------------------------------------------------
+
+    def resume_vector(self, resume_text: str) -> np.ndarray:
+        """Boolean presence of every vocabulary term in the resume."""
+        present = np.zeros(len(self.vocab), dtype=bool)
+        terms = ResumeIndex(resume_text, self.vocab_set).terms
+        if terms:
+            present[[self.term_ids[t] for t in terms]] = True
+        return present
+
+    def score(self, resume_text: str) -> np.ndarray:
+        """Match score (0-100) against every JD, in row order."""
+        return self._scores(self.resume_vector(resume_text))
+
+    def _scores(self, present: np.ndarray) -> np.ndarray:
+        contrib = np.where(present[self.indices], self.data, 0).astype(np.float64)
+        cum = np.concatenate(([0.0], np.cumsum(contrib)))
+        return (cum[self.indptr[1:]] - cum[self.indptr[:-1]]) * 100
+
+    def top_k(self, resume_text: str, k: int = 10) -> list[dict]:
+        present = self.resume_vector(resume_text)
+        scores = self._scores(present)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for rank, row in enumerate(top, start=1):
+            cols = self.indices[self.indptr[row]:self.indptr[row + 1]]
+            hit = present[cols]
+            results.append({
+                "rank": rank,
+                "jd_id": self.ids[row],
+                "score": round(float(scores[row]), 1),
+                "matched": [self.vocab[c] for c in cols[hit]],
+                "missing": [self.vocab[c] for c in cols[~hit]],
+            })
+        return results
+
+    def text(self, jd_id: str) -> str:
+        row = self.rows[jd_id]
+        with open(os.path.join(self.path, "jds.jsonl"), "rb") as f:
+            f.seek(int(self.offsets[row]))
+            return json.loads(f.read(int(self.offsets[row + 1] - self.offsets[row])))
+
+
+_loaded = LockedLRUCache(maxsize=JD_INDEX_CACHE)  # get_index/build_index run in to_thread workers
+
+
+def get_index(index_id: str, root: str = JD_INDEX_DIR) -> JDIndex:
+    """Load (memory-mapped) and keep the most recently used indexes open."""
+    if not index_id or os.path.sep in index_id or index_id.startswith("."):
+        raise JDIndexError(f"Invalid index id {index_id!r}")
+    index = _loaded.get(index_id)
+    if index is None:
+        index = JDIndex.load(os.path.join(root, index_id))
+        _loaded.set(index_id, index)
+    return index
+
+
+def build_index(jds: list[dict], root: str = JD_INDEX_DIR) -> JDIndex:
+    index = JDIndex.build(jds, root)
+    _loaded.set(index.index_id, index)
+    return index
@@ -0,0 +1,297 @@
+"""
+ResumeGod V4.0 — Background job queue
+Durable jobs in the `jobs` table, executed by a pool of asyncio workers.
+Routes enqueue and return immediately; clients poll the job row or
+subscribe to its stage events. Running jobs heartbeat their row; a job
+whose heartbeat goes stale (its process died) is re-queued, so nothing
+queued is lost across restarts — also with several uvicorn workers
+sharing one database.
+"""
+import os
+import asyncio
+import traceback
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import update
+
+from models import SessionLocal, Job
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))  # seconds, for jobs enqueued elsewhere
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "60"))  # seconds without heartbeat = orphaned
+JOB_EVENT_BUFFER = 256  # per subscriber
+JOB_ERROR_BACKOFF = 1.0  # seconds before a worker retries after a DB error, doubling per failure
+JOB_ERROR_BACKOFF_CAP = 30.0
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class JobContext:
+    """Handed to job handlers for progress reporting."""
+
+    def __init__(self, queue: "JobQueue", job: Job):
+        self.queue = queue
+        self.job_id = job.id
+        self.payload = job.payload or {}
+        self.resume_id = job.resume_id
+        self.stage_timings: dict = {}
+        self._dirty: dict = {}  # row fields not written yet
+        self._writer: Optional[asyncio.Task] = None
+
+    def stage(self, event: dict, progress: Optional[float] = None):
+        """
+        Record a stage transition (agent_dag event shape) and fan it out.
+        Subscribers get the event at once; the row is written in a thread,
+        one write at a time, coalescing transitions that arrive meanwhile.
+        """
+        name = event.get("node") or event.get("stage")
+        if name:
+            timing = self.stage_timings.setdefault(name, {})
+            timing["status"] = event.get("status")
+            timing["start_ms" if event.get("status") == "started" else "end_ms"] = event.get("at_ms")
+        self._dirty["stage_timings"] = dict(self.stage_timings)
+        if progress is not None:
+            self._dirty["progress"] = progress
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write())
+        self.queue.publish(self.job_id, {"type": "stage", **event, "progress": progress})
+
+    async def _write(self):
+        while self._dirty:
+            fields, self._dirty = self._dirty, {}
+            try:
+                await asyncio.to_thread(self.queue._update, self.job_id, **fields)
+            except Exception as e:
+                print(f"[Job Queue] Progress write for {self.job_id[:8]} failed: {e}")
+
+    async def flush(self):
+        """Wait for pending progress writes, so they can't land after the final status."""
+        if self._writer is not None:
+            await self._writer
+
+
+Handler = Callable[[JobContext], Awaitable[dict]]
+
+
+def job_to_dict(job: Job) -> dict:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "resume_id": job.resume_id,
+        "progress": job.progress,
+        "stage_timings": job.stage_timings or {},
+        "result": job.result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._handlers: dict[str, Handler] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._running: set[str] = set()
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    # --- persistence ---------------------------------------------------------
+
+    def _update(self, job_id: str, **fields):
+        db = SessionLocal()
+        try:
+            db.execute(update(Job).where(Job.id == job_id).values(updated_at=datetime.utcnow(), **fields))
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        db = SessionLocal()
+        try:
+            job = db.get(Job, job_id)
+            return job_to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def enqueue(self, kind: str, payload: dict, resume_id: Optional[str] = None) -> str:
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        db = SessionLocal()
+        try:
+            job = Job(kind=kind, payload=payload, resume_id=resume_id, stage_timings={})
+            db.add(job)
+            db.commit()
+            job_id = job.id
+        finally:
+            db.close()
+        if self._wakeup is not None:
+            # Callers enqueue from asyncio.to_thread workers; the event belongs to the loop.
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return job_id
+
+    def _claim(self) -> Optional[Job]:
+        """Atomically move the oldest queued job to running (safe across processes)."""
+        db = SessionLocal()
+        try:
+            for _ in range(5):
+                candidate = (
+                    db.query(Job.id)
+                    .filter(Job.status == "queued", Job.kind.in_(list(self._handlers)))
+                    .order_by(Job.created_at)
+                    .first()
+                )
+                if candidate is None:
+                    return None
+                claimed = db.execute(
+                    update(Job)
+                    .where(Job.id == candidate.id, Job.status == "queued")
+                    .values(status="running", started_at=datetime.utcnow(), attempts=Job.attempts + 1)
+                )
+                db.commit()
+                if claimed.rowcount == 1:
+                    job = db.get(Job, candidate.id)
+                    db.expunge(job)
+                    return job
+            return None  # lost every race; try again on the next wakeup
+        finally:
+            db.close()
+
+    def recover(self) -> int:
+        """Re-queue jobs whose heartbeat went stale; fail the ones out of attempts."""
+        stale_before = datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER)
+        db = SessionLocal()
+        try:
+            orphans = (
+                db.query(Job)
+                .filter(Job.status == "running", Job.updated_at < stale_before)
+                .all()
+            )
+            for job in orphans:
+                if (job.attempts or 0) >= JOB_MAX_ATTEMPTS:
+                    job.status = "failed"
+                    job.error = "worker died too many times"
+                    job.finished_at = datetime.utcnow()
+                else:
+                    job.status = "queued"
+            db.commit()
+            return len(orphans)
+        finally:
+            db.close()
+
+    # --- events --------------------------------------------------------------
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=JOB_EVENT_BUFFER)
+        self._subscribers.setdefault(job_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, job_id: str, q: asyncio.Queue):
+        subs = self._subscribers.get(job_id)
+        if subs is not None:
+            subs.discard(q)
+            if not subs:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: dict):
+        for q in self._subscribers.get(job_id, ()):
+            if q.full():  # slow consumer: drop its oldest event, never block the worker
+                q.get_nowait()
+            q.put_nowait(event)
+
+    # --- workers -------------------------------------------------------------
+
+    async def _run(self, job: Job):
+        ctx = JobContext(self, job)
+        self._running.add(job.id)
+        self.publish(job.id, {"type": "status", "status": "running"})
+        try:
+            result = await self._handlers[job.kind](ctx)
+            await ctx.flush()
+        except asyncio.CancelledError:
+            # Shutdown mid-job: hand it back to the queue for the next process.
+            await asyncio.to_thread(self._update, job.id, status="queued")
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            await ctx.flush()
+            await asyncio.to_thread(self._update, job.id, status="failed", error=f"{type(e).__name__}: {e}",
+                                    finished_at=datetime.utcnow())
+            self.publish(job.id, {"type": "status", "status": "failed", "error": str(e)})
+            return
+        finally:
+            self._running.discard(job.id)
+        await asyncio.to_thread(self._update, job.id, status="done", progress=1.0, result=result,
+                                finished_at=datetime.utcnow())
+        self.publish(job.id, {"type": "status", "status": "done"})
+
+    async def _worker(self, n: int):
+        failures = 0
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim)
+                failures = 0
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                print(f"[Job Queue] worker {n} → {job.kind} {job.id[:8]} (attempt {job.attempts})")
+                await self._run(job)
+            except Exception as e:
+                # e.g. "database is locked": keep the worker alive. A job whose final
+                # write failed is left running and re-queued by recover() once stale.
+                failures += 1
+                delay = min(JOB_ERROR_BACKOFF * 2 ** (failures - 1), JOB_ERROR_BACKOFF_CAP)
+                print(f"[Job Queue] worker {n}: {type(e).__name__}: {e}; retrying in {delay:g}s")
+                await asyncio.sleep(delay)
+
+    def _touch(self, job_ids: list[str]):
+        db = SessionLocal()
+        try:
+            db.execute(update(Job).where(Job.id.in_(job_ids)).values(updated_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+    async def _heartbeat(self):
+        """Keep our running jobs fresh and sweep up other processes' orphans."""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                if self._running:
+                    await asyncio.to_thread(self._touch, list(self._running))
+                if await asyncio.to_thread(self.recover):
+                    self._wakeup.set()
+            except Exception as e:
+                print(f"[Job Queue] heartbeat: {type(e).__name__}: {e}")
+
+    def start(self):
+        recovered = self.recover()
+        if recovered:
+            print(f"[Job Queue] Re-queued {recovered} orphaned job(s)")
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._worker(i), name=f"job-worker-{i}") for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat(), name="job-heartbeat"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+job_queue = JobQueue()
@@ -0,0 +1,160 @@
+"""
+ResumeGod V4.0 — Incremental JSON parser
+Feeds on partial JSON text (e.g. streamed tool-call arguments) and reports
+every value the moment it closes, with its path from the root:
+
+    parser = IncrementalJSONParser()
+    for path, value in parser.feed('{"a": [1, {"b": "x"'):
+        ...  # ("a", 0) → 1, ("a", 1, "b") → "x"
+
+Containers are reported when their closing bracket arrives, after their
+children. Only the unconsumed tail of the input is buffered.
+"""
+import re
+import json
+from typing import Any, Iterator
+
+_WS = " \t\r\n"
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_NUMBER_END = ",]}" + _WS
+_LITERALS = {"true": True, "false": False, "null": None}
+
+Path = tuple
+
+
+class JSONStreamError(ValueError):
+    pass
+
+
+class _Frame:
+    __slots__ = ("value", "key", "expect")
+
+    def __init__(self, value):
+        self.value = value
+        self.key = None  # current key (object) or index (array)
+        # object: key | colon | value | comma ; array: value | comma
+        self.expect = "key_or_end" if isinstance(value, dict) else "value_or_end"
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._stack: list[_Frame] = []
+        self.done = False
+        self.result: Any = None
+
+    def _path(self) -> Path:
+        return tuple(f.key for f in self._stack)
+
+    def _emit_value(self, value) -> tuple:
+        """Attach a finished value to its parent; returns the (path, value) event."""
+        if not self._stack:
+            self.done = True
+            self.result = value
+            return (), value
+        frame = self._stack[-1]
+        if isinstance(frame.value, dict):
+            frame.value[frame.key] = value
+        else:
+            frame.value.append(value)
+        frame.expect = "comma_or_end"
+        return self._path(), value
+
+    def feed(self, chunk: str) -> Iterator[tuple[Path, Any]]:
+        """Consume more text; yields (path, value) for each value completed by it."""
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        buf = self._buf
+        n = len(buf)
+        while self._pos < n and not self.done:
+            ch = buf[self._pos]
+            if ch in _WS:
+                self._pos += 1
+                continue
+            frame = self._stack[-1] if self._stack else None
+            expect = frame.expect if frame else "value"
+
+            if expect == "comma_or_end":
+                if ch == ",":
+                    frame.expect = "key" if isinstance(frame.value, dict) else "value"
+                    self._pos += 1
+                    continue
+                if ch in "}]":
+                    self._pos += 1
+                    closed = self._stack.pop()
+                    yield self._emit_value(closed.value)
+                    continue
+                raise JSONStreamError(f"expected ',' or close at offset {self._pos}")
+
+            if expect == "colon":
+                if ch != ":":
+                    raise JSONStreamError(f"expected ':' at offset {self._pos}")
+                frame.expect = "value"
+                self._pos += 1
+                continue
+
+            if expect in ("key", "key_or_end"):
+                if ch == "}" and expect == "key_or_end":
+                    self._pos += 1
+                    closed = self._stack.pop()
+                    yield self._emit_value(closed.value)
+                    continue
+                if ch != '"':
+                    raise JSONStreamError(f"expected object key at offset {self._pos}")
+                m = _STRING_RE.match(buf, self._pos)
+                if m is None:
+                    return  # key not complete yet
+                frame.key = json.loads(m.group())
+                frame.expect = "colon"
+                self._pos = m.end()
+                continue
+
+            # a value is expected here
+            if expect == "value_or_end" and ch == "]":
+                self._pos += 1
+                closed = self._stack.pop()
+                yield self._emit_value(closed.value)
+                continue
+            if frame is not None and isinstance(frame.value, list):
+                frame.key = len(frame.value)
+            if ch == "{" or ch == "[":
+                self._pos += 1
+                self._stack.append(_Frame({} if ch == "{" else []))
+                continue
+            if ch == '"':
+                m = _STRING_RE.match(buf, self._pos)
+                if m is None:
+                    return
+                self._pos = m.end()
+                yield self._emit_value(json.loads(m.group()))
+                continue
+            if ch == "-" or ch.isdigit():
+                m = _NUMBER_RE.match(buf, self._pos)
+                if m is None or m.end() == n or buf[m.end()] not in _NUMBER_END:
+                    return  # the number may continue in the next chunk
+                self._pos = m.end()
+                yield self._emit_value(json.loads(m.group()))
+                continue
+            for word, literal in _LITERALS.items():
+                if buf.startswith(word, self._pos):
+                    self._pos += len(word)
+                    yield self._emit_value(literal)
+                    break
+                if word.startswith(buf[self._pos:]):
+                    return  # partial literal
+            else:
+                raise JSONStreamError(f"unexpected {ch!r} at offset {self._pos}")
+
+    def close(self) -> Any:
+        """End of input: returns the root value, or raises if it never completed."""
+        tail = self._buf[self._pos:].strip()
+        if not self.done and not self._stack and tail:
+            # a bare top-level number only terminates at end of input
+            m = _NUMBER_RE.fullmatch(tail)
+            if m:
+                self.done, self.result = True, json.loads(tail)
+        if not self.done:
+            raise JSONStreamError("truncated JSON")
+        return self.result
@@ -0,0 +1,171 @@
+"""
+ResumeGod V4.0 — LaTeX compile service
+Role: Turns rendered LaTeX into PDF bytes fast. The template preamble
+(fontawesome5, titlesec, hyperref, babel, ...) is dumped once into a
+pdflatex format file with mylatexformat, so each compile only typesets the
+body. Compiles run in a fixed set of reusable scratch directories, take a
+second pass only when the log asks for one, and are CPU/memory/time capped.
+
+If the format cannot be built (e.g. mylatexformat missing), compiles fall
+back to plain cold pdflatex runs.
+"""
+import os
+import re
+import queue
+import shutil
+import hashlib
+import resource
+import tempfile
+import threading
+import subprocess
+from typing import Optional
+
+LATEX_WORKERS = int(os.getenv("LATEX_WORKERS", "2"))
+LATEX_TIMEOUT = float(os.getenv("LATEX_TIMEOUT", "30"))  # wall seconds per pass
+LATEX_CPU_LIMIT = int(os.getenv("LATEX_CPU_LIMIT", "20"))  # CPU seconds per pass
+LATEX_MEM_LIMIT = int(os.getenv("LATEX_MEM_LIMIT", str(1024 * 1024 * 1024)))  # bytes of address space
+LATEX_WORK_DIR = os.getenv("LATEX_WORK_DIR", os.path.join(tempfile.gettempdir(), "resumegod_latex"))
+LATEX_MAX_PASSES = 3
+
+BEGIN_DOCUMENT = r"\begin{document}"
+_RERUN_RE = re.compile(r"Rerun to get|Label\(s\) may have changed")  # not "undefined references": a rerun cannot fix those
+
+
+class LatexCompileError(Exception):
+    def __init__(self, message: str, log_tail: str = ""):
+        super().__init__(message)
+        self.log_tail = log_tail
+
+
+def _limit_resources():
+    """preexec_fn for pdflatex: hard caps so a runaway document can't take the box down."""
+    resource.setrlimit(resource.RLIMIT_CPU, (LATEX_CPU_LIMIT, LATEX_CPU_LIMIT))
+    resource.setrlimit(resource.RLIMIT_AS, (LATEX_MEM_LIMIT, LATEX_MEM_LIMIT))
+
+
+def split_preamble(latex_source: str) -> tuple[str, str]:
+    idx = latex_source.find(BEGIN_DOCUMENT)
+    if idx < 0:
+        return "", latex_source
+    return latex_source[:idx], latex_source[idx:]
+
+
+def _needs_rerun(log: str) -> bool:
+    return bool(_RERUN_RE.search(log))
+
+
+class LatexCompileService:
+    def __init__(self, workers: int = LATEX_WORKERS, work_dir: str = LATEX_WORK_DIR):
+        self.workers = workers
+        self.work_dir = work_dir
+        self._scratch: queue.Queue = queue.Queue()
+        self._formats: dict[str, Optional[str]] = {}  # preamble hash → format name (None = build failed)
+        self._format_lock = threading.Lock()
+        self.stats_counters = {"compiles": 0, "warm": 0, "cold": 0, "passes": 0, "failures": 0}
+        for i in range(workers):
+            path = os.path.join(work_dir, f"worker-{i}")
+            os.makedirs(path, exist_ok=True)
+            self._scratch.put(path)
+        os.makedirs(os.path.join(work_dir, "fmt"), exist_ok=True)
+
+    # --- format files --------------------------------------------------------
+
+    def _format_for(self, preamble: str) -> Optional[str]:
+        """Return the format path (without .fmt) for this preamble, building it once."""
+        if not preamble:
+            return None
+        key = hashlib.sha256(preamble.encode()).hexdigest()[:16]
+        if key in self._formats:
+            return self._formats[key]
+        with self._format_lock:
+            if key not in self._formats:
+                self._formats[key] = self._build_format(key, preamble)
+        return self._formats[key]
+
+    def _build_format(self, key: str, preamble: str) -> Optional[str]:
+        fmt_dir = os.path.join(self.work_dir, "fmt")
+        name = f"resume-{key}"
+        fmt_path = os.path.join(fmt_dir, name)
+        if os.path.exists(fmt_path + ".fmt"):
+            return fmt_path
+        src = os.path.join(fmt_dir, f"{name}.tex")
+        with open(src, "w", encoding="utf-8") as f:
+            f.write(preamble + BEGIN_DOCUMENT + "\n\\end{document}\n")
+        try:
+            result = subprocess.run(
+                ["pdflatex", "-ini", "-interaction=nonstopmode", "-no-shell-escape",
+                 f"-jobname={name}", "&pdflatex", "mylatexformat.ltx", src],
+                cwd=fmt_dir, capture_output=True, text=True, timeout=LATEX_TIMEOUT * 4,
+                preexec_fn=_limit_resources,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"[LaTeX Service] Format build failed ({e}); falling back to cold compiles")
+            return None
+        if result.returncode != 0 or not os.path.exists(fmt_path + ".fmt"):
+            print(f"[LaTeX Service] Format build failed; falling back to cold compiles:\n{result.stdout[-1000:]}")
+            return None
+        print(f"[LaTeX Service] Precompiled preamble → {fmt_path}.fmt")
+        return fmt_path
+
+    def warm_up(self, latex_source: str):
+        """Build the format for this template ahead of the first request."""
+        self._format_for(split_preamble(latex_source)[0])
+
+    # --- compile -------------------------------------------------------------
+
+    def _run_pass(self, cwd: str, fmt: Optional[str]) -> str:
+        cmd = ["pdflatex", "-interaction=nonstopmode", "-no-shell-escape", "-file-line-error"]
+        if fmt:
+            cmd.append(f"-fmt={fmt}")
+        cmd.append("resume.tex")
+        self.stats_counters["passes"] += 1
+        try:
+            result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True,
+                                    timeout=LATEX_TIMEOUT, preexec_fn=_limit_resources)
+        except subprocess.TimeoutExpired:
+            raise LatexCompileError(f"pdflatex exceeded {LATEX_TIMEOUT}s")
+        except OSError as e:
+            raise LatexCompileError(f"pdflatex unavailable: {e}")
+        if result.returncode != 0:
+            print(f"[LaTeX Service] LaTeX compilation error:\n{result.stdout[-2000:]}")
+        return result.stdout
+
+    def compile(self, latex_source: str) -> bytes:
+        """Compile to PDF bytes. Blocks; call from a worker thread."""
+        preamble, _ = split_preamble(latex_source)
+        fmt = self._format_for(preamble)
+        self.stats_counters["compiles"] += 1
+        self.stats_counters["warm" if fmt else "cold"] += 1
+
+        cwd = self._scratch.get()  # blocks while all workers are busy
+        try:
+            for entry in os.listdir(cwd):
+                path = os.path.join(cwd, entry)
+                shutil.rmtree(path) if os.path.isdir(path) else os.unlink(path)
+            with open(os.path.join(cwd, "resume.tex"), "w", encoding="utf-8") as f:
+                f.write(latex_source)
+
+            log = ""
+            for _ in range(LATEX_MAX_PASSES):
+                log = self._run_pass(cwd, fmt)
+                if not _needs_rerun(log):
+                    break
+
+            pdf_file = os.path.join(cwd, "resume.pdf")
+            if not os.path.exists(pdf_file):
+                self.stats_counters["failures"] += 1
+                raise LatexCompileError("pdflatex produced no PDF", log[-2000:])
+            with open(pdf_file, "rb") as f:
+                return f.read()
+        finally:
+            self._scratch.put(cwd)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "formats": {k: bool(v) for k, v in self._formats.items()},
+            **self.stats_counters,
+        }
+
+
+latex_service = LatexCompileService()
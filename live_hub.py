@@ -0,0 +1,131 @@
+"""
+ResumeGod V4.0 — Live event hub
+In-process pub/sub that pushes Spyglass views to open dashboards instead of
+having them poll get_tracking_stats. Subscribers listen on topics
+("resume:<id>", "user:<id>"); publish() serializes an event once and
+appends it to every matching subscriber's bounded buffer, so publishing
+never waits on a consumer. When a slow consumer's buffer is full its oldest
+event is dropped, and the next read reports how many were lost so the
+dashboard can refetch the stats.
+
+Not thread-safe: publish and subscribe from the event loop only.
+"""
+import os
+import json
+import asyncio
+from collections import deque
+from typing import Optional
+
+LIVE_BUFFER = int(os.getenv("LIVE_BUFFER", "256"))  # events per subscriber
+LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", "10000"))
+LIVE_KEEPALIVE = float(os.getenv("LIVE_KEEPALIVE", "15"))  # seconds between keep-alives on an idle stream
+
+
+class LiveHubFull(Exception):
+    """LIVE_MAX_SUBSCRIBERS connections are already open."""
+
+
+class Subscription:
+    __slots__ = ("topics", "buffer", "dropped", "active", "_ready")
+
+    def __init__(self, topics: tuple[str, ...], buffer: int):
+        self.topics = topics
+        self.active = True
+        self.buffer: deque[str] = deque(maxlen=buffer)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def push(self, payload: str) -> bool:
+        """Append a serialized event; False if that pushed out the oldest one."""
+        full = len(self.buffer) == self.buffer.maxlen
+        self.buffer.append(payload)
+        self._ready.set()
+        if full:
+            self.dropped += 1
+        return not full
+
+    async def next_batch(self, timeout: Optional[float] = None) -> tuple[list[str], int]:
+        """
+        Wait up to `timeout` seconds for events, then take everything
+        buffered. Returns (JSON payloads, events dropped since the last call);
+        ([], 0) on timeout.
+        """
+        if not self.buffer:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return [], 0
+        events = list(self.buffer)
+        self.buffer.clear()
+        dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+
+class LiveHub:
+    def __init__(self, buffer: int = LIVE_BUFFER, max_subscribers: int = LIVE_MAX_SUBSCRIBERS):
+        self.buffer = buffer
+        self.max_subscribers = max_subscribers
+        self._topics: dict[str, set[Subscription]] = {}
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def full(self) -> bool:
+        return self.subscribers >= self.max_subscribers
+
+    def subscribe(self, *topics: str) -> Subscription:
+        if self.full():
+            self.rejected += 1
+            raise LiveHubFull(f"{self.subscribers} live connections already open")
+        sub = Subscription(topics, self.buffer)
+        for topic in topics:
+            self._topics.setdefault(topic, set()).add(sub)
+        self.subscribers += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        """Idempotent: only the first call for a subscription frees its slot."""
+        if not sub.active:
+            return
+        sub.active = False
+        for topic in sub.topics:
+            subs = self._topics.get(topic)
+            if subs is not None and sub in subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[topic]
+        self.subscribers -= 1
+
+    def has_subscribers(self, *topics: str) -> bool:
+        return any(topic in self._topics for topic in topics)
+
+    def publish(self, event: dict, *topics: str) -> int:
+        """Fan `event` out to everyone subscribed to any of `topics` (once each). Returns the recipients."""
+        subs = [self._topics[t] for t in topics if t in self._topics]
+        if not subs:
+            return 0
+        recipients = subs[0] if len(subs) == 1 else set().union(*subs)
+        payload = json.dumps(event)
+        self.published += 1
+        for sub in recipients:
+            if not sub.push(payload):
+                self.dropped += 1
+        self.delivered += len(recipients)
+        return len(recipients)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "topics": len(self._topics),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "buffer": self.buffer,
+        }
+
+
+live_hub = LiveHub()
@@ -0,0 +1,269 @@
+"""
+ResumeGod V4.0 — LLM Gateway
+Role: The single door to OpenAI for every agent. Owns one pooled HTTP
+client, a global token bucket (requests/min + tokens/min) with priority
+classes, and retry of 429/5xx with jittered exponential backoff.
+
+Point OPENAI_BASE_URL at any OpenAI-compatible server (e.g.
+benchmarks/fake_openai.py) to run the swarm without the real API.
+"""
+import os
+import json
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from typing import AsyncIterator, Optional
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))  # requests per minute
+LLM_TPM = float(os.getenv("LLM_TPM", "300000"))  # tokens per minute
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))  # seconds per attempt
+LLM_BACKOFF_BASE = 0.5
+LLM_BACKOFF_CAP = 20.0
+DEFAULT_COMPLETION_TOKENS = 1000  # budget reserved when the caller sets no max_tokens
+
+# Lower number = served first when the bucket is contended.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PIPELINE = 1
+PRIORITY_BATCH = 2
+
+AGENT_PRIORITY = {
+    "orchestrator": PRIORITY_INTERACTIVE,
+    "chat": PRIORITY_INTERACTIVE,
+    "interviewer": PRIORITY_PIPELINE,
+    "ats": PRIORITY_PIPELINE,
+    "ghostwriter": PRIORITY_BATCH,
+    "affiliate": PRIORITY_BATCH,
+    "memory": PRIORITY_BATCH,
+}
+
+
+class TokenBucket:
+    """Continuous-refill bucket: `rate_per_min` units, full burst allowed."""
+
+    def __init__(self, rate_per_min: float):
+        self.capacity = rate_per_min
+        self.rate = rate_per_min / 60.0
+        self.level = rate_per_min
+        self._stamp = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+def estimate_tokens(kwargs: dict) -> int:
+    """Cheap prompt+completion estimate (~4 chars/token) used for admission."""
+    chars = sum(len(m.get("content") or "") for m in kwargs.get("messages", []))
+    if kwargs.get("tools"):
+        chars += len(json.dumps(kwargs["tools"]))
+    return chars // 4 + int(kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+
+
+def _retry_delay(attempt: int, error: Exception) -> Optional[float]:
+    """Backoff for retryable errors, None for everything else."""
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code != 429 and error.status_code < 500:
+            return None
+        retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), LLM_BACKOFF_CAP)
+            except ValueError:
+                pass
+    elif not isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return None
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        tpm: float = LLM_TPM,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._client: Optional[AsyncOpenAI] = None
+        self._waiters: list = []  # heap of (priority, seq, future, cost)
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.in_flight = 0
+        self.counters = {"requests": 0, "retries": 0, "errors": 0, "queued_ms": 0.0}
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The shared client, created on first use (one connection pool for all agents)."""
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                max_retries=0,  # retries are ours, so they respect the bucket
+                timeout=LLM_TIMEOUT,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                    ),
+                    timeout=LLM_TIMEOUT,
+                ),
+            )
+        return self._client
+
+    # --- admission -------------------------------------------------------
+
+    def _pump(self):
+        self._wakeup = None
+        while self._waiters and self.in_flight < self.max_concurrency:
+            _, _, future, cost = self._waiters[0]
+            if future.done():  # caller gave up while queued
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(cost))
+            if wait > 0:
+                # Strict priority: the head waits for refill, nobody jumps it.
+                self._wakeup = asyncio.get_running_loop().call_later(wait, self._pump)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(cost)
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: int, cost: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future, cost))
+        queued_at = time.monotonic()
+        if self._wakeup is None:
+            self._pump()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # slot was granted just as we were cancelled
+            raise
+        self.counters["queued_ms"] += (time.monotonic() - queued_at) * 1000
+
+    def _release(self, refund: float = 0.0):
+        self.in_flight -= 1
+        if refund:
+            self.tokens.give(refund)
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._pump()
+
+    # --- public API ------------------------------------------------------
+
+    async def chat(self, agent: str = "orchestrator", **kwargs):
+        """
+        chat.completions.create() through the bucket, with retries.
+        `agent` selects the priority class (see AGENT_PRIORITY).
+        """
+        priority = AGENT_PRIORITY.get(agent, PRIORITY_PIPELINE)
+        cost = estimate_tokens(kwargs)
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, cost)
+            refund = 0.0
+            try:
+                self.counters["requests"] += 1
+                response = await self.client.chat.completions.create(**kwargs)
+                if getattr(response, "usage", None) is not None:
+                    refund = cost - response.usage.total_tokens
+                return response
+            except Exception as e:
+                delay = _retry_delay(attempt, e)
+                if delay is None or attempt == self.max_retries:
+                    self.counters["errors"] += 1
+                    raise
+                self.counters["retries"] += 1
+                print(f"[LLM Gateway] {agent}: {type(e).__name__}, retry {attempt + 1} in {delay:.2f}s")
+            finally:
+                self._release(refund)
+            await asyncio.sleep(delay)
+
+    async def stream_chat(self, agent: str = "orchestrator", **kwargs) -> AsyncIterator:
+        """
+        Streaming completion. The concurrency slot is held until the stream is
+        exhausted or the consumer closes the generator. Only opening the stream
+        is retried; a stream that dies midway is surfaced to the caller.
+        """
+        priority = AGENT_PRIORITY.get(agent, PRIORITY_PIPELINE)
+        cost = estimate_tokens(kwargs)
+        kwargs["stream"] = True
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, cost)
+            stream = None
+            try:
+                self.counters["requests"] += 1
+                try:
+                    stream = await self.client.chat.completions.create(**kwargs)
+                except Exception as e:
+                    delay = _retry_delay(attempt, e)
+                    if delay is None or attempt == self.max_retries:
+                        self.counters["errors"] += 1
+                        raise
+                    self.counters["retries"] += 1
+                else:
+                    async for chunk in stream:
+                        yield chunk
+                    return
+            finally:
+                # Every exit releases the slot: errors, retries, and cancellation
+                # or GeneratorExit while opening or consuming the stream.
+                try:
+                    if stream is not None:
+                        await stream.close()
+                finally:
+                    self._release()
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        depth = {"interactive": 0, "pipeline": 0, "batch": 0}
+        names = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_PIPELINE: "pipeline", PRIORITY_BATCH: "batch"}
+        for priority, _, future, _ in self._waiters:
+            if not future.done():
+                depth[names.get(priority, "pipeline")] += 1
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_class": depth,
+            "requests_bucket": round(self.requests.level, 1),
+            "tokens_bucket": round(self.tokens.level, 1),
+            **{k: round(v, 1) if isinstance(v, float) else v for k, v in self.counters.items()},
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+llm = LLMGateway()
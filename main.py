@@ -1,27 +1,47 @@
 import os
 import sys
 import json
-import uuid
-import io
+import asyncio
+import time
 from pathlib import Path
 from contextlib import asynccontextmanager
+from typing import Optional
 
 # Core Framework
-from fastapi import FastAPI, UploadFile, File, Form, Request, Response, BackgroundTasks, WebSocket
+from fastapi import FastAPI, UploadFile, File, Form, Request, Response, WebSocket, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-# Intelligence Stack
-from pypdf import PdfReader 
-from openai import AsyncOpenAI
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from sqlalchemy.orm import Session
 
 # --- INTERNAL IMPORTS ---
 sys.path.insert(0, os.getcwd())
-from models import create_tables
-# from agent_orchestrator import run_full_optimization_pipeline # Trigger this when ready
-
-# Initialize OpenAI
-client_ws = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from models import create_tables, get_db, SessionLocal, User, Resume, InterviewSession
+from pdf_extractor import extraction_pool, extract_pdf_text, spool_upload, ExtractionBusy, ExtractionError
+from extraction_cache import extraction_cache
+from ats_cache import ats_cache
+from llm_gateway import llm
+import prompt_budget
+from agent_orchestrator import run_full_optimization_pipeline, orchestrate_chat, route_intent
+from intent_router import intent_router
+from job_queue import job_queue, JobContext, TERMINAL_STATUSES
+from latex_service import latex_service
+from ats_agent import (
+    analyze_and_optimize, render_latex, compile_latex_to_pdf, save_rendered_resume, stream_analyze_and_optimize
+)
+from jd_index import build_index, get_index, JDIndexError
+from resume_parser import parse_resume, is_current
+from interview_agent import grade_answers, generate_interview_questions
+from interview_chat import run_interview_channel
+from conversation_memory import ConversationMemory, summarize_conversation
+from question_bank import question_bank, signature, QUESTION_BANK_REFRESH_AFTER
+from pdf_store import get_store
+from spyglass_agent import (
+    tracking_pipeline, log_tracking_event, close_geo_client, get_tracking_stats, list_tracking_events,
+    TRACKING_PIXEL_GIF, EVENTS_PAGE_SIZE
+)
+from live_hub import live_hub, LiveHubFull, LIVE_KEEPALIVE
+from tracking_rollups import compact as compact_tracking, TRACKING_RAW_RETENTION_DAYS, TRACKING_COMPACT_INTERVAL
+from agent_orchestrator import PDF_OUTPUT_DIR
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,11 +50,40 @@ async def lifespan(app: FastAPI):
         create_tables()
     except Exception as e:
         print(f"⚠️ DB Sync: {e}")
+    extraction_pool.start()
+    try:
+        await asyncio.to_thread(question_bank.sync, True)
+    except Exception as e:
+        print(f"⚠️ Question bank load: {e}")
+    try:
+        await asyncio.to_thread(intent_router.load)
+    except Exception as e:
+        print(f"⚠️ Intent router training: {e}")
+    job_queue.register("optimize", run_optimize_job)
+    job_queue.register("rewrite_matches", run_rewrite_matches_job)
+    job_queue.register("question_bank_refill", run_question_bank_refill_job)
+    job_queue.register("summarize_conversation", run_summarize_conversation_job)
+    job_queue.register("compact_tracking", run_compact_tracking_job)
+    job_queue.start()
+    tracking_pipeline.start()
+    compaction = asyncio.create_task(schedule_tracking_compaction())
+    # Precompile the resume preamble in the background; first compile is warm.
+    warm_latex = asyncio.create_task(asyncio.to_thread(latex_service.warm_up, render_latex({})))
     print("Ready. The swarm is online.")
     yield
+    warm_latex.cancel()
+    compaction.cancel()
+    await job_queue.stop()
+    await tracking_pipeline.stop()
+    await close_geo_client()
+    extraction_pool.shutdown()
+    await llm.aclose()
 
 app = FastAPI(title="ResumeGod V4.0", lifespan=lifespan)
 
+BASE_URL = os.getenv("BASE_URL", "https://resumegit-production.up.railway.app")
+MATCH_MAX_REWRITES = int(os.getenv("MATCH_MAX_REWRITES", "10"))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
@@ -49,100 +98,710 @@ async def root():
 
 # --- AGENT ROUTES ---
 
+def _save_upload(user_email: str, filename: Optional[str], resume_text: str) -> tuple[str, dict]:
+    """Parse the extracted text and store it as a new Resume; (resume id, parsed). Run in a thread."""
+    parsed = parse_resume(resume_text)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == user_email).first()
+        if user is None:
+            user = User(email=user_email)
+            db.add(user)
+            db.flush()
+        resume = Resume(user_id=user.id, original_filename=filename, raw_text=resume_text, parsed=parsed)
+        db.add(resume)
+        db.commit()
+        return resume.id, parsed
+    finally:
+        db.close()
+
 @app.post("/api/resume/upload")
-async def upload_resume(file: UploadFile = File(...), user_email: str = Form(...)):
+async def upload_resume(
+    file: UploadFile = File(...),
+    user_email: str = Form(...)
+):
     try:
-        mission_id = str(uuid.uuid4())
+        # 1. Spool the upload to disk in chunks (bounded memory, size-capped, hashed)
+        pdf_path, pdf_sha256 = await spool_upload(file, extraction_pool.max_bytes)
         
-        # 1. Read binary PDF data
-        contents = await file.read()
-        
-        # 2. Extract Text using pypdf (The library you added)
-        reader = PdfReader(io.BytesIO(contents))
-        resume_text = ""
-        for page in reader.pages:
-            resume_text += page.extract_text() or ""
+        # 2. Known file? Serve the cached text. Otherwise extract off the event loop.
+        try:
+            extraction = await extraction_cache.get(pdf_sha256)
+            cache_hit = extraction is not None
+            if not cache_hit:
+                extraction = await extract_pdf_text(pdf_path)
+                await extraction_cache.put(pdf_sha256, extraction)
+        finally:
+            os.unlink(pdf_path)
+        resume_text = extraction["text"]
 
         print(f"📄 SENTINEL: Extracted {len(resume_text)} chars for {user_email}")
-        
-        # For now, we return 'resume_id' to match your React code
+
+        # 3. Parse and persist the artifact (off the loop) so the swarm can pick it up by id
+        resume_id, parsed = await asyncio.to_thread(_save_upload, user_email, file.filename, resume_text)
+
         return {
             "status": "success",
-            "resume_id": mission_id, 
-            "message": "Artifact captured and decrypted."
+            "resume_id": resume_id, 
+            "message": "Artifact captured and decrypted.",
+            "page_count": extraction["page_count"],
+            "sections": parsed["sections"],
+            "cache_hit": cache_hit
         }
+    except ExtractionBusy as e:
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)},
+            content={"status": "busy", "message": str(e)}
+        )
+    except ExtractionError as e:
+        print(f"❌ Extraction Error: {str(e)}")
+        return JSONResponse(status_code=e.status_code, content={"status": "error", "message": str(e)})
     except Exception as e:
         print(f"❌ Extraction Error: {str(e)}")
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
+PIPELINE_NODES = 4  # ats, latex, ghostwriter, interviewer
+
+def resume_parsed(db: Session, resume: Resume) -> dict:
+    """The canonical parsed resume; rows from before the parser (or an older
+    parser version) are parsed once here and saved."""
+    if not is_current(resume.parsed):
+        resume.parsed = parse_resume(resume.raw_text)
+        db.commit()
+    return resume.parsed
+
+def _load_resume(resume_id: str) -> tuple[str, str, str, dict]:
+    """(raw_text, user_id, tracking_token, parsed) for a job handler; run in a thread."""
+    db = SessionLocal()
+    try:
+        resume = db.get(Resume, resume_id)
+        if resume is None or not resume.raw_text:
+            raise ValueError(f"Unknown resume {resume_id}")
+        return resume.raw_text, resume.user_id, resume.tracking_token, resume_parsed(db, resume)
+    finally:
+        db.close()
+
+def _resume_text(resume_id: Optional[str]) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        resume = db.get(Resume, resume_id) if resume_id else None
+        return resume.raw_text if resume else None
+    finally:
+        db.close()
+
+def _set_job_description(resume_id: Optional[str], job_desc: str, parse: bool = False):
+    """Record the target JD on the resume. None if there is nothing to optimize,
+    else (raw_text, parsed) — parsed only with parse=True. Run in a thread."""
+    db = SessionLocal()
+    try:
+        resume = db.get(Resume, resume_id) if resume_id else None
+        if resume is None or not resume.raw_text:
+            return None
+        resume.job_description = job_desc
+        db.commit()
+        return resume.raw_text, resume_parsed(db, resume) if parse else None
+    finally:
+        db.close()
+
+async def run_optimize_job(ctx: JobContext) -> dict:
+    """Job handler: full swarm run for one resume. Result shape matches the Mission Analysis UI."""
+    raw_text, user_id, tracking_token, parsed = await asyncio.to_thread(_load_resume, ctx.resume_id)
+
+    finished = set()
+
+    def on_event(event):
+        if event["status"] != "started":
+            finished.add(event["node"])
+        ctx.stage(event, progress=round(len(finished) / PIPELINE_NODES, 2))
+
+    result = await run_full_optimization_pipeline(
+        raw_text, ctx.payload["job_description"], user_id, BASE_URL, tracking_token,
+        resume_id=ctx.resume_id, on_event=on_event, parsed=parsed
+    )
+    gap_analysis = dict(result["ats"]["gap_analysis"] or {})
+    # The Mission Analysis UI reads `missing_keywords`
+    gap_analysis.setdefault("missing_keywords", gap_analysis.get("keywords_missing", []))
+
+    return {
+        "status": result["status"],
+        "ats": {"gap_analysis": gap_analysis},
+        "ghostwriter": result["ghostwriter"],
+        "interviewer": result["interviewer"],
+        "errors": result["errors"],
+        "trace": result["trace"],
+        "optimized_resume_url": f"{BASE_URL}/download/{ctx.resume_id}"
+    }
+
 @app.post("/api/optimize")
-async def optimize_resume(request: Request, background_tasks: BackgroundTasks):
+async def optimize_resume(request: Request):
     try:
         data = await request.json()
         resume_id = data.get("resume_id")
         job_desc = data.get("job_description", "Software Engineer")
 
-        print(f"🧬 Sentinel Scanning Mission: {resume_id}")
+        if await asyncio.to_thread(_set_job_description, resume_id, job_desc) is None:
+            return JSONResponse(status_code=404, content={"message": f"Unknown resume {resume_id}"})
 
-        # This JSON matches your 'Mission Analysis' UI perfectly
-        # Later, replace this with a real OpenAI call using resume_text
+        job_id = await asyncio.to_thread(job_queue.enqueue, "optimize", {"job_description": job_desc},
+                                         resume_id=resume_id)
+        print(f"🧬 Sentinel Scanning Mission: {resume_id} (job {job_id[:8]})")
+
+        return JSONResponse(status_code=202, content={
+            "status": "queued",
+            "job_id": job_id,
+            "resume_id": resume_id,
+            "status_url": f"/api/jobs/{job_id}",
+            "events_url": f"/api/jobs/{job_id}/events"
+        })
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"message": str(e)})
+
+@app.post("/api/optimize/stream")
+async def optimize_resume_stream(request: Request):
+    """
+    Server-Sent Events: the ATS analysis as it is generated — gap_analysis
+    fields, resume fields, section entries and bullets as each one closes,
+    then `done` with the full result (also persisted on the Resume row).
+    """
+    data = await request.json()
+    resume_id = data.get("resume_id")
+    job_desc = data.get("job_description", "Software Engineer")
+
+    target = await asyncio.to_thread(_set_job_description, resume_id, job_desc, True)
+    if target is None:
+        return JSONResponse(status_code=404, content={"message": f"Unknown resume {resume_id}"})
+    resume_text, parsed = target
+
+    async def event_stream():
+        try:
+            async for event in stream_analyze_and_optimize(resume_text, job_desc, resume_id=resume_id,
+                                                           persist=True, parsed=parsed):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            print(f"[ATS Sentinel] Stream failed for {resume_id}: {e}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+# --- Batch matching: one resume vs. a JD index --------------------------------
+
+async def run_rewrite_matches_job(ctx: JobContext) -> dict:
+    """Job handler: ATS Sentinel rewrite of one resume for each top-ranked JD, concurrently."""
+    raw_text, _, _, parsed = await asyncio.to_thread(_load_resume, ctx.resume_id)
+    index = await asyncio.to_thread(get_index, ctx.payload["index_id"])
+    jd_ids = ctx.payload["jd_ids"]
+    started = time.perf_counter()
+    finished = 0
+
+    async def rewrite(jd_id: str):
+        nonlocal finished
+        ctx.stage({"node": jd_id, "status": "started", "at_ms": round((time.perf_counter() - started) * 1000, 1)})
+        try:
+            jd_text = await asyncio.to_thread(index.text, jd_id)
+            result = await analyze_and_optimize(raw_text, jd_text, parsed=parsed)
+            status = "done"
+        except Exception as e:
+            result, status = {"error": f"{type(e).__name__}: {e}"}, "failed"
+        finished += 1
+        ctx.stage({"node": jd_id, "status": status, "at_ms": round((time.perf_counter() - started) * 1000, 1)},
+                  progress=round(finished / len(jd_ids), 2))
+        return jd_id, result
+
+    results = dict(await asyncio.gather(*(rewrite(jd_id) for jd_id in jd_ids)))
+    return {"index_id": index.index_id, "results": results}
+
+@app.post("/api/jd-index")
+async def create_jd_index(request: Request):
+    """Build a reusable JD index from {"jds": [{"id": ..., "text": ...}, ...]}."""
+    try:
+        data = await request.json()
+        started = time.perf_counter()
+        index = await asyncio.to_thread(build_index, data.get("jds") or [])
         return {
-            "status": "complete",
-            "ats": {
-                "gap_analysis": {
-                    "ats_score_before": 45,
-                    "ats_score_after": 92,
-                    "roast": "This resume has the visual appeal of a terminal error. The Swarm is currently injecting high-performance keywords and fixing your hierarchy.",
-                    "missing_keywords": ["System Design", "Microservices", "Redis", "Next.js 16"]
-                }
-            },
-            "optimized_resume_url": f"https://resumegit-production.up.railway.app/download/{resume_id}"
+            "index_id": index.index_id,
+            "jds": len(index),
+            "vocab": len(index.vocab),
+            "build_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    except JDIndexError as e:
+        return JSONResponse(status_code=400, content={"message": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"message": str(e)})
+
+@app.post("/api/match")
+async def match_resume(request: Request):
+    """
+    Rank one resume against every JD in an index (local scoring, no LLM).
+    With rewrite_top=N, the N best matches are queued for the ATS Sentinel.
+    """
+    try:
+        data = await request.json()
+        resume_id = data.get("resume_id")
+        resume_text = await asyncio.to_thread(_resume_text, resume_id)
+        if not resume_text:
+            return JSONResponse(status_code=404, content={"message": f"Unknown resume {resume_id}"})
+        top_k = max(int(data.get("top_k", 10)), 1)
+        rewrite_top = min(max(int(data.get("rewrite_top", 0)), 0), MATCH_MAX_REWRITES, top_k)
+
+        started = time.perf_counter()
+        index = await asyncio.to_thread(get_index, data.get("index_id"))
+        results = await asyncio.to_thread(index.top_k, resume_text, top_k)
+        response = {
+            "resume_id": resume_id,
+            "index_id": index.index_id,
+            "jds": len(index),
+            "results": results,
+            "score_ms": round((time.perf_counter() - started) * 1000, 1)
         }
+        if rewrite_top:
+            job_id = await asyncio.to_thread(job_queue.enqueue, "rewrite_matches", {
+                "index_id": index.index_id,
+                "jd_ids": [r["jd_id"] for r in results[:rewrite_top]]
+            }, resume_id=resume_id)
+            response.update(job_id=job_id, status_url=f"/api/jobs/{job_id}",
+                            events_url=f"/api/jobs/{job_id}/events")
+        return response
+    except JDIndexError as e:
+        return JSONResponse(status_code=404, content={"message": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"message": str(e)})
 
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"message": f"Unknown job {job_id}"})
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Server-Sent Events: a snapshot, then stage events until the job finishes."""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"message": f"Unknown job {job_id}"})
+
+    async def event_stream():
+        events = job_queue.subscribe(job_id)
+        try:
+            snapshot = await asyncio.to_thread(job_queue.get, job_id)
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while snapshot["status"] not in TERMINAL_STATUSES:
+                if await request.is_disconnected():
+                    return
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=2.0)
+                    yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                    if event["type"] != "status" or event["status"] not in TERMINAL_STATUSES:
+                        continue
+                except asyncio.TimeoutError:
+                    # The job may be running in another process: fall back to the row.
+                    latest = await asyncio.to_thread(job_queue.get, job_id)
+                    if latest["status"] == snapshot["status"] and latest["progress"] == snapshot["progress"]:
+                        yield ": keep-alive\n\n"
+                        continue
+                snapshot = await asyncio.to_thread(job_queue.get, job_id)
+                yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+        finally:
+            job_queue.unsubscribe(job_id, events)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/download/{resume_id}")
+async def download_resume(resume_id: str, request: Request, db: Session = Depends(get_db)):
+    """Stream the optimized PDF. Strong ETag = content hash; Range requests supported."""
+    resume = db.get(Resume, resume_id)
+    if resume is None:
+        return JSONResponse(status_code=404, content={"message": f"Unknown resume {resume_id}"})
+
+    pdf_path = resume.pdf_path
+    if not pdf_path or not os.path.exists(pdf_path):
+        # Blob was evicted (or never built): rebuild from the stored LaTeX.
+        if not resume.optimized_latex:
+            return JSONResponse(status_code=404, content={"message": "Resume has not been optimized yet"})
+        pdf_path = await asyncio.to_thread(compile_latex_to_pdf, resume.optimized_latex, PDF_OUTPUT_DIR)
+        if pdf_path is None:
+            return JSONResponse(status_code=500, content={"message": "PDF compilation failed"})
+        save_rendered_resume(resume.id, resume.optimized_latex, pdf_path)
+    else:
+        get_store(PDF_OUTPUT_DIR).get(Path(pdf_path).stem)  # refresh LRU position
+
+    etag = f'"{Path(pdf_path).stem}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(
+        pdf_path,
+        media_type="application/pdf",
+        filename=f"resume_{resume_id[:8]}.pdf",
+        headers={"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    )
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return {
+        "extraction": extraction_cache.stats(),
+        "extraction_pool": extraction_pool.stats(),
+        "ats": ats_cache.stats(),
+        "latex": latex_service.stats(),
+        "pdf_store": get_store(PDF_OUTPUT_DIR).stats(),
+        "spyglass": tracking_pipeline.stats()
+    }
+
+@app.get("/api/llm/stats")
+async def llm_stats():
+    return {**llm.stats(), "prompts": prompt_budget.stats(), "question_bank": question_bank.stats(),
+            "intent_router": intent_router.stats()}
+
 # ✅ SPYGLASS TRACKER (The Invisible Pixel)
+PIXEL_HEADERS = {"Cache-Control": "no-store, no-cache, must-revalidate, max-age=0", "Pragma": "no-cache"}
+
+def _pixel_response(tracker: str, request: Request) -> Response:
+    # Answer at once; geolocation and the DB write happen in tracking_pipeline.
+    forwarded = request.headers.get("x-forwarded-for")
+    ip = forwarded.split(",")[0].strip() if forwarded else (request.client.host if request.client else "")
+    log_tracking_event(tracker, ip, request.headers.get("user-agent", ""), request.headers.get("referer"))
+    return Response(content=TRACKING_PIXEL_GIF, media_type="image/gif", headers=PIXEL_HEADERS)
+
+@app.get("/api/track/{tracking_token}/pixel.gif")
+async def tracking_pixel(tracking_token: str, request: Request):
+    # The URL build_tracking_url embeds in optimized resumes
+    return _pixel_response(tracking_token, request)
+
 @app.get("/api/spyglass/track/{tracker_id}")
-async def track_resume_view(tracker_id: str):
-    # This pings your logs when a recruiter opens the PDF
-    print(f"👁️ SPYGLASS ALERT: Resume {tracker_id} was just opened!")
-    
-    # 1x1 Transparent GIF pixel
-    pixel_data = b"\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff\x00\x00\x00\x21\xf9\x04\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02\x44\x01\x00\x3b"
-    return Response(content=pixel_data, media_type="image/gif")
+async def track_resume_view(tracker_id: str, request: Request):
+    return _pixel_response(tracker_id, request)
+
+@app.get("/api/spyglass/stats/{resume_id}")
+async def spyglass_stats(resume_id: str, limit: int = EVENTS_PAGE_SIZE, cursor: Optional[str] = None,
+                         db: Session = Depends(get_db)):
+    """Views, unique viewers, geo/company breakdown, timeline, map points and the first page of events."""
+    try:
+        return await asyncio.to_thread(get_tracking_stats, db, resume_id, limit, cursor)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"message": f"Bad cursor {cursor!r}"})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"message": str(e)})
+
+@app.post("/api/spyglass/compact")
+async def spyglass_compact(request: Request):
+    """Fold raw tracking events into the rollups now. Body (optional): {"retention_days"}."""
+    try:
+        data = await request.json() if await request.body() else {}
+        job_id = await asyncio.to_thread(job_queue.enqueue, "compact_tracking", {
+            "retention_days": float(data.get("retention_days", TRACKING_RAW_RETENTION_DAYS))
+        })
+        return {"job_id": job_id}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"message": str(e)})
+
+async def run_compact_tracking_job(ctx: JobContext) -> dict:
+    """Job handler: fold raw Spyglass events into the rollups and delete expired ones."""
+    return await asyncio.to_thread(
+        compact_tracking, float(ctx.payload.get("retention_days", TRACKING_RAW_RETENTION_DAYS))
+    )
+
+async def schedule_tracking_compaction():
+    """Queue a compaction at startup, then every TRACKING_COMPACT_INTERVAL seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(job_queue.enqueue, "compact_tracking",
+                                    {"retention_days": TRACKING_RAW_RETENTION_DAYS})
+        except Exception as e:
+            print(f"⚠️ Tracking compaction not queued: {e}")
+        await asyncio.sleep(TRACKING_COMPACT_INTERVAL)
+
+@app.get("/api/spyglass/events/{resume_id}")
+async def spyglass_events(resume_id: str, limit: int = EVENTS_PAGE_SIZE, cursor: Optional[str] = None,
+                          db: Session = Depends(get_db)):
+    """Tracking events newest first; follow next_cursor for older pages."""
+    try:
+        return await asyncio.to_thread(list_tracking_events, db, resume_id, limit, cursor)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"message": f"Bad cursor {cursor!r}"})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"message": str(e)})
+
+def _live_stream(request: Request, topic: str) -> Response:
+    """Server-Sent Events: one "view" event per tracked view on `topic`, as it is written."""
+    if live_hub.full():
+        live_hub.rejected += 1
+        return JSONResponse(status_code=503, headers={"Retry-After": "30"},
+                            content={"message": f"{live_hub.subscribers} live connections already open"})
+
+    async def event_stream():
+        # Subscribe inside the generator so the finally below always runs for it: a client
+        # gone before the first chunk never starts the generator and never holds a slot.
+        try:
+            subscription = live_hub.subscribe(topic)
+        except LiveHubFull as e:
+            yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+            return
+        try:
+            yield "event: ready\ndata: {}\n\n"
+            while True:
+                events, dropped = await subscription.next_batch(timeout=LIVE_KEEPALIVE)
+                if await request.is_disconnected():
+                    return
+                # A consumer that fell behind lost its oldest events: tell it to refetch the stats.
+                chunks = [f"event: dropped\ndata: {json.dumps({'dropped': dropped})}\n\n"] if dropped else []
+                chunks.extend(f"event: view\ndata: {event}\n\n" for event in events)
+                yield "".join(chunks) or ": keep-alive\n\n"
+        finally:
+            live_hub.unsubscribe(subscription)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _row_exists(model, key: str) -> bool:
+    # Own short session: a Depends(get_db) session would stay checked out for the whole stream.
+    db = SessionLocal()
+    try:
+        return db.get(model, key) is not None
+    finally:
+        db.close()
+
+@app.get("/api/spyglass/live/{resume_id}")
+async def spyglass_live(resume_id: str, request: Request):
+    """Stream a resume's views live instead of polling /api/spyglass/stats."""
+    if not await asyncio.to_thread(_row_exists, Resume, resume_id):
+        return JSONResponse(status_code=404, content={"message": f"Unknown resume {resume_id}"})
+    return _live_stream(request, f"resume:{resume_id}")
+
+@app.get("/api/spyglass/live/user/{user_id}")
+async def spyglass_live_user(user_id: str, request: Request):
+    """Stream views of all of a user's resumes."""
+    if not await asyncio.to_thread(_row_exists, User, user_id):
+        return JSONResponse(status_code=404, content={"message": f"Unknown user {user_id}"})
+    return _live_stream(request, f"user:{user_id}")
 
 # ✅ THE INTERVIEWER (Foundation for voice/chat)
+_bank_refills: dict[str, asyncio.Task] = {}  # question bank signature → task queueing its refill (→ job id)
+
+def _interview_resume(resume_id: str, parse: bool = False) -> Optional[tuple]:
+    """(raw_text, job_description, gap_analysis, parsed) of a resume — parsed only
+    with parse=True — or None if it has no text. Run in a thread."""
+    db = SessionLocal()
+    try:
+        resume = db.get(Resume, resume_id)
+        if resume is None or not resume.raw_text:
+            return None
+        return (resume.raw_text, resume.job_description, resume.gap_analysis,
+                resume_parsed(db, resume) if parse else None)
+    finally:
+        db.close()
+
+async def run_question_bank_refill_job(ctx: JobContext) -> dict:
+    """Job handler: generate questions for one resume+JD and add them to the question bank."""
+    payload = ctx.payload
+    try:
+        resume = await asyncio.to_thread(_interview_resume, ctx.resume_id, True)
+        if resume is None:
+            raise ValueError(f"Unknown resume {ctx.resume_id}")
+        raw_text, _, gap_analysis, parsed = resume
+        result = await generate_interview_questions(
+            raw_text, payload["job_description"], gap_analysis, count=payload["count"], parsed=parsed
+        )
+        entry_id = await asyncio.to_thread(
+            question_bank.add, raw_text, payload["job_description"], payload["count"], result, ctx.resume_id
+        )
+        return {"entry_id": entry_id, "questions": len(result.get("questions") or [])}
+    finally:
+        _bank_refills.pop(payload.get("signature"), None)
+
+async def enqueue_bank_refill(resume_id: str, job_description: str, count: int, signature: str) -> str:
+    """One refill per signature at a time (per process)."""
+    pending = _bank_refills.get(signature)
+    if pending is None:
+        pending = asyncio.create_task(asyncio.to_thread(job_queue.enqueue, "question_bank_refill", {
+            "job_description": job_description, "count": count, "signature": signature
+        }, resume_id=resume_id))
+        _bank_refills[signature] = pending
+    try:
+        return await asyncio.shield(pending)
+    except Exception:
+        _bank_refills.pop(signature, None)
+        raise
+
 @app.get("/api/interviewer/questions/{resume_id}")
-async def get_mock_questions(resume_id: str):
-    return {
-        "status": "ready",
-        "questions": [
-            "Explain the architecture of your most recent project.",
-            "How do you optimize a low-latency system?",
-            "Describe a time you fixed a critical production bug."
-        ]
-    }
+async def get_interview_questions(resume_id: str, job_description: Optional[str] = None, count: int = 5):
+    """
+    Interview questions from the question bank: the same or a near-identical
+    resume+JD is served from local storage. On a miss, generation is queued
+    and a 202 with the job id is returned; GET again once it is done.
+    """
+    try:
+        started = time.perf_counter()
+        resume = await asyncio.to_thread(_interview_resume, resume_id)
+        if resume is None:
+            return JSONResponse(status_code=404, content={"message": f"Unknown resume {resume_id}"})
+        raw_text, saved_job_desc, _, _ = resume
+        job_desc = job_description or saved_job_desc or "Software Engineer"
+        count = min(max(count, 5), 10)
+
+        await asyncio.to_thread(question_bank.sync)
+        hit = question_bank.lookup(raw_text, job_desc, count)
+        if hit is None:
+            job_id = await enqueue_bank_refill(resume_id, job_desc, count, signature(raw_text, job_desc, count))
+            return JSONResponse(status_code=202, content={
+                "status": "generating",
+                "job_id": job_id,
+                "status_url": f"/api/jobs/{job_id}",
+                "lookup_ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+
+        refill_job_id = None
+        if hit["match"] == "near" or hit["served_count"] % QUESTION_BANK_REFRESH_AFTER == 0:
+            # near hits get tailored questions next time; popular entries get fresh variants
+            refill_job_id = await enqueue_bank_refill(resume_id, job_desc, count, hit["signature"])
+            await asyncio.to_thread(question_bank.record_served, hit["entry_id"], hit["served_count"])
+        return {
+            "status": "ready",
+            "source": "bank",
+            "match": hit["match"],
+            "similarity": hit["similarity"],
+            **hit["questions"],
+            "refill_job_id": refill_job_id,
+            "lookup_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"message": str(e)})
+
+def _interview_target(session_id: Optional[str], resume_id: Optional[str]) -> Optional[tuple]:
+    """(user_id, resume_id, questions, saved answers) of an InterviewSession, or of a
+    resume to start one for; None if it does not exist. Run in a thread."""
+    db = SessionLocal()
+    try:
+        if session_id:
+            session = db.get(InterviewSession, session_id)
+            if session is None:
+                return None
+            return session.user_id, session.resume_id, session.questions or [], session.answers or []
+        resume = db.get(Resume, resume_id) if resume_id else None
+        if resume is None:
+            return None
+        return resume.user_id, resume.id, None, []
+    finally:
+        db.close()
+
+def _save_grades(session_id: Optional[str], user_id: str, resume_id: str, questions: list,
+                 graded: list, overall_score: Optional[float]) -> str:
+    """Write graded answers and the overall score in one commit; returns the session id. Run in a thread."""
+    db = SessionLocal()
+    try:
+        session = db.get(InterviewSession, session_id) if session_id else None
+        if session is None:
+            session = InterviewSession(user_id=user_id, resume_id=resume_id, questions=questions)
+            db.add(session)
+        session.answers = graded
+        session.overall_score = overall_score
+        db.commit()
+        return session.id
+    finally:
+        db.close()
+
+@app.post("/api/interviewer/grade")
+async def grade_interview(request: Request):
+    """
+    Grade a whole mock interview at once. Body: {"session_id"} of an existing
+    InterviewSession, or {"resume_id", "questions"} to start one, plus
+    "answers": [{"question_id", "answer"}] (defaults to the session's saved
+    answers). Answers are graded concurrently; the graded answers and
+    overall_score are written to the session in a single commit.
+    """
+    try:
+        data = await request.json()
+        session_id = data.get("session_id")
+        target = await asyncio.to_thread(_interview_target, session_id, data.get("resume_id"))
+        if target is None:
+            message = (f"Unknown interview session {session_id}" if session_id
+                       else f"Unknown resume {data.get('resume_id')}")
+            return JSONResponse(status_code=404, content={"message": message})
+        user_id, resume_id, questions, saved_answers = target
+        if questions is None:
+            questions = data.get("questions") or []
+        answers = data.get("answers") or saved_answers
+
+        by_id = {str(q.get("id")): q for q in questions}
+        items, seen = [], set()
+        for answer in answers:
+            question_id = str(answer.get("question_id"))
+            question = by_id.get(question_id)
+            if question is None or question_id in seen or not (answer.get("answer") or "").strip():
+                return JSONResponse(status_code=400, content={
+                    "message": f"Answer for question {question_id!r} is unknown, duplicated or empty"})
+            seen.add(question_id)
+            items.append({
+                "question_id": question_id,
+                "question": question.get("question", ""),
+                "answer": answer["answer"],
+                "model_answer": question.get("model_answer", ""),
+                "category": question.get("category", "general"),
+            })
+        if not items:
+            return JSONResponse(status_code=400, content={"message": "No answers to grade"})
+
+        started = time.perf_counter()
+        result = await grade_answers(items)
+        graded = [{"question_id": item["question_id"], "answer": item["answer"], "grade": grade}
+                  for item, grade in zip(items, result["grades"])]
+
+        session_id = await asyncio.to_thread(_save_grades, session_id, user_id, resume_id, questions,
+                                             graded, result["overall_score"])
+
+        return {
+            "status": "graded",
+            "session_id": session_id,
+            "overall_score": result["overall_score"],
+            "answers": graded,
+            "grade_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"message": str(e)})
+
+# ✅ CAREER CHAT (bounded memory: rolling summary + recent turns)
+async def run_summarize_conversation_job(ctx: JobContext) -> dict:
+    """Job handler: fold aged-out chat turns into the session's rolling summary."""
+    return await summarize_conversation(ctx.payload["session_id"], ctx.payload["through"])
+
+@app.post("/api/chat/{session_id}")
+async def career_chat(session_id: str, request: Request):
+    """
+    One career-coaching turn. Body: {"message", "user_email"} (user_email
+    starts the session if it is new). The prompt carries the session's
+    summary and recent turns, never the whole history. "route" names the
+    agent the message is for, so the client can hand off to it; it is only a
+    hint, so it is decided locally and never waits on an LLM call.
+    """
+    try:
+        data = await request.json()
+        message = (data.get("message") or "").strip()
+        if not message:
+            return JSONResponse(status_code=400, content={"message": "message is required"})
+        memory = await asyncio.to_thread(ConversationMemory.open, session_id, data.get("user_email"))
+        if memory is None:
+            return JSONResponse(status_code=404, content={"message": f"Unknown session {session_id}; pass user_email"})
+        history = memory.prompt_messages()
+        route = await route_intent(message, history, memory.context, llm_fallback=False)
+        result = await orchestrate_chat(message, history, memory.context)
+        await asyncio.to_thread(memory.append, {"role": "user", "content": message},
+                                {"role": "assistant", "content": result["message"]})
+        summary_job = await asyncio.to_thread(memory.schedule_summary)
+        return {
+            "session_id": session_id,
+            "turn": memory.turn_count,
+            "message": result["message"],
+            "route": route,
+            "summary_job_id": summary_job
+        }
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"message": str(e)})
 
 @app.websocket("/ws/chat/{session_id}")
-async def websocket_chat(websocket: WebSocket, session_id: str):
-    await websocket.accept()
-    try:
-        while True:
-            data = await websocket.receive_text()
-            payload = json.loads(data)
-            user_message = payload.get("message", "")
-            
-            stream = await client_ws.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": user_message}],
-                stream=True
-            )
-            async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    await websocket.send_json({"type": "token", "content": chunk.choices[0].delta.content})
-            await websocket.send_json({"type": "done"})
-    except Exception:
-        pass
+async def websocket_chat(websocket: WebSocket, session_id: str, user_email: Optional[str] = None):
+    """Live mock interview; protocol in interview_chat. New sessions need ?user_email=."""
+    await run_interview_channel(websocket, session_id, user_email)
 
 if __name__ == "__main__":
     import uvicorn
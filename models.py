@@ -6,7 +6,7 @@ import uuid
 from datetime import datetime
 from sqlalchemy import (
     Column, String, Text, DateTime, Integer, Float,
-    ForeignKey, Boolean, JSON, create_engine
+    ForeignKey, Boolean, JSON, Index, LargeBinary, create_engine, inspect, literal, text
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
@@ -54,10 +54,13 @@ class Resume(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     original_filename = Column(String, nullable=True)
     raw_text = Column(Text, nullable=True)
+    parsed = Column(JSON, nullable=True)  # canonical structure from resume_parser, set at upload
     optimized_latex = Column(Text, nullable=True)
     pdf_path = Column(String, nullable=True)
     job_description = Column(Text, nullable=True)
     gap_analysis = Column(JSON, nullable=True)
+    optimized_data = Column(JSON, nullable=True)  # resume_data struct from the ATS Sentinel
+    ats_cache_key = Column(String(64), nullable=True, index=True)
     ats_score_before = Column(Float, nullable=True)
     ats_score_after = Column(Float, nullable=True)
     tracking_token = Column(String, unique=True, nullable=True, default=generate_uuid)
@@ -70,6 +73,7 @@ class Resume(Base):
 
 class TrackingLog(Base):
     __tablename__ = "tracking_logs"
+    __table_args__ = (Index("ix_tracking_logs_resume_viewed", "resume_id", "viewed_at"),)
 
     id = Column(String, primary_key=True, default=generate_uuid)
     resume_id = Column(String, ForeignKey("resumes.id"), nullable=False)
@@ -84,10 +88,79 @@ class TrackingLog(Base):
     referer = Column(String, nullable=True)
     company_hint = Column(String, nullable=True)  # reverse-lookup ISP/org
     viewed_at = Column(DateTime, default=datetime.utcnow)
+    rolled_up = Column(Boolean, default=False)  # counted in the tracking_*_rollups tables
 
     resume = relationship("Resume", back_populates="tracking_events")
 
 
+class TrackingRollup(Base):
+    """Views per resume per hour or day (tracking_rollups); day rows carry a HyperLogLog of viewer IPs."""
+    __tablename__ = "tracking_rollups"
+
+    resume_id = Column(String, ForeignKey("resumes.id"), primary_key=True)
+    period = Column(String, primary_key=True)  # hour, day
+    period_start = Column(DateTime, primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    viewers = Column(LargeBinary, nullable=True)  # hyperloglog.HyperLogLog.to_bytes()
+
+
+class TrackingCountryRollup(Base):
+    __tablename__ = "tracking_country_rollups"
+
+    resume_id = Column(String, ForeignKey("resumes.id"), primary_key=True)
+    day = Column(DateTime, primary_key=True)
+    country = Column(String, primary_key=True)  # "Unknown" when not located
+    views = Column(Integer, nullable=False, default=0)
+
+
+class TrackingPlaceRollup(Base):
+    """Views per resume per (location, company) — the dashboard map and company list."""
+    __tablename__ = "tracking_place_rollups"
+
+    resume_id = Column(String, ForeignKey("resumes.id"), primary_key=True)
+    place_key = Column(String, primary_key=True)  # "lat|lng|city|company"
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    city = Column(String, nullable=True)
+    company_hint = Column(String, nullable=True)
+    views = Column(Integer, nullable=False, default=0)
+    last_viewed_at = Column(DateTime, nullable=True)
+
+
+class ExtractedText(Base):
+    """Content-addressed pypdf output, keyed by SHA-256 of the uploaded bytes."""
+    __tablename__ = "extracted_texts"
+
+    sha256 = Column(String(64), primary_key=True)
+    text = Column(Text, nullable=False)
+    page_count = Column(Integer, nullable=False)
+    extract_ms = Column(Float, nullable=True)
+    first_page_ms = Column(Float, nullable=True)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, nullable=True)
+
+
+class Job(Base):
+    """Durable background job (e.g. a full optimization run)."""
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    kind = Column(String, nullable=False)
+    status = Column(String, default="queued", index=True)  # queued, running, done, failed
+    resume_id = Column(String, ForeignKey("resumes.id"), nullable=True)
+    payload = Column(JSON, default=dict)
+    progress = Column(Float, default=0.0)
+    stage_timings = Column(JSON, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class InterviewSession(Base):
     __tablename__ = "interview_sessions"
 
@@ -100,20 +173,53 @@ class InterviewSession(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class QuestionBankEntry(Base):
+    """Generated interview questions, keyed by the resume+JD that produced them (question_bank)."""
+    __tablename__ = "question_bank"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    signature = Column(String(64), nullable=False, index=True)  # exact resume+JD key
+    resume_id = Column(String, ForeignKey("resumes.id"), nullable=True)
+    resume_fingerprint = Column(JSON, nullable=False)  # {hashed feature: weight}
+    jd_fingerprint = Column(JSON, nullable=False)
+    questions = Column(JSON, nullable=False)  # generate_interview_questions() result
+    served_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
 class ConversationSession(Base):
     __tablename__ = "conversation_sessions"
 
     id = Column(String, primary_key=True, default=generate_uuid)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    messages = Column(JSON, default=list)
+    messages = Column(JSON, default=list)  # legacy; moved to conversation_messages on first load
     active_agent = Column(String, default="orchestrator")
     context = Column(JSON, default=dict)
+    summary = Column(Text, nullable=True)  # rolling summary of messages up to summary_through
+    summary_through = Column(Integer, default=0)  # seq of the last message folded into summary
+    message_count = Column(Integer, default=0)
+    turn_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User", back_populates="sessions")
 
 
+class ConversationMessage(Base):
+    """One chat message, append-only (conversation_memory). seq is 1-based per session."""
+    __tablename__ = "conversation_messages"
+    __table_args__ = (Index("ix_conversation_messages_session_seq", "session_id", "seq", unique=True),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String, ForeignKey("conversation_sessions.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    role = Column(String, nullable=False)  # user, assistant
+    content = Column(Text, nullable=False)
+    tokens = Column(Integer, nullable=False)  # counted once, at append
+    meta = Column(JSON, nullable=True)  # {"hidden": true} / {"status": "cancelled"}
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class AffiliateClick(Base):
     __tablename__ = "affiliate_clicks"
 
@@ -125,8 +231,49 @@ class AffiliateClick(Base):
     clicked_at = Column(DateTime, default=datetime.utcnow)
 
 
+# Columns added to tables after they first shipped. create_all() never alters
+# an existing table, so create_tables() adds whichever of these a database lacks.
+ADDED_COLUMNS = {
+    "resumes": ["optimized_data", "ats_cache_key", "parsed"],
+    "conversation_sessions": ["summary", "summary_through", "message_count", "turn_count"],
+    "tracking_logs": ["rolled_up"],  # DEFAULT 0: existing views are folded by the next compaction
+}
+
+
+def _column_ddl(column) -> str:
+    ddl = f"{column.name} {column.type.compile(dialect=engine.dialect)}"
+    if column.default is not None and column.default.is_scalar:
+        value = literal(column.default.arg).compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+        ddl += f" DEFAULT {value}"
+    return ddl
+
+
+def add_missing_columns() -> list[str]:
+    """ALTER TABLE ... ADD COLUMN for every ADDED_COLUMNS entry the database lacks."""
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table_name, names in ADDED_COLUMNS.items():
+            if not inspector.has_table(table_name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table_name)}
+            for name in names:
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN "
+                                      f"{_column_ddl(Base.metadata.tables[table_name].c[name])}"))
+                    added.append(f"{table_name}.{name}")
+    if added:
+        print(f"[Database] Added columns: {', '.join(added)}")
+    return added
+
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    # create_all skips tables that already exist; indexes added later still need creating.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+"""
+ResumeGod V4.0 — PDF Extraction Worker Tier
+Role: Runs pypdf text extraction in a bounded process pool so a heavy PDF
+never blocks the event loop (and every websocket stream riding on it).
+Applies size/page guards, per-job timeouts and queue backpressure.
+
+Uploads are spooled to a temp file in fixed-size chunks and handed to the
+workers by path; workers memory-map the file and extract a slice of pages
+at a time, so text for the first pages is available before the last page
+is parsed and no full copy of the PDF lives in the web process.
+"""
+import os
+import math
+import mmap
+import hashlib
+import time
+import asyncio
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Iterator, Optional
+
+from pypdf import PdfReader
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_MAX_QUEUE = int(os.getenv("PDF_MAX_QUEUE", "16"))  # jobs allowed to wait behind the busy workers
+PDF_JOB_TIMEOUT = float(os.getenv("PDF_JOB_TIMEOUT", "20"))  # seconds
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024)))
+PDF_PAGE_CHUNK = int(os.getenv("PDF_PAGE_CHUNK", "8"))  # pages per worker job
+PDF_SPOOL_DIR = os.getenv("PDF_SPOOL_DIR") or None  # defaults to the system temp dir
+UPLOAD_READ_CHUNK = 64 * 1024
+
+
+class ExtractionError(Exception):
+    """Extraction failed; carries the HTTP status the gateway should answer with."""
+    status_code = 422
+
+
+class ExtractionRejected(ExtractionError):
+    """Upload exceeds the configured byte or page guard."""
+    status_code = 413
+
+
+class ExtractionTimeout(ExtractionError):
+    status_code = 504
+
+
+class ExtractionBusy(ExtractionError):
+    """Worker queue is full — caller should retry after `retry_after` seconds."""
+    status_code = 429
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Extraction queue full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+async def spool_upload(upload, max_bytes: int = PDF_MAX_BYTES) -> tuple[str, str]:
+    """
+    Copy an UploadFile to a private temp file in fixed-size chunks,
+    hashing as it goes. Returns (path, sha256 hex); the caller owns the
+    file and must unlink it.
+    """
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=PDF_SPOOL_DIR)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_READ_CHUNK)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise ExtractionRejected(f"PDF exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest()
+
+
+def iter_page_text(path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of pages [start, stop) from a memory-mapped PDF."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ExtractionError("Empty upload")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            reader = PdfReader(mm)
+            pages = reader.pages
+            for i in range(start, len(pages) if stop is None else min(stop, len(pages))):
+                yield pages[i].extract_text() or ""
+
+
+def _extract_worker(path: str, start: int, stop: int, max_pages: int,
+                    page_count: Optional[int] = None) -> tuple[int, list[str]]:
+    """
+    Runs inside a pool process. Must stay a top-level function (picklable).
+    Returns (total page count, texts for pages [start, stop)). The file is
+    parsed once per call; `page_count` comes from the first chunk's result,
+    so only that call checks the page guard.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pages = PdfReader(mm).pages
+        if page_count is None:
+            page_count = len(pages)
+            if page_count > max_pages:
+                raise ExtractionRejected(f"PDF has {page_count} pages (limit {max_pages})")
+        return page_count, [pages[i].extract_text() or "" for i in range(start, min(stop, page_count))]
+
+
+class ExtractionPool:
+    """
+    Process pool with an admission counter in front of it.
+    At most `workers + max_queue` jobs are admitted; the rest get ExtractionBusy.
+    """
+
+    def __init__(
+        self,
+        workers: int = PDF_WORKERS,
+        max_queue: int = PDF_MAX_QUEUE,
+        job_timeout: float = PDF_JOB_TIMEOUT,
+        max_pages: int = PDF_MAX_PAGES,
+        max_bytes: int = PDF_MAX_BYTES,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._avg_job_s = 1.0  # EWMA of job wall time, feeds Retry-After
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """
+        A timed-out job cannot be cancelled inside its worker, so the whole
+        pool is replaced. Other jobs on the old pool see BrokenProcessPool
+        and are retried once on the fresh one.
+        """
+        if self._executor is executor:
+            self._executor = None
+        for proc in list(getattr(executor, "_processes", {}).values()):
+            proc.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        """Spawn the worker processes up front so the first upload doesn't pay for it."""
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(int)
+
+    def check_capacity(self):
+        """Raise ExtractionBusy when no more jobs can be admitted."""
+        if self._pending >= self.workers + self.max_queue:
+            raise ExtractionBusy(self.retry_after())
+
+    def retry_after(self) -> int:
+        backlog = max(self._pending - self.workers + 1, 1)
+        return max(1, math.ceil(self._avg_job_s * backlog / self.workers))
+
+    async def _run_chunk(self, path: str, start: int, deadline: float,
+                         page_count: Optional[int] = None) -> tuple[int, list[str]]:
+        for attempt in range(2):
+            executor = self._get_executor()
+            future = asyncio.get_running_loop().run_in_executor(
+                executor, _extract_worker, path, start, start + PDF_PAGE_CHUNK, self.max_pages, page_count
+            )
+            try:
+                # Deadline covers queueing too: a job stuck behind others is as dead to the user.
+                return await asyncio.wait_for(future, timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                self._recycle(executor)
+                raise ExtractionTimeout(f"Extraction exceeded {self.job_timeout}s")
+            except BrokenProcessPool:
+                self._recycle(executor)
+                if attempt:
+                    raise ExtractionError("Extraction worker crashed")
+            except ExtractionError:
+                raise
+            except Exception as e:
+                raise ExtractionError(f"Unreadable PDF: {e}")
+
+    async def iter_pages(self, path: str) -> AsyncIterator[str]:
+        """
+        Yield page texts in order as each chunk of pages is extracted.
+        Admission and the per-job timeout apply to the whole document.
+        """
+        if os.path.getsize(path) > self.max_bytes:
+            raise ExtractionRejected(f"PDF exceeds {self.max_bytes} bytes")
+        self.check_capacity()
+
+        self._pending += 1
+        started = time.monotonic()
+        deadline = started + self.job_timeout
+        try:
+            start, page_count = 0, None
+            while page_count is None or start < page_count:
+                page_count, texts = await self._run_chunk(path, start, deadline, page_count)
+                for text in texts:
+                    yield text
+                start += PDF_PAGE_CHUNK
+        finally:
+            self._pending -= 1
+        self._avg_job_s = 0.8 * self._avg_job_s + 0.2 * (time.monotonic() - started)
+
+    async def extract(self, path: str) -> dict:
+        started = time.perf_counter()
+        first_page_ms = None
+        texts = []
+        async for text in self.iter_pages(path):
+            if first_page_ms is None:
+                first_page_ms = round((time.perf_counter() - started) * 1000, 2)
+            texts.append(text)
+        return {
+            "text": "".join(texts),
+            "page_count": len(texts),
+            "first_page_ms": first_page_ms,
+            "extract_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "capacity": self.workers + self.max_queue,
+            "avg_job_ms": round(self._avg_job_s * 1000, 1),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+extraction_pool = ExtractionPool()
+
+
+async def extract_pdf_text(path: str) -> dict:
+    """Entry point used by the upload route. `path` is a spooled upload."""
+    return await extraction_pool.extract(path)
@@ -0,0 +1,119 @@
+"""
+ResumeGod V4.0 — Rendered PDF store
+Content-addressed blobs: sha256(template version + LaTeX source) → PDF.
+Identical renders share one file, hits are served straight from the blob
+(no per-resume copies), and the directory is kept under a byte budget by
+evicting least-recently-used blobs (mtime is bumped on every hit).
+"""
+import os
+import hashlib
+import tempfile
+import threading
+from typing import Optional
+
+PDF_STORE_DIR = os.getenv("PDF_STORE_DIR", "/tmp/resumegod_pdfs")
+PDF_STORE_MAX_BYTES = int(os.getenv("PDF_STORE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+PDF_STORE_LOW_WATER = 0.9  # evict down to 90% of the budget so we don't thrash at the limit
+
+
+def pdf_key(latex_source: str, template_version: str) -> str:
+    h = hashlib.sha256()
+    h.update(template_version.encode())
+    h.update(b"\x00")
+    h.update(latex_source.encode("utf-8"))
+    return h.hexdigest()
+
+
+class PdfStore:
+    def __init__(self, root: str = PDF_STORE_DIR, max_bytes: int = PDF_STORE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # lazily scanned
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.pdf")
+
+    def _blobs(self):
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".pdf") and len(name) == 68:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def total_bytes(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._blobs())
+        return self._total_bytes
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # LRU bookkeeping
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, pdf_bytes: bytes) -> str:
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        existed = os.path.exists(path)
+        os.replace(tmp, path)  # atomic: readers never see a partial blob
+        with self._lock:
+            if self._total_bytes is None:
+                self.total_bytes()  # first scan already sees the new blob
+            elif not existed:
+                self._total_bytes += len(pdf_bytes)
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str):
+        target = int(self.max_bytes * PDF_STORE_LOW_WATER)
+        blobs = sorted(self._blobs(), key=lambda b: b[2])  # oldest mtime first
+        total = sum(size for _, size, _ in blobs)
+        for path, size, _ in blobs:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def stats(self) -> dict:
+        return {
+            "root": self.root,
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_stores: dict[str, PdfStore] = {}
+
+
+def get_store(root: str = PDF_STORE_DIR) -> PdfStore:
+    """One store per root directory."""
+    store = _stores.get(root)
+    if store is None:
+        store = _stores[root] = PdfStore(root)
+    return store
@@ -0,0 +1,246 @@
+"""
+ResumeGod V4.0 — Prompt budgets
+Keeps resume/JD text inside a per-agent token budget before it reaches an
+LLM prompt: whitespace and PDF page-artifact cleanup, duplicate and
+boilerplate JD sentences dropped, compact JSON, and section-aware
+truncation of resumes that cuts low-value sections first and experience
+bullets last.
+
+Tokens are counted with tiktoken (gpt-4o's o200k_base) when it is installed
+and its encoding can be loaded; otherwise ~4 chars/token.
+"""
+import os
+import re
+import json
+import unicodedata
+from collections import Counter
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to the chars/4 estimate
+    tiktoken = None
+
+from ats_scorer import ats_scorer, normalize_terms, section_heading
+
+PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "o200k_base")
+PROMPT_BUDGET_SCALE = float(os.getenv("PROMPT_BUDGET_SCALE", "1.0"))
+ENABLED = os.getenv("PROMPT_BUDGET_DISABLED", "").lower() not in ("1", "true", "yes")
+
+# Token budget per prompt field, per agent.
+AGENT_BUDGETS = {
+    "ats": {"resume": 3000, "jd": 1200},
+    "interviewer": {"resume": 2000, "jd": 800, "gaps": 400},
+    "ghostwriter": {"resume_data": 1500, "jd": 150},
+    "affiliate": {"gaps": 600},
+}
+
+# Sections cut first when a resume is over budget; the header is never cut.
+RESUME_CUT_ORDER = ("other", "summary", "projects", "education", "skills", "experience")
+
+_PAGE_ARTIFACT_RE = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.I)
+_BULLET_RE = re.compile(r"^[•▪●◦‣⁃■*]\s*")
+_INLINE_WS_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])")
+_JD_BOILERPLATE_RE = re.compile(
+    r"equal (employment )?opportunity|\beeo\b|without regard to|gender identity|veteran status|"
+    r"reasonable accommodation|e-verify|401\(?k\)?|paid time off|\bpto\b|health, dental|"
+    r"benefits (include|package)|we offer|perks|privacy (policy|notice)|applicants? (with|from)",
+    re.I,
+)
+
+_encoder = None
+_encoder_loaded = False
+_stats: dict[str, dict] = {}
+
+
+def _get_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoder = tiktoken.get_encoding(PROMPT_ENCODING)
+            except Exception as e:
+                print(f"[Prompt Budget] tiktoken encoding unavailable ({type(e).__name__}); using ~4 chars/token")
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    encoder = _get_encoder()
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def budget_for(agent: str, field: str) -> int:
+    return int(AGENT_BUDGETS[agent][field] * PROMPT_BUDGET_SCALE)
+
+
+def _record(agent: str, before: str, after: str):
+    entry = _stats.setdefault(agent, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+    entry["calls"] += 1
+    entry["tokens_before"] += count_tokens(before)
+    entry["tokens_after"] += count_tokens(after)
+
+
+def stats() -> dict:
+    return {
+        "tokenizer": PROMPT_ENCODING if _get_encoder() is not None else "chars/4",
+        "enabled": ENABLED,
+        "agents": {
+            agent: {**s, "saved_pct": round(100 * (1 - s["tokens_after"] / s["tokens_before"]), 1)
+                    if s["tokens_before"] else 0.0}
+            for agent, s in _stats.items()
+        },
+    }
+
+
+# --- normalization -------------------------------------------------------------
+
+def normalize_text(text: str) -> list[str]:
+    """Clean lines: NFKC, one space between words, bullets as '- ', page numbers and
+    running headers/footers (short non-bullet lines repeated 3+ times) dropped, single blank lines."""
+    raw = [_INLINE_WS_RE.sub(" ", line).strip() for line in unicodedata.normalize("NFKC", text or "").splitlines()]
+    repeated = {line for line, n in Counter(raw).items()
+                if n >= 3 and line and len(line) < 80 and not _BULLET_RE.match(line) and not line.startswith("- ")}
+    seen_repeated = set()
+    lines: list[str] = []
+    for line in raw:
+        if _PAGE_ARTIFACT_RE.match(line):
+            continue
+        if line in repeated:
+            if line in seen_repeated:
+                continue
+            seen_repeated.add(line)
+        line = _BULLET_RE.sub("- ", line)
+        if not line and (not lines or not lines[-1]):
+            continue
+        lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def compact_json(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+# --- job descriptions ------------------------------------------------------------
+
+def compact_jd(job_description: str, budget: int) -> str:
+    """Dedupe sentences, drop EEO/benefits boilerplate, then keep the most
+    keyword-dense sentences (in their original order) until the budget is met."""
+    units: list[str] = []
+    seen = set()
+    for line in normalize_text(job_description):
+        for unit in _SENTENCE_RE.split(line) if line else [""]:
+            key = " ".join(normalize_terms(unit))
+            if unit and (key in seen or _JD_BOILERPLATE_RE.search(unit)):
+                continue
+            seen.add(key)
+            units.append(unit)
+    text = "\n".join(units).strip()
+    if count_tokens(text) <= budget:
+        return text
+
+    weights = ats_scorer.term_weights(job_description)
+    costs = [count_tokens(u) + 1 for u in units]
+    value = [sum(weights.get(t, 0.0) for t in set(normalize_terms(u))) for u in units]
+    keep, used = set(), 0
+    for i in sorted(range(len(units)), key=lambda i: (-value[i] / costs[i], i)):
+        if units[i] and used + costs[i] <= budget:
+            keep.add(i)
+            used += costs[i]
+    return "\n".join(units[i] for i in sorted(keep))
+
+
+# --- resumes -----------------------------------------------------------------------
+
+def compact_resume(resume_text: str, budget: int) -> str:
+    """Normalize, then drop lines from the end of the lowest-priority sections
+    (RESUME_CUT_ORDER) until the text fits. Experience goes last, oldest role first."""
+    lines = normalize_text(resume_text)
+    sections, current = [], "header"
+    for line in lines:
+        heading = section_heading(line) if line else None
+        current = heading or current
+        sections.append((heading is not None, current))
+    costs = [count_tokens(line) + 1 for line in lines]
+    total = sum(costs)
+    if total <= budget:
+        return "\n".join(lines)
+
+    keep = [True] * len(lines)
+    for section in RESUME_CUT_ORDER:
+        body = [i for i, (is_heading, s) in enumerate(sections) if s == section and not is_heading]
+        for i in reversed(body):
+            if total <= budget:
+                break
+            keep[i] = False
+            total -= costs[i]
+        if all(not keep[i] for i in body):  # nothing left under it: drop the heading too
+            for i, (is_heading, s) in enumerate(sections):
+                if is_heading and s == section and keep[i]:
+                    keep[i] = False
+                    total -= costs[i]
+        if total <= budget:
+            break
+    return "\n".join(line for line, k in zip(lines, keep) if k)
+
+
+def compact_resume_data(resume_data: dict, budget: int) -> str:
+    """Compact JSON of resume_data; over budget, trailing bullets are dropped
+    (projects first, then older roles), keeping one bullet per entry."""
+    data = json.loads(json.dumps(resume_data or {}))
+    text = compact_json(data)
+    if count_tokens(text) <= budget:
+        return text
+    for section in ("projects", "experience"):
+        for entry in reversed(data.get(section) or []):
+            bullets = entry.get("bullets") or []
+            while len(bullets) > 1:
+                bullets.pop()
+                text = compact_json(data)
+                if count_tokens(text) <= budget:
+                    return text
+    return text
+
+
+# --- per-agent entry points ----------------------------------------------------------
+
+def fit_resume(resume_text: str, agent: str) -> str:
+    if not ENABLED:
+        return resume_text
+    out = compact_resume(resume_text, budget_for(agent, "resume"))
+    _record(agent, resume_text, out)
+    return out
+
+
+def fit_jd(job_description: str, agent: str) -> str:
+    if not ENABLED:
+        return job_description
+    out = compact_jd(job_description, budget_for(agent, "jd"))
+    _record(agent, job_description, out)
+    return out
+
+
+def fit_resume_data(resume_data: dict, agent: str) -> str:
+    if not ENABLED:
+        return json.dumps(resume_data, indent=2)
+    out = compact_resume_data(resume_data, budget_for(agent, "resume_data"))
+    _record(agent, json.dumps(resume_data, indent=2), out)
+    return out
+
+
+def fit_json(obj, agent: str, field: str = "gaps") -> str:
+    """Compact JSON for small structured fields; a list over budget loses trailing items."""
+    if not ENABLED:
+        return json.dumps(obj, indent=2)
+    budget = budget_for(agent, field)
+    items = list(obj) if isinstance(obj, list) else obj
+    out = compact_json(items)
+    while isinstance(items, list) and len(items) > 1 and count_tokens(out) > budget:
+        items.pop()
+        out = compact_json(items)
+    _record(agent, json.dumps(obj, indent=2), out)
+    return out
@@ -0,0 +1,228 @@
+"""
+ResumeGod V4.0 — Interview question bank
+Generated interview questions are kept with a fingerprint of the resume and
+JD that produced them. A request for the same pair is served by signature;
+a near-duplicate (an edited resume, a reposted JD) by nearest neighbour:
+both fingerprints are hashed into fixed-size, L2-normalized vectors, so
+similarity against every banked entry is two matrix-vector products and
+an entry qualifies only if resume AND JD are each above the threshold.
+
+Generation happens off the request path (a "question_bank_refill" job):
+misses return 202 and are filled in the background; near hits and
+often-served entries schedule a refill so the bank grows tailored entries.
+Rows live in the question_bank table; each process keeps the most recent
+QUESTION_BANK_MAX in memory and picks up rows written by other workers
+every QUESTION_BANK_SYNC_INTERVAL seconds.
+"""
+import os
+import math
+import time
+import zlib
+import hashlib
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from ats_scorer import ats_scorer, normalize_terms, SKILLS, STOPWORDS, SKILL_BOOST
+from prompt_budget import normalize_text
+from models import SessionLocal, QuestionBankEntry
+
+QUESTION_BANK_DIM = int(os.getenv("QUESTION_BANK_DIM", "1024"))  # hashed features per fingerprint
+QUESTION_BANK_MAX = int(os.getenv("QUESTION_BANK_MAX", "5000"))  # entries in the in-memory index
+QUESTION_BANK_THRESHOLD = float(os.getenv("QUESTION_BANK_THRESHOLD", "0.9"))  # min cosine, resume and JD
+QUESTION_BANK_REFRESH_AFTER = int(os.getenv("QUESTION_BANK_REFRESH_AFTER", "20"))  # serves before a refill
+QUESTION_BANK_SYNC_INTERVAL = float(os.getenv("QUESTION_BANK_SYNC_INTERVAL", "5"))  # seconds
+
+BANK_VERSION = "qb-1"
+
+
+def signature(resume_text: str, job_description: str, count: int) -> str:
+    h = hashlib.sha256()
+    for part in ("\n".join(normalize_text(resume_text)), "\n".join(normalize_text(job_description)),
+                 str(count), BANK_VERSION):
+        h.update(part.encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _hashed(weights: dict[str, float]) -> dict[str, float]:
+    """Term weights → {feature index: weight}, L2-normalized (JSON-safe keys)."""
+    vec: dict[int, float] = {}
+    for term, w in weights.items():
+        i = zlib.crc32(term.encode()) % QUESTION_BANK_DIM
+        vec[i] = vec.get(i, 0.0) + w
+    norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+    return {str(i): round(w / norm, 5) for i, w in vec.items()}
+
+
+def resume_fingerprint(resume_text: str) -> dict[str, float]:
+    tf = Counter(t for t in normalize_terms(resume_text)
+                 if t in SKILLS or (len(t) > 2 and not t[0].isdigit() and t not in STOPWORDS))
+    return _hashed({t: (1 + math.log(n)) * (SKILL_BOOST if t in SKILLS else 1.0) for t, n in tf.items()})
+
+
+def jd_fingerprint(job_description: str) -> dict[str, float]:
+    kw = ats_scorer.keywords(job_description)
+    return _hashed(dict(zip(kw.terms, kw.weights.tolist())))
+
+
+def _dense(fingerprint: dict[str, float]) -> np.ndarray:
+    vec = np.zeros(QUESTION_BANK_DIM, dtype=np.float32)
+    for i, w in fingerprint.items():
+        vec[int(i)] = w
+    return vec
+
+
+class QuestionBank:
+    """
+    In-memory ring of the newest entries: fingerprints as matrix rows, plus
+    signature → row. add() and sync() run in worker threads while lookup()
+    runs on the event loop, so the ring is only touched under _lock.
+    """
+
+    def __init__(self, capacity: int = QUESTION_BANK_MAX, threshold: float = QUESTION_BANK_THRESHOLD):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.resume_vectors = np.zeros((capacity, QUESTION_BANK_DIM), dtype=np.float32)
+        self.jd_vectors = np.zeros((capacity, QUESTION_BANK_DIM), dtype=np.float32)
+        self.entry_ids: list[Optional[str]] = [None] * capacity
+        self.entry_sigs: list[Optional[str]] = [None] * capacity
+        self.questions: list[Optional[dict]] = [None] * capacity
+        self.served = np.zeros(capacity, dtype=np.int64)
+        self.rows: dict[str, int] = {}  # signature → row
+        self.size = 0
+        self._next = 0
+        self._known: set[str] = set()
+        self._last_created: Optional[datetime] = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self.hits_exact = 0
+        self.hits_near = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _append(self, entry: QuestionBankEntry):
+        if entry.id in self._known:
+            return
+        row = self._next
+        old_sig = self.entry_sigs[row]
+        if old_sig is not None and self.rows.get(old_sig) == row:
+            del self.rows[old_sig]
+            self._known.discard(self.entry_ids[row])
+        self.resume_vectors[row] = _dense(entry.resume_fingerprint)
+        self.jd_vectors[row] = _dense(entry.jd_fingerprint)
+        self.entry_ids[row] = entry.id
+        self.entry_sigs[row] = entry.signature
+        self.questions[row] = entry.questions
+        self.served[row] = entry.served_count or 0
+        self.rows[entry.signature] = row
+        self._known.add(entry.id)
+        self._next = (row + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        if entry.created_at and (self._last_created is None or entry.created_at > self._last_created):
+            self._last_created = entry.created_at
+
+    # --- persistence ---------------------------------------------------------
+
+    def sync(self, force: bool = False):
+        """Load rows newer than the newest one seen (at most every QUESTION_BANK_SYNC_INTERVAL)."""
+        now = time.monotonic()
+        if not force and now - self._synced_at < QUESTION_BANK_SYNC_INTERVAL:
+            return
+        self._synced_at = now
+        db = SessionLocal()
+        try:
+            query = db.query(QuestionBankEntry)
+            if self._last_created is not None:
+                query = query.filter(QuestionBankEntry.created_at >= self._last_created)
+            rows = query.order_by(QuestionBankEntry.created_at.desc()).limit(self.capacity).all()
+        finally:
+            db.close()
+        with self._lock:
+            for entry in reversed(rows):
+                self._append(entry)
+
+    def add(self, resume_text: str, job_description: str, count: int, questions: dict,
+            resume_id: Optional[str] = None) -> str:
+        entry = QuestionBankEntry(
+            signature=signature(resume_text, job_description, count),
+            resume_id=resume_id,
+            resume_fingerprint=resume_fingerprint(resume_text),
+            jd_fingerprint=jd_fingerprint(job_description),
+            questions=questions,
+            served_count=0,
+            created_at=datetime.utcnow(),
+        )
+        db = SessionLocal()
+        try:
+            db.add(entry)
+            db.commit()
+            db.refresh(entry)
+            db.expunge(entry)
+        finally:
+            db.close()
+        with self._lock:
+            self._append(entry)
+        return entry.id
+
+    def record_served(self, entry_id: str, served: int):
+        db = SessionLocal()
+        try:
+            db.query(QuestionBankEntry).filter(QuestionBankEntry.id == entry_id).update({"served_count": served})
+            db.commit()
+        finally:
+            db.close()
+
+    # --- lookup --------------------------------------------------------------
+
+    def lookup(self, resume_text: str, job_description: str, count: int) -> Optional[dict]:
+        """Exact signature first, then the nearest entry whose resume and JD
+        similarity are both >= threshold. None on a miss."""
+        sig = signature(resume_text, job_description, count)
+        with self._lock:
+            exact = sig in self.rows
+        # Fingerprints outside the lock; only the matrix products need the ring.
+        resume_vec = None if exact else _dense(resume_fingerprint(resume_text))
+        jd_vec = None if exact else _dense(jd_fingerprint(job_description))
+        with self._lock:
+            row, similarity, match = self.rows.get(sig), 1.0, "exact"
+            if row is None and self.size and resume_vec is not None:
+                score = np.minimum(self.resume_vectors[:self.size] @ resume_vec,
+                                   self.jd_vectors[:self.size] @ jd_vec)
+                best = int(np.argmax(score))
+                if score[best] >= self.threshold:
+                    row, similarity, match = best, round(float(score[best]), 3), "near"
+            if row is None:
+                self.misses += 1
+                return None
+            if match == "exact":
+                self.hits_exact += 1
+            else:
+                self.hits_near += 1
+            self.served[row] += 1
+            return {
+                "entry_id": self.entry_ids[row],
+                "signature": sig,
+                "match": match,
+                "similarity": similarity,
+                "served_count": int(self.served[row]),
+                "questions": self.questions[row],
+            }
+
+    def stats(self) -> dict:
+        lookups = self.hits_exact + self.hits_near + self.misses
+        return {
+            "entries": self.size,
+            "hits_exact": self.hits_exact,
+            "hits_near": self.hits_near,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_exact + self.hits_near) / lookups, 3) if lookups else 0.0,
+        }
+
+
+question_bank = QuestionBank()
@@ -0,0 +1,241 @@
+"""
+ResumeGod V4.0 — Resume parser
+Structures a resume once, at upload, into a canonical parsed artifact that
+every agent reads from: header, summary, experience/project/education
+entries with their bullets, skill groups, and other sections. Agents get
+only the slice they need (AGENT_SLICES) instead of the raw text.
+
+IDs are content hashes, so an entry or bullet keeps its ID across re-parses
+and edits elsewhere in the resume:
+    exp-1a2b3c4d          entry (experience / projects / education)
+    exp-1a2b3c4d.b5e6f7   bullet within that entry
+"""
+import re
+import hashlib
+from typing import Optional
+
+from ats_scorer import SKILLS, normalize_terms, section_heading
+from prompt_budget import normalize_text
+
+PARSER_VERSION = "parse-1"
+
+ENTRY_SECTIONS = {"experience": "exp", "projects": "prj", "education": "edu"}
+
+# Sections and limits each agent's prompt gets. None = no limit.
+AGENT_SLICES = {
+    "ats": {"sections": ("header", "summary", "experience", "projects", "education", "skills", "other"),
+            "max_entries": None, "max_bullets": None},
+    "interviewer": {"sections": ("summary", "experience", "projects", "skills"),
+                    "max_entries": 3, "max_bullets": None},
+}
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+")
+_PHONE_RE = re.compile(r"\+?\d[\d ().-]{7,}\d")
+_LINK_RE = re.compile(r"(https?://)?(www\.)?[\w-]+\.(com|io|dev|me|org|net)(/[\w./-]*)?", re.I)
+_FIELD_SPLIT_RE = re.compile(r"\s+[-–—|]\s+|\s*\|\s*")
+_DATE = r"((jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+)?(19|20)\d{2}"
+_DATE_RANGE_RE = re.compile(rf"\b{_DATE}(\s*(-|–|—|to)\s*({_DATE}|present|current|now))?\b", re.I)
+_RANGE_SEP_RE = re.compile(r"\s*(-|–|—|to)\s*", re.I)
+_SKILL_SPLIT_RE = re.compile(r"\s*[,;|•]\s*")
+
+
+def _hash(text: str, size: int) -> str:
+    key = " ".join(normalize_terms(text)) or text
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:size]
+
+
+def _unique(ident: str, taken: set) -> str:
+    """Identical lines hash alike; later duplicates get a -2, -3... suffix."""
+    out, n = ident, 1
+    while out in taken:
+        n += 1
+        out = f"{ident}-{n}"
+    taken.add(out)
+    return out
+
+
+def split_fields(heading: str, commas: bool = False) -> tuple[list[str], str]:
+    """'Acme - Engineer - 2021 - Present - SF' → (['Acme', 'Engineer', 'SF'], '2021 – Present')."""
+    match = _DATE_RANGE_RE.search(heading)
+    dates = ""
+    if match:
+        dates = _RANGE_SEP_RE.sub(" – ", match.group(0), count=1)
+        heading = heading[:match.start()] + " | " + heading[match.end():]
+    parts = _FIELD_SPLIT_RE.split(heading)
+    if commas:
+        parts = [p for part in parts for p in part.split(", ")]
+    return [p.strip(" ,-–—|") for p in parts if p.strip(" ,-–—|")], dates
+
+
+def _entry_fields(section: str, heading: str) -> dict:
+    fields, dates = split_fields(heading, commas=section == "education")
+    if section == "experience":
+        out = {"company": fields[0] if fields else heading,
+               "title": fields[1] if len(fields) > 1 else "",
+               "location": fields[-1] if len(fields) > 2 else ""}
+    elif section == "projects":
+        out = {"name": fields[0] if fields else heading,
+               "tech": ", ".join(fields[1:])}
+    else:
+        out = {"institution": fields[0] if fields else heading,
+               "degree": fields[1] if len(fields) > 1 else "",
+               "location": ", ".join(fields[2:])}
+    out["dates"] = dates
+    return out
+
+
+def _parse_entries(section: str, lines: list[str], taken: set) -> list[dict]:
+    """Non-bullet lines open an entry; '- ' lines are bullets; a lower-case line
+    continues the last bullet. In experience, a second line before any bullet
+    extends the heading (title or dates on their own line) unless both carry dates."""
+    entries: list[dict] = []
+    for line in lines:
+        if line.startswith("- "):
+            if not entries:
+                entries.append({"heading": "", "bullets": []})
+            entries[-1]["bullets"].append(line[2:].strip())
+        elif entries and entries[-1]["bullets"] and line[:1].islower():
+            entries[-1]["bullets"][-1] += " " + line
+        elif (section == "experience" and entries and entries[-1]["heading"] and not entries[-1]["bullets"]
+              and not (_DATE_RANGE_RE.search(entries[-1]["heading"]) and _DATE_RANGE_RE.search(line))):
+            entries[-1]["heading"] += " | " + line
+        else:
+            entries.append({"heading": line, "bullets": []})
+
+    prefix = ENTRY_SECTIONS[section]
+    out = []
+    for entry in entries:
+        entry_id = _unique(f"{prefix}-{_hash(entry['heading'] or ' '.join(entry['bullets'][:1]), 8)}", taken)
+        out.append({
+            "id": entry_id,
+            "heading": entry["heading"],
+            **_entry_fields(section, entry["heading"]),
+            "bullets": [{"id": _unique(f"{entry_id}.b{_hash(b, 6)}", taken), "text": b} for b in entry["bullets"]],
+        })
+    return out
+
+
+def _parse_skills(lines: list[str]) -> list[dict]:
+    groups = []
+    for line in lines:
+        line = line[2:] if line.startswith("- ") else line
+        name, sep, rest = line.partition(":")
+        if not sep or len(name) > 40:
+            name, rest = "", line
+        items = [s for s in _SKILL_SPLIT_RE.split(rest.strip()) if s]
+        if items:
+            groups.append({"category": name.strip(), "items": items})
+    return groups
+
+
+def _parse_header(lines: list[str]) -> dict:
+    text = " | ".join(lines)
+    email = _EMAIL_RE.search(text)
+    phone = _PHONE_RE.search(text)
+    without_email = _EMAIL_RE.sub(" ", text)
+    return {
+        "name": lines[0] if lines else "",
+        "email": email.group(0) if email else "",
+        "phone": phone.group(0).strip() if phone else "",
+        "links": [m.group(0) for m in _LINK_RE.finditer(without_email)],
+        "lines": lines,
+    }
+
+
+def parse_resume(resume_text: str) -> dict:
+    """Raw (PDF-extracted) text → the canonical parsed resume. Pure and deterministic."""
+    blocks: dict[str, list[str]] = {}
+    headings: dict[str, str] = {}
+    order, current = ["header"], "header"
+    for line in normalize_text(resume_text):
+        if not line:
+            continue
+        heading = section_heading(line)
+        if heading:
+            current = heading
+            if heading not in order:
+                order.append(heading)
+                headings[heading] = line
+            continue
+        blocks.setdefault(current, []).append(line)
+
+    taken: set = set()
+    skill_groups = _parse_skills(blocks.get("skills", []))
+    canonical = {t for g in skill_groups for item in g["items"] for t in normalize_terms(item) if t in SKILLS}
+    canonical.update(t for line in blocks.get("experience", []) + blocks.get("projects", [])
+                     for t in normalize_terms(line) if t in SKILLS)
+    return {
+        "version": PARSER_VERSION,
+        "sections": order,
+        "headings": headings,
+        "header": _parse_header(blocks.get("header", [])),
+        "summary": " ".join(blocks.get("summary", [])),
+        **{section: _parse_entries(section, blocks.get(section, []), taken) for section in ENTRY_SECTIONS},
+        "skills": {"groups": skill_groups, "canonical": sorted(canonical)},
+        "other": blocks.get("other", []),
+    }
+
+
+def is_current(parsed: Optional[dict]) -> bool:
+    return bool(parsed) and parsed.get("version") == PARSER_VERSION
+
+
+# --- slices for agent prompts ------------------------------------------------------
+
+_ENTRY_FIELDS = {
+    "experience": ("company", "title", "location"),
+    "projects": ("name", "tech"),
+    "education": ("institution", "degree", "location"),
+}
+
+
+def _entry_line(section: str, entry: dict) -> str:
+    return " | ".join(entry[f] for f in (*_ENTRY_FIELDS[section], "dates") if entry.get(f))
+
+
+def prompt_text(parsed: dict, sections=None, max_entries: Optional[int] = None,
+                max_bullets: Optional[int] = None) -> str:
+    """Compact, sectioned text of the parsed resume: one line per entry heading
+    (fields joined by ' | '), '- ' bullets, 'Category: a, b' skill lines."""
+    sections = sections or parsed["sections"]
+    out: list[str] = []
+    for section in parsed["sections"]:
+        if section not in sections:
+            continue
+        if section == "header":
+            out.extend(parsed["header"]["lines"])
+            continue
+        out.append(section.upper())
+        if section == "summary":
+            out.append(parsed["summary"])
+        elif section in ENTRY_SECTIONS:
+            for entry in parsed[section][:max_entries]:
+                if entry["heading"]:
+                    out.append(_entry_line(section, entry))
+                out.extend(f"- {b['text']}" for b in entry["bullets"][:max_bullets])
+        elif section == "skills":
+            out.extend(f"{g['category']}: {', '.join(g['items'])}" if g["category"] else ", ".join(g["items"])
+                       for g in parsed["skills"]["groups"])
+        else:
+            out.extend(parsed["other"])
+    return "\n".join(out)
+
+
+def agent_slice(parsed: dict, agent: str) -> str:
+    return prompt_text(parsed, **AGENT_SLICES[agent])
+
+
+def resume_data_slice(resume_data: dict, roles: int = 2, bullets: int = 3) -> dict:
+    """What the Ghostwriter needs from the optimized resume: the name, the most
+    recent roles with their top bullets, project names and skills."""
+    data = resume_data or {}
+    return {
+        "name": data.get("name", ""),
+        "experience": [
+            {"title": e.get("title", ""), "company": e.get("company", ""), "dates": e.get("dates", ""),
+             "bullets": (e.get("bullets") or [])[:bullets]}
+            for e in (data.get("experience") or [])[:roles]
+        ],
+        "projects": [p.get("name", "") for p in data.get("projects") or []],
+        "skills": [item for g in data.get("skills") or [] for item in str(g.get("items", "")).split(", ") if item],
+    }
@@ -6,43 +6,98 @@ Logs IP, geolocation, user-agent, company hints for the dashboard.
 import os
 import httpx
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from models import TrackingLog, Resume
+from models import SessionLocal, TrackingLog, Resume, TrackingRollup, TrackingCountryRollup, TrackingPlaceRollup
+from tracking_rollups import write_events, unique_viewers
+from caching import LRUCache
+from live_hub import live_hub
+from geo_db import GeoDB, GeoDBError
 
 
 # 1x1 transparent GIF — the classic tracking pixel
 TRACKING_PIXEL_GIF = (
     b"\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff"
-    b"\x00\x00\x00\x21\xf9\x04\x00\x00\x00\x00\x00\x2c\x00\x00\x00\x00"
+    b"\x00\x00\x00\x21\xf9\x04\x01\x00\x00\x00\x00\x2c\x00\x00\x00\x00"
     b"\x01\x00\x01\x00\x00\x02\x02\x44\x01\x00\x3b"
 )
 
 IPINFO_TOKEN = os.getenv("IPINFO_TOKEN", "")  # optional for higher rate limits
+GEO_URL = os.getenv("SPYGLASS_GEO_URL", "https://ipinfo.io/{ip}/json")
+GEO_DB_PATH = os.getenv("GEO_DB_PATH", "")  # offline database built with `python geo_db.py build`
+# Ask GEO_URL about IPs the offline database doesn't cover (always, when there is none).
+SPYGLASS_GEO_HTTP_FALLBACK = os.getenv("SPYGLASS_GEO_HTTP_FALLBACK", "1").lower() not in ("0", "false", "no")
+SPYGLASS_GEO_TIMEOUT = float(os.getenv("SPYGLASS_GEO_TIMEOUT", "2.0"))
+SPYGLASS_GEO_CONCURRENCY = int(os.getenv("SPYGLASS_GEO_CONCURRENCY", "20"))  # lookups in flight
+SPYGLASS_GEO_CACHE_SIZE = int(os.getenv("SPYGLASS_GEO_CACHE_SIZE", "50000"))
+SPYGLASS_GEO_TTL = float(os.getenv("SPYGLASS_GEO_TTL", str(24 * 3600)))  # seconds
+SPYGLASS_GEO_FAILURE_TTL = 60.0  # a failed lookup is retried after this
+SPYGLASS_QUEUE_MAX = int(os.getenv("SPYGLASS_QUEUE_MAX", "50000"))  # pending events; beyond this, dropped
+SPYGLASS_BATCH_SIZE = int(os.getenv("SPYGLASS_BATCH_SIZE", "500"))  # rows per INSERT
+SPYGLASS_FLUSH_MS = float(os.getenv("SPYGLASS_FLUSH_MS", "250"))  # longest a partial batch waits
 
+LOCAL_GEO = {
+    "country": "Local",
+    "city": "Localhost",
+    "region": "Dev",
+    "latitude": None,
+    "longitude": None,
+    "company_hint": "Local Development"
+}
+UNKNOWN_GEO = {
+    "country": "Unknown",
+    "city": "Unknown",
+    "region": "Unknown",
+    "latitude": None,
+    "longitude": None,
+    "company_hint": "Unknown"
+}
 
-async def geolocate_ip(ip: str) -> dict:
-    """
-    Geolocate an IP address using ipinfo.io.
-    Returns country, city, region, lat/lon, and org (company hint).
-    """
-    if ip in ("127.0.0.1", "::1", "localhost"):
-        return {
-            "country": "Local",
-            "city": "Localhost",
-            "region": "Dev",
-            "latitude": None,
-            "longitude": None,
-            "company_hint": "Local Development"
-        }
 
+def _open_geo_db() -> Optional[GeoDB]:
+    if not GEO_DB_PATH:
+        return None
     try:
-        url = f"https://ipinfo.io/{ip}/json"
-        params = {"token": IPINFO_TOKEN} if IPINFO_TOKEN else {}
+        db = GeoDB(GEO_DB_PATH)
+    except (OSError, GeoDBError) as e:
+        print(f"[Spyglass] Offline geo database unavailable: {e}")
+        return None
+    print(f"[Spyglass] Offline geo database: {db.v4_ranges} IPv4 + {db.v6_ranges} IPv6 ranges")
+    return db
+
+
+geo_db = _open_geo_db()
+geo_cache = LRUCache(maxsize=SPYGLASS_GEO_CACHE_SIZE, ttl=SPYGLASS_GEO_TTL)
+_geo_inflight: dict[str, asyncio.Task] = {}
+_geo_slots = asyncio.Semaphore(SPYGLASS_GEO_CONCURRENCY)
+_geo_http: Optional[httpx.AsyncClient] = None
+
 
-        async with httpx.AsyncClient(timeout=5.0) as http_client:
-            resp = await http_client.get(url, params=params)
+def _geo_client() -> httpx.AsyncClient:
+    global _geo_http
+    if _geo_http is None:
+        _geo_http = httpx.AsyncClient(
+            timeout=SPYGLASS_GEO_TIMEOUT,
+            limits=httpx.Limits(max_connections=SPYGLASS_GEO_CONCURRENCY,
+                                max_keepalive_connections=SPYGLASS_GEO_CONCURRENCY),
+        )
+    return _geo_http
+
+
+async def close_geo_client():
+    global _geo_http
+    if _geo_http is not None:
+        await _geo_http.aclose()
+        _geo_http = None
+
+
+async def _fetch_geo(ip: str) -> dict:
+    try:
+        async with _geo_slots:
+            params = {"token": IPINFO_TOKEN} if IPINFO_TOKEN else {}
+            resp = await _geo_client().get(GEO_URL.format(ip=ip), params=params)
             data = resp.json()
 
         # Parse "loc" field: "37.7749,-122.4194"
@@ -57,7 +112,7 @@ async def geolocate_ip(ip: str) -> dict:
         org = data.get("org", "")
         company_hint = org.split(" ", 1)[1] if " " in org else org
 
-        return {
+        geo = {
             "country": data.get("country", "Unknown"),
             "city": data.get("city", "Unknown"),
             "region": data.get("region", "Unknown"),
@@ -65,126 +120,349 @@ async def geolocate_ip(ip: str) -> dict:
             "longitude": lon,
             "company_hint": company_hint
         }
+        geo_cache.set(ip, geo)
+        return geo
     except Exception as e:
         print(f"[Spyglass] Geolocation failed for {ip}: {e}")
+        geo_cache.set(ip, UNKNOWN_GEO, ttl=SPYGLASS_GEO_FAILURE_TTL)
+        return UNKNOWN_GEO
+
+
+async def geolocate_ip(ip: str) -> dict:
+    """
+    Geolocate an IP address: the offline database (GEO_DB_PATH) first, then
+    ipinfo.io for addresses it doesn't cover, unless SPYGLASS_GEO_HTTP_FALLBACK
+    is off. Returns country, city, region, lat/lon, and org (company hint).
+    HTTP results are cached (LRU + TTL); concurrent lookups of one IP share a
+    request, and all requests go through one pooled client.
+    """
+    if ip in ("127.0.0.1", "::1", "localhost"):
+        return LOCAL_GEO
+    if geo_db is not None:
+        geo = geo_db.lookup(ip)
+        if geo is not None:
+            return geo
+    if not SPYGLASS_GEO_HTTP_FALLBACK:
+        return UNKNOWN_GEO
+    cached = geo_cache.get(ip)
+    if cached is not None:
+        return cached
+    task = _geo_inflight.get(ip)
+    if task is None:
+        task = asyncio.create_task(_fetch_geo(ip))
+        _geo_inflight[ip] = task
+        task.add_done_callback(lambda _: _geo_inflight.pop(ip, None))
+    return await asyncio.shield(task)
+
+
+def _resolve_trackers(trackers: list[str]) -> dict[str, tuple[str, str]]:
+    """Tracking tokens (or resume ids) → (resume id, owner's user id), in one query."""
+    db = SessionLocal()
+    try:
+        rows = db.query(Resume.id, Resume.tracking_token, Resume.user_id).filter(
+            or_(Resume.tracking_token.in_(trackers), Resume.id.in_(trackers))
+        ).all()
+    finally:
+        db.close()
+    found = {}
+    for resume_id, token, user_id in rows:
+        found[resume_id] = (resume_id, user_id)
+        if token:
+            found[token] = (resume_id, user_id)
+    return found
+
+
+class TrackingPipeline:
+    """
+    Write-behind for pixel hits. submit() only enqueues, so the pixel is
+    answered at once; a single consumer drains the bounded queue in batches
+    (SPYGLASS_BATCH_SIZE events or SPYGLASS_FLUSH_MS, whichever comes
+    first), resolves the batch's trackers and IPs together and writes it
+    with one multi-row INSERT, counting it into the rollups in the same
+    transaction. A full queue drops events instead of slowing the pixel down.
+    Once a batch is committed, each event is published to live_hub on its
+    "resume:<id>" and "user:<id>" topics for dashboards streaming it.
+    """
+
+    def __init__(self, maxsize: int = SPYGLASS_QUEUE_MAX, batch_size: int = SPYGLASS_BATCH_SIZE,
+                 flush_ms: float = SPYGLASS_FLUSH_MS):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._owners = LRUCache(maxsize=10000, ttl=300)  # tracker → (resume id, user id); ("", "") = unknown
+        self.received = 0
+        self.dropped = 0
+        self.written = 0
+        self.unknown = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self._run(), name="spyglass-writer")
+
+    async def stop(self):
+        """Write what is queued, then stop."""
+        if self._task is None:
+            return
+        await self.queue.put(None)
+        await self._task
+        self._task = None
+
+    def submit(self, tracker: str, ip_address: str, user_agent: str, referer: Optional[str] = None,
+               event_type: str = "view") -> bool:
+        if self.queue is None:
+            self.dropped += 1
+            return False
+        try:
+            self.queue.put_nowait((tracker, ip_address, user_agent, referer, event_type, datetime.utcnow()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.received += 1
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                while len(batch) < self.batch_size and not self.queue.empty() and batch[-1] is not None:
+                    batch.append(self.queue.get_nowait())
+                remaining = deadline - loop.time()
+                if len(batch) >= self.batch_size or batch[-1] is None or remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, 0.01))
+            stopping = batch[-1] is None
+            events = [e for e in batch if e is not None]
+            if not events:
+                continue
+            try:
+                await self._write(events)
+            except Exception as e:
+                self.failed += len(events)
+                print(f"[Spyglass] Failed to write {len(events)} tracking events: {e}")
+
+    async def _owners_for(self, trackers: set[str]) -> dict[str, tuple[str, str]]:
+        known, missing = {}, []
+        for tracker in trackers:
+            owner = self._owners.get(tracker)
+            if owner is None:
+                missing.append(tracker)
+            else:
+                known[tracker] = owner
+        if missing:
+            found = await asyncio.to_thread(_resolve_trackers, missing)
+            for tracker in missing:
+                known[tracker] = found.get(tracker, ("", ""))
+                self._owners.set(tracker, known[tracker], ttl=None if tracker in found else 60)
+        return known
+
+    async def _write(self, events: list[tuple]):
+        owners = await self._owners_for({e[0] for e in events})
+        known = [e for e in events if owners[e[0]][0]]
+        self.unknown += len(events) - len(known)
+        events = known
+        ips = list({e[1] for e in events})
+        geos = dict(zip(ips, await asyncio.gather(*(geolocate_ip(ip) for ip in ips))))
+        rows = [
+            {
+                "resume_id": owners[tracker][0],
+                "event_type": event_type,
+                "ip_address": ip,
+                "user_agent": user_agent,
+                "referer": referer,
+                "viewed_at": at,
+                **geos[ip],
+            }
+            for tracker, ip, user_agent, referer, event_type, at in events
+        ]
+        if rows:
+            await asyncio.to_thread(write_events, rows)
+        self.written += len(rows)
+        self.batches += 1
+        for row, (tracker, *_) in zip(rows, events):
+            self._publish(row, owners[tracker][1])
+
+    @staticmethod
+    def _publish(row: dict, user_id: str):
+        topics = (f"resume:{row['resume_id']}", f"user:{user_id}")
+        if not live_hub.has_subscribers(*topics):
+            return
+        live_hub.publish({
+            "resume_id": row["resume_id"],
+            "event_type": row["event_type"],
+            "ip_address": row["ip_address"],
+            "country": row.get("country"),
+            "city": row.get("city"),
+            "company_hint": row.get("company_hint"),
+            "user_agent": row["user_agent"],
+            "latitude": row.get("latitude"),
+            "longitude": row.get("longitude"),
+            "viewed_at": row["viewed_at"].isoformat()
+        }, *topics)
+
+    def stats(self) -> dict:
         return {
-            "country": "Unknown",
-            "city": "Unknown",
-            "region": "Unknown",
-            "latitude": None,
-            "longitude": None,
-            "company_hint": "Unknown"
+            "received": self.received,
+            "written": self.written,
+            "dropped": self.dropped,
+            "unknown_tracker": self.unknown,
+            "failed": self.failed,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "batches": self.batches,
+            "avg_batch": round(self.written / self.batches, 1) if self.batches else 0.0,
+            "geo_cache": geo_cache.stats(),
+            "geo_db": geo_db.stats() if geo_db is not None else None,
+            "live": live_hub.stats(),
         }
 
 
-async def log_tracking_event(
-    db: Session,
-    resume_id: str,
+tracking_pipeline = TrackingPipeline()
+
+
+def log_tracking_event(
+    tracker: str,
     ip_address: str,
     user_agent: str,
     referer: Optional[str] = None,
     event_type: str = "view"
-) -> TrackingLog:
+) -> bool:
     """
-    Core tracking function. Geolocates IP and persists to DB.
+    Core tracking function. Queues the view for tracking_pipeline, which
+    geolocates the IP and persists it in the background. `tracker` is the
+    resume's tracking token (or its id). False if the event was dropped.
     """
-    geo = await geolocate_ip(ip_address)
-
-    log = TrackingLog(
-        resume_id=resume_id,
-        event_type=event_type,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        country=geo["country"],
-        city=geo["city"],
-        region=geo["region"],
-        latitude=geo["latitude"],
-        longitude=geo["longitude"],
-        company_hint=geo["company_hint"],
-        referer=referer,
-        viewed_at=datetime.utcnow()
-    )
+    return tracking_pipeline.submit(tracker, ip_address, user_agent, referer, event_type)
+
+
+EVENTS_PAGE_SIZE = 50
+EVENTS_MAX_PAGE_SIZE = 500
+MAP_POINTS_LIMIT = 500  # distinct locations, busiest first
+HOURLY_WINDOW = 48  # hours of per-hour views in the stats
+HIDDEN_COMPANY_HINTS = ("Unknown", "Local Development")
+
 
-    db.add(log)
-    db.commit()
-    db.refresh(log)
-    print(f"[Spyglass] Logged view: {ip_address} ({geo['city']}, {geo['country']}) → Resume {resume_id[:8]}")
-    return log
+def _event_cursor(viewed_at: datetime, event_id: str) -> str:
+    return f"{viewed_at.isoformat()}|{event_id}"
 
 
-def get_tracking_stats(db: Session, resume_id: str) -> dict:
+def list_tracking_events(db: Session, resume_id: str, limit: int = EVENTS_PAGE_SIZE,
+                         cursor: Optional[str] = None) -> dict:
+    """
+    One page of a resume's tracking events, newest first. Keyset pagination:
+    pass the returned next_cursor to get the following page; each page is an
+    index range scan on (resume_id, viewed_at), however deep it is.
+    """
+    limit = max(1, min(limit, EVENTS_MAX_PAGE_SIZE))
+    query = db.query(
+        TrackingLog.id, TrackingLog.event_type, TrackingLog.ip_address, TrackingLog.country, TrackingLog.city,
+        TrackingLog.company_hint, TrackingLog.user_agent, TrackingLog.latitude, TrackingLog.longitude,
+        TrackingLog.viewed_at,
+    ).filter(TrackingLog.resume_id == resume_id, TrackingLog.viewed_at.isnot(None))
+    if cursor:
+        at, _, after_id = cursor.partition("|")
+        at = datetime.fromisoformat(at)
+        # the first term bounds the index range scan; the second breaks ties
+        query = query.filter(TrackingLog.viewed_at <= at,
+                             or_(TrackingLog.viewed_at < at, TrackingLog.id < after_id))
+    rows = query.order_by(TrackingLog.viewed_at.desc(), TrackingLog.id.desc()).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "events": [
+            {
+                "id": row.id,
+                "event_type": row.event_type,
+                "ip_address": row.ip_address,
+                "country": row.country,
+                "city": row.city,
+                "company_hint": row.company_hint,
+                "user_agent": row.user_agent,
+                "latitude": row.latitude,
+                "longitude": row.longitude,
+                "viewed_at": row.viewed_at.isoformat()
+            }
+            for row in rows
+        ],
+        "next_cursor": _event_cursor(rows[-1].viewed_at, rows[-1].id) if more else None
+    }
+
+
+def get_tracking_stats(db: Session, resume_id: str, events_limit: int = EVENTS_PAGE_SIZE,
+                       cursor: Optional[str] = None) -> dict:
     """
     Aggregate tracking stats for a resume.
     Returns total views, unique IPs, timeline, and geographic breakdown.
+    Read from the rollup tables (tracking_rollups), so the cost grows with
+    the days and places a resume was seen from, not its views; unique
+    viewers is a HyperLogLog estimate. Events come one page at a time (see
+    list_tracking_events) and only go back TRACKING_RAW_RETENTION_DAYS.
     """
-    logs = db.query(TrackingLog).filter(TrackingLog.resume_id == resume_id).all()
+    days = db.query(TrackingRollup.period_start, TrackingRollup.views).filter(
+        TrackingRollup.resume_id == resume_id, TrackingRollup.period == "day"
+    ).order_by(TrackingRollup.period_start).all()
 
-    if not logs:
-        return {
-            "total_views": 0,
-            "unique_viewers": 0,
-            "events": [],
-            "geo_breakdown": {},
-            "company_hints": [],
-            "timeline": []
-        }
+    # Daily timeline
+    timeline = [{"date": day.date().isoformat(), "views": views} for day, views in days]
+    total_views = sum(views for _, views in days)
 
-    unique_ips = set(log.ip_address for log in logs)
-    geo_breakdown = {}
-    company_hints = []
+    since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=HOURLY_WINDOW - 1)
+    hourly = [
+        {"hour": hour.isoformat(), "views": views}
+        for hour, views in db.query(TrackingRollup.period_start, TrackingRollup.views).filter(
+            TrackingRollup.resume_id == resume_id, TrackingRollup.period == "hour",
+            TrackingRollup.period_start >= since
+        ).order_by(TrackingRollup.period_start)
+    ]
 
-    for log in logs:
-        country = log.country or "Unknown"
-        geo_breakdown[country] = geo_breakdown.get(country, 0) + 1
-        if log.company_hint and log.company_hint not in ("Unknown", "Local Development"):
-            company_hints.append(log.company_hint)
+    geo_breakdown = dict(
+        db.query(TrackingCountryRollup.country, func.sum(TrackingCountryRollup.views)).filter(
+            TrackingCountryRollup.resume_id == resume_id
+        ).group_by(TrackingCountryRollup.country).all()
+    )
 
-    events = [
+    of_resume = TrackingPlaceRollup.resume_id == resume_id
+    company_hints = [
+        hint for (hint,) in db.query(TrackingPlaceRollup.company_hint).filter(
+            of_resume, TrackingPlaceRollup.company_hint.isnot(None),
+            TrackingPlaceRollup.company_hint.notin_(HIDDEN_COMPANY_HINTS)
+        ).distinct()
+    ]
+    map_points = [
         {
-            "id": log.id,
-            "event_type": log.event_type,
-            "ip_address": log.ip_address,
-            "country": log.country,
-            "city": log.city,
-            "company_hint": log.company_hint,
-            "user_agent": log.user_agent,
-            "latitude": log.latitude,
-            "longitude": log.longitude,
-            "viewed_at": log.viewed_at.isoformat() if log.viewed_at else None
+            "lat": lat,
+            "lng": lng,
+            "city": city,
+            "company": company,
+            "views": views,
+            "time": at.isoformat() if at else None
         }
-        for log in sorted(logs, key=lambda x: x.viewed_at, reverse=True)
-    ]
-
-    # Daily timeline
-    from collections import defaultdict
-    timeline_dict = defaultdict(int)
-    for log in logs:
-        day = log.viewed_at.strftime("%Y-%m-%d") if log.viewed_at else "Unknown"
-        timeline_dict[day] += 1
-
-    timeline = [
-        {"date": day, "views": count}
-        for day, count in sorted(timeline_dict.items())
+        for lat, lng, city, company, views, at in db.query(
+            TrackingPlaceRollup.latitude, TrackingPlaceRollup.longitude, TrackingPlaceRollup.city,
+            TrackingPlaceRollup.company_hint, TrackingPlaceRollup.views, TrackingPlaceRollup.last_viewed_at
+        ).filter(
+            of_resume, TrackingPlaceRollup.latitude.isnot(None), TrackingPlaceRollup.latitude != 0,
+            TrackingPlaceRollup.longitude.isnot(None), TrackingPlaceRollup.longitude != 0
+        ).order_by(TrackingPlaceRollup.views.desc()).limit(MAP_POINTS_LIMIT)
     ]
 
+    page = list_tracking_events(db, resume_id, events_limit, cursor) if total_views else \
+        {"events": [], "next_cursor": None}
     return {
-        "total_views": len(logs),
-        "unique_viewers": len(unique_ips),
-        "events": events,
+        "total_views": total_views,
+        "unique_viewers": unique_viewers(db, resume_id) if total_views else 0,
+        "events": page["events"],
+        "next_cursor": page["next_cursor"],
         "geo_breakdown": geo_breakdown,
-        "company_hints": list(set(company_hints)),
+        "company_hints": company_hints,
         "timeline": timeline,
-        "map_points": [
-            {
-                "lat": log.latitude,
-                "lng": log.longitude,
-                "city": log.city,
-                "company": log.company_hint,
-                "time": log.viewed_at.isoformat() if log.viewed_at else None
-            }
-            for log in logs
-            if log.latitude and log.longitude
-        ]
+        "hourly": hourly,
+        "map_points": map_points
     }
 
 
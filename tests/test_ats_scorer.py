@@ -0,0 +1,74 @@
+"""
+Local ATS scorer: what a realistic JD turns into as keywords, and what the
+candidate is told is missing (gap_analysis.keywords_missing).
+
+    python -m pytest tests/test_ats_scorer.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ats_scorer import ATSScorer, normalize_terms  # noqa: E402
+
+JD = """Senior Backend Engineer — Payments Platform
+
+About the role
+You'll join the payments team and build Kafka-based event pipelines that move money reliably. We're looking
+for someone who can communicate clearly with product and thrive in a fast-paced environment. You will own
+services end to end, from design to on-call.
+
+What you'll do
+- Design and build Python microservices and REST APIs on AWS
+- Run data-driven experiments and keep our Kafka-based pipelines healthy
+- Operate PostgreSQL and Redis at scale; write unit tests for everything you ship
+- Deploy with Docker and Kubernetes through our CI/CD pipelines
+- Communicate clearly with stakeholders about incidents and trade-offs
+
+What you need
+- 5+ years building distributed systems in Python or Go
+- Experience with Kafka, PostgreSQL and Redis
+- Comfort with Kubernetes, Terraform and observability tooling (Prometheus, Grafana)
+- You thrive on ownership and communicate clearly in writing
+- PCI DSS experience is a plus; we'll teach you the rest
+"""
+
+RESUME = """Jane Doe
+jane@example.com
+SUMMARY
+Backend engineer focused on payments and event pipelines.
+EXPERIENCE
+Backend Engineer, Acme Pay
+- Built Python microservices and REST APIs on AWS handling card payments
+- Ran Kafka consumers and producers for the ledger pipeline
+- Operated PostgreSQL; added unit tests and CI/CD with GitHub Actions
+SKILLS
+Python, Kafka, PostgreSQL, Docker, AWS, Linux, Git
+"""
+
+
+def test_keywords_missing_for_sample_jd():
+    result = ATSScorer().score(RESUME, JD)
+    assert result["missing"] == [
+        "kubernetes", "redis", "distributed systems", "grafana", "observability", "pci dss", "prometheus",
+        "terraform", "design", "data", "deploy", "experiment", "incident", "money", "on-call", "operate",
+        "ownership", "platform", "product", "scale", "service", "stakeholder", "tooling", "trade-off",
+    ]
+    assert "kafka" in result["matched"]
+
+
+def test_no_contraction_fragments_or_filler_keywords():
+    terms = ATSScorer().keywords(JD).terms
+    for noise in ("ll", "re", "clearly", "thrive", "communicate", "need", "communicate clearly",
+                  "kafka-based", "data-driven", "fast-paced", "end"):
+        assert noise not in terms
+
+
+def test_based_and_driven_compounds_fold_to_skills():
+    assert normalize_terms("Kafka-based pipelines") == ["kafka", "based", "pipeline"]
+    assert normalize_terms("event-driven, event driven") == ["event-driven", "event-driven"]
+
+
+def test_score_many_empty():
+    scores = ATSScorer().score_many([], JD)
+    assert scores.shape == (0,)
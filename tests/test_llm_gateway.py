@@ -0,0 +1,88 @@
+"""
+LLMGateway concurrency slots are returned on every exit path, including
+cancellation while a stream is still being opened.
+
+    python -m pytest tests/test_llm_gateway.py
+"""
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_gateway import LLMGateway  # noqa: E402
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """chat.completions.create() that blocks until `opened` is set (streams) or answers at once."""
+
+    def __init__(self):
+        self.opened = asyncio.Event()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            await self.opened.wait()
+            return FakeStream(["a", "b"])
+        return SimpleNamespace(usage=None, content="ok")
+
+
+def gateway(max_concurrency: int = 2) -> LLMGateway:
+    gw = LLMGateway(rpm=10000, tpm=10_000_000, max_concurrency=max_concurrency)
+    gw._client = FakeClient()
+    return gw
+
+
+async def consume(gw: LLMGateway):
+    return [chunk async for chunk in gw.stream_chat(messages=[{"role": "user", "content": "hi"}])]
+
+
+def test_cancel_while_opening_stream_releases_slot():
+    async def run():
+        gw = gateway(max_concurrency=2)
+        streams = [asyncio.create_task(consume(gw)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert gw.in_flight == 2  # both slots held by streams still opening
+        for task in streams:
+            task.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+        assert gw.in_flight == 0
+        response = await asyncio.wait_for(gw.chat(messages=[{"role": "user", "content": "hi"}]), 1.0)
+        assert response.content == "ok"
+        assert gw.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_cancel_mid_stream_and_early_close_release_slot():
+    async def run():
+        gw = gateway(max_concurrency=1)
+        gw._client.opened.set()
+        assert await consume(gw) == ["a", "b"]
+        assert gw.in_flight == 0
+
+        stream = gw.stream_chat(messages=[{"role": "user", "content": "hi"}])
+        assert await stream.__anext__() == "a"
+        assert gw.in_flight == 1
+        await stream.aclose()
+        assert gw.in_flight == 0
+
+    asyncio.run(run())
@@ -0,0 +1,186 @@
+"""
+ResumeGod V4.0 — Tracking rollups
+Pre-aggregated Spyglass analytics, so a dashboard load costs O(days) rows
+instead of O(views):
+
+    tracking_rollups          views per resume per hour and per day, plus a
+                              HyperLogLog sketch of viewer IPs for each day
+    tracking_country_rollups  views per resume per day per country
+    tracking_place_rollups    views per resume per (location, company)
+
+write_events() inserts a batch of TrackingLog rows and adds them to the
+rollups in the same transaction (the Spyglass write-behind pipeline calls
+it), marking them rolled_up. compact() folds any rows that are not rolled
+up yet (older data, rows written some other way) and deletes raw rows
+older than TRACKING_RAW_RETENTION_DAYS; the rollups keep their counts.
+
+Counters are upserted (INSERT ... ON CONFLICT DO UPDATE, SQLite and
+Postgres); day sketches are read, merged and written back, serialized by
+a process-wide lock.
+"""
+import os
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from hyperloglog import HyperLogLog
+from models import SessionLocal, TrackingLog, TrackingRollup, TrackingCountryRollup, TrackingPlaceRollup
+
+TRACKING_RAW_RETENTION_DAYS = float(os.getenv("TRACKING_RAW_RETENTION_DAYS", "30"))
+TRACKING_COMPACT_BATCH = int(os.getenv("TRACKING_COMPACT_BATCH", "5000"))  # raw rows folded per transaction
+TRACKING_COMPACT_INTERVAL = float(os.getenv("TRACKING_COMPACT_INTERVAL", "3600"))  # seconds between compactions
+
+_rollup_lock = threading.Lock()
+
+
+def place_key(latitude, longitude, city, company_hint) -> str:
+    return f"{latitude}|{longitude}|{city}|{company_hint}"
+
+
+def _upsert(db: Session, model, rows: list[dict], keys: list[str], values: dict):
+    """INSERT rows; on a key conflict apply `values` (column → fn(table, excluded))."""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        raise RuntimeError(f"Tracking rollups need SQLite or Postgres, not {dialect}")
+    stmt = (sqlite if dialect == "sqlite" else postgresql).insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: fn(model.__table__.c, stmt.excluded) for column, fn in values.items()},
+    )
+    db.execute(stmt, rows)
+
+
+def fold_events(db: Session, events: list[dict]):
+    """Add TrackingLog rows (as column dicts) to the rollups in db's transaction.
+    Call with _rollup_lock held; the caller commits."""
+    hours, days, countries, places = Counter(), Counter(), Counter(), {}
+    viewers = defaultdict(set)
+    for e in events:
+        at = e.get("viewed_at") or datetime.utcnow()
+        hour = at.replace(minute=0, second=0, microsecond=0)
+        day = hour.replace(hour=0)
+        resume_id = e["resume_id"]
+        hours[resume_id, hour] += 1
+        days[resume_id, day] += 1
+        if e.get("ip_address"):
+            viewers[resume_id, day].add(e["ip_address"])
+        countries[resume_id, day, e.get("country") or "Unknown"] += 1
+        key = place_key(e.get("latitude"), e.get("longitude"), e.get("city"), e.get("company_hint"))
+        place = places.get((resume_id, key))
+        if place is None:
+            places[resume_id, key] = {
+                "resume_id": resume_id, "place_key": key, "latitude": e.get("latitude"),
+                "longitude": e.get("longitude"), "city": e.get("city"), "company_hint": e.get("company_hint"),
+                "views": 1, "last_viewed_at": at,
+            }
+        else:
+            place["views"] += 1
+            place["last_viewed_at"] = max(place["last_viewed_at"], at)
+
+    # Day sketches: merge into what is stored
+    stored = {}
+    if days:
+        for resume_id, day, sketch in db.query(
+                TrackingRollup.resume_id, TrackingRollup.period_start, TrackingRollup.viewers).filter(
+                TrackingRollup.period == "day",
+                TrackingRollup.resume_id.in_({resume_id for resume_id, _ in days}),
+                TrackingRollup.period_start.in_({day for _, day in days})):
+            stored[resume_id, day] = sketch
+    day_rows = []
+    for (resume_id, day), views in days.items():
+        sketch = HyperLogLog.from_bytes(stored.get((resume_id, day)))
+        sketch.update(viewers[resume_id, day])
+        day_rows.append({"resume_id": resume_id, "period": "day", "period_start": day, "views": views,
+                         "viewers": sketch.to_bytes()})
+
+    add_views = {"views": lambda t, new: t.views + new.views}
+    _upsert(db, TrackingRollup, day_rows, ["resume_id", "period", "period_start"],
+            {**add_views, "viewers": lambda t, new: new.viewers})
+    _upsert(db, TrackingRollup, [
+        {"resume_id": resume_id, "period": "hour", "period_start": hour, "views": views, "viewers": None}
+        for (resume_id, hour), views in hours.items()
+    ], ["resume_id", "period", "period_start"], add_views)
+    _upsert(db, TrackingCountryRollup, [
+        {"resume_id": resume_id, "day": day, "country": country, "views": views}
+        for (resume_id, day, country), views in countries.items()
+    ], ["resume_id", "day", "country"], add_views)
+    _upsert(db, TrackingPlaceRollup, list(places.values()), ["resume_id", "place_key"], {
+        **add_views,
+        "last_viewed_at": lambda t, new: case((new.last_viewed_at > t.last_viewed_at, new.last_viewed_at),
+                                              else_=t.last_viewed_at),
+    })
+
+
+def write_events(rows: list[dict]):
+    """Insert TrackingLog rows and count them in the rollups, in one transaction."""
+    with _rollup_lock:
+        db = SessionLocal()
+        try:
+            db.execute(insert(TrackingLog), [dict(row, rolled_up=True) for row in rows])
+            fold_events(db, rows)
+            db.commit()
+        finally:
+            db.close()
+
+
+FOLD_COLUMNS = ("id", "resume_id", "ip_address", "country", "city", "latitude", "longitude", "company_hint",
+                "viewed_at")
+
+
+def compact(retention_days: float = TRACKING_RAW_RETENTION_DAYS,
+            batch_size: int = TRACKING_COMPACT_BATCH) -> dict:
+    """Fold raw events that aren't in the rollups yet, then delete raw events
+    older than retention_days (all of which are in the rollups by then)."""
+    folded = 0
+    while True:
+        with _rollup_lock:
+            db = SessionLocal()
+            try:
+                rows = db.query(*(getattr(TrackingLog, c) for c in FOLD_COLUMNS)).filter(
+                    or_(TrackingLog.rolled_up.is_(False), TrackingLog.rolled_up.is_(None))
+                ).limit(batch_size).all()
+                if rows:
+                    events = [dict(zip(FOLD_COLUMNS, row)) for row in rows]
+                    fold_events(db, events)
+                    db.query(TrackingLog).filter(TrackingLog.id.in_([e["id"] for e in events])).update(
+                        {"rolled_up": True}, synchronize_session=False)
+                    db.commit()
+            finally:
+                db.close()
+        folded += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    db = SessionLocal()
+    try:
+        deleted = db.query(TrackingLog).filter(
+            TrackingLog.viewed_at < cutoff, TrackingLog.rolled_up.is_(True)
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    if folded or deleted:
+        print(f"[Spyglass] Compaction: folded {folded} events into rollups, "
+              f"deleted {deleted} raw events older than {retention_days:g} days")
+    return {"folded": folded, "deleted": deleted, "cutoff": cutoff.isoformat()}
+
+
+def unique_viewers(db: Session, resume_id: str, since: Optional[datetime] = None) -> int:
+    """Distinct viewer IPs (HyperLogLog estimate) across the resume's day rollups."""
+    query = db.query(TrackingRollup.viewers).filter(
+        TrackingRollup.resume_id == resume_id, TrackingRollup.period == "day")
+    if since is not None:
+        query = query.filter(TrackingRollup.period_start >= since)
+    merged = HyperLogLog()
+    for (sketch,) in query:
+        if sketch:
+            merged.merge(HyperLogLog.from_bytes(sketch))
+    return merged.count()